@@ -0,0 +1,16 @@
+import numpy as np
+import pandas as pd
+
+
+def synthetic_bars(rows: int, seed: int = 0, freq: str = '1h') -> pd.DataFrame:
+    """Random-walk OHLCV frame shaped like the output of fetch_yahoo_finance_data."""
+    index = pd.date_range(end=pd.Timestamp.now(tz='America/New_York').floor('h'), periods=rows, freq=freq)
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, rows))
+    return pd.DataFrame({
+        'Open': close + rng.normal(0, 0.1, rows),
+        'High': close + 1,
+        'Low': close - 1,
+        'Close': close,
+        'Volume': rng.integers(1_000, 1_000_000, rows),
+    }, index=index)
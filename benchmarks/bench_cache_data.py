@@ -0,0 +1,62 @@
+import argparse
+import time
+from tradingcore.data.postgresql import connect_db, init_database, copy_bars
+from _data import synthetic_bars
+
+
+def per_row_insert(conn, ticker, interval, data):
+    """The previous cache_data implementation: one INSERT per bar."""
+    cursor = conn.cursor()
+    for index, row in data.iterrows():
+        cursor.execute("""
+        INSERT INTO DataTimeSeries (date, ticker, interval, open, high, low, close, volume)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        ON CONFLICT (date, ticker, interval) DO NOTHING
+        """, (index, ticker, interval, float(row['Open']), float(row['High']), float(row['Low']),
+              float(row['Close']), int(row['Volume'])))
+    conn.commit()
+    cursor.close()
+
+
+def clear(conn, ticker):
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM DataTimeSeries WHERE ticker = %s", (ticker,))
+    conn.commit()
+    cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-row INSERT against COPY ingestion of DataTimeSeries bars")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--user', default='postgres')
+    parser.add_argument('--password', default='postgres')
+    parser.add_argument('--database', default='timeseries_db')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 10_000, 50_000])
+    args = parser.parse_args()
+
+    init_database(args.host, args.user, args.password, args.database)
+    conn = connect_db(args.host, args.user, args.password, args.database)
+    ticker = '__BENCH__'
+
+    print(f"{'rows':>8} {'per-row rows/s':>16} {'copy rows/s':>14} {'speedup':>8}")
+    for rows in args.rows:
+        data = synthetic_bars(rows)
+
+        clear(conn, ticker)
+        start = time.perf_counter()
+        per_row_insert(conn, ticker, '1h', data)
+        per_row = rows / (time.perf_counter() - start)
+
+        clear(conn, ticker)
+        start = time.perf_counter()
+        copy_bars(conn, ticker, '1h', data)
+        bulk = rows / (time.perf_counter() - start)
+
+        print(f"{rows:>8} {per_row:>16,.0f} {bulk:>14,.0f} {bulk / per_row:>7.1f}x")
+
+    clear(conn, ticker)
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
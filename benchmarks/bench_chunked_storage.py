@@ -0,0 +1,85 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from tradingcore.data.postgresql import connect_db, init_database
+from tradingcore.data.storage import PostgresBarStore
+from tradingcore.data.chunks import ChunkedBarStore
+
+
+def synthetic_minute_bars(days: int, seed: int) -> pd.DataFrame:
+    """Regular-session 1m bars with cent-rounded prices, like Yahoo Finance quotes."""
+    sessions = pd.bdate_range(end=pd.Timestamp.now(tz='UTC').normalize(), periods=days)
+    index = pd.DatetimeIndex(np.concatenate([
+        pd.date_range(day + pd.Timedelta(hours=14, minutes=30), periods=390, freq='min').values for day in sessions
+    ])).tz_localize('UTC')
+    rng = np.random.default_rng(seed)
+    close = np.round(100 + np.cumsum(rng.normal(0, 0.05, len(index))), 2)
+    return pd.DataFrame({
+        'Open': np.round(close + rng.normal(0, 0.02, len(index)), 2),
+        'High': close + 0.05,
+        'Low': close - 0.05,
+        'Close': close,
+        'Volume': rng.integers(100, 100_000, len(index)),
+    }, index=index)
+
+
+def table_size(conn, table: str) -> int:
+    cursor = conn.cursor()
+    cursor.execute("SELECT pg_total_relation_size(to_regclass(%s))", (table,))
+    size = cursor.fetchone()[0]
+    cursor.close()
+    return size
+
+
+def clear(conn):
+    cursor = conn.cursor()
+    cursor.execute("TRUNCATE DataTimeSeries, DataTimeSeries_chunks, ticker_state")
+    conn.commit()
+    cursor.close()
+
+
+def measure(store, tickers, interval) -> tuple:
+    # Bars per second reading every ticker on its own, then all of them at once
+    start = time.perf_counter()
+    bars = sum(len(store.read_bars(ticker, interval)['date']) for ticker in tickers)
+    single = bars / (time.perf_counter() - start)
+    start = time.perf_counter()
+    bars = len(store.read_bars_many(tickers, interval)['date'])
+    many = bars / (time.perf_counter() - start)
+    return single, many
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the row and chunked DataTimeSeries layouts on 1m bars")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--user', default='postgres')
+    parser.add_argument('--password', default='postgres')
+    parser.add_argument('--database', default='bench_storage_db')
+    parser.add_argument('--tickers', type=int, default=20)
+    parser.add_argument('--days', type=int, default=20)
+    args = parser.parse_args()
+
+    init_database(args.host, args.user, args.password, args.database)
+    conn = connect_db(args.host, args.user, args.password, args.database)
+    stores = {'rows': (PostgresBarStore(conn), 'datatimeseries'), 'chunks': (ChunkedBarStore(conn), 'datatimeseries_chunks')}
+    tickers = [f'__BENCH{i}__' for i in range(args.tickers)]
+    frames = [synthetic_minute_bars(args.days, seed) for seed in range(args.tickers)]
+    print(f"{len(tickers)} tickers x {len(frames[0])} 1m bars")
+
+    print(f"{'layout':>8} {'write bars/s':>14} {'read bars/s':>13} {'read_many bars/s':>17} {'disk MB':>9}")
+    for name, (store, table) in stores.items():
+        clear(conn)
+        start = time.perf_counter()
+        for ticker, data in zip(tickers, frames):
+            store.write_bars(ticker, '1m', data)
+        written = sum(map(len, frames)) / (time.perf_counter() - start)
+        single, many = measure(store, tickers, '1m')
+        print(f"{name:>8} {written:>14,.0f} {single:>13,.0f} {many:>17,.0f} {table_size(conn, table) / 2**20:>9.2f}")
+
+    clear(conn)
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import argparse
+import hashlib
+import time
+import pandas as pd
+from tradingcore.indicators import MovingAverage
+from tradingcore.utils.data_version import fingerprint, stamp
+from _data import synthetic_bars
+
+
+def sha256_hash(data):
+    """The previous per-call cache key of every indicator."""
+    return hashlib.sha256(pd.util.hash_pandas_object(data).values).hexdigest()
+
+
+def per_call(func, data, repeat: int) -> float:
+    # Mean seconds per call
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(data)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the SHA-256 data hash against the data fingerprint per calculate() call")
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'sha256 us':>10} {'stamped us':>11} {'unstamped us':>13} {'MA hit before us':>17} {'MA hit after us':>16}")
+    for rows in args.rows:
+        data = synthetic_bars(rows)
+        before = per_call(sha256_hash, data, args.repeat)
+        # TimeSeriesData frames carry a revision, other frames also checksum their last row
+        unstamped = per_call(fingerprint, data, args.repeat)
+        stamp(data)
+        stamped = per_call(fingerprint, data, args.repeat)
+
+        # A repeated calculate() on unchanged bars only pays for the cache key and the signal
+        indicator = MovingAverage('MA')
+        indicator.calculate(data)
+        hit = per_call(indicator.calculate, data, args.repeat)
+        print(f"{rows:>9} {before * 1e6:>10,.0f} {stamped * 1e6:>11,.1f} {unstamped * 1e6:>13,.1f} "
+              f"{(hit - stamped + before) * 1e6:>17,.0f} {hit * 1e6:>16,.0f}")
+
+
+if __name__ == "__main__":
+    main()
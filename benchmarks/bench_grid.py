@@ -0,0 +1,52 @@
+import argparse
+import time
+import numpy as np
+from tradingcore.indicators import BollingerBands, FeatureStore, IchimokuCloud, KeltnerChannel, MACD, MovingAverage, RSI
+from _data import synthetic_bars
+
+
+def one_by_one(cls, data, strategy, grid):
+    """One indicator and calculate() per parameter combination, as a parameter sweep did before."""
+    combinations = []
+    for values in zip(*[axis.ravel() for axis in np.meshgrid(*grid.values(), indexing='ij')]):
+        params = dict(zip(grid, values))
+        combinations.append(cls(strategy, features=FeatureStore(), **params).calculate(data).to_numpy())
+    return np.array(combinations)
+
+
+def timed(func, repeat: int) -> float:
+    # Mean seconds per call
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare parameter sweeps of one calculate() per combination with batch()")
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    sweeps = [
+        (MovingAverage, 'MA', {'length': list(range(5, 205, 5))}),
+        (RSI, 'RSI', {'length': list(range(5, 31))}),
+        (MACD, 'MACD', {'fast': [8, 10, 12, 14], 'slow': [20, 26, 32], 'signal': [5, 7, 9]}),
+        (BollingerBands, 'Bollinger', {'length': [10, 15, 20, 25, 30], 'std': [1.5, 2.0, 2.5, 3.0]}),
+        (KeltnerChannel, 'KC', {'length': [10, 15, 20, 25, 30], 'scalar': [1.0, 1.5, 2.0, 2.5]}),
+        (IchimokuCloud, 'Kumo', {'tenkan': [7, 9, 11], 'kijun': [22, 26, 30], 'senkou': [44, 52, 60]}),
+    ]
+    print(f"{'rows':>8} {'strategy':>10} {'combos':>7} {'one by one ms':>14} {'batch ms':>9} {'speed-up':>9}")
+    for rows in args.rows:
+        data = synthetic_bars(rows)
+        for cls, strategy, grid in sweeps:
+            batch = cls.batch(data, strategy, **grid)
+            assert (batch.to_numpy() == one_by_one(cls, data, strategy, grid)).all()
+            separate = timed(lambda: one_by_one(cls, data, strategy, grid), args.repeat)
+            shared = timed(lambda: cls.batch(data, strategy, **grid), args.repeat)
+            print(f"{rows:>8} {strategy:>10} {len(batch):>7} {separate * 1e3:>14,.1f} {shared * 1e3:>9,.1f} "
+                  f"{separate / shared:>8,.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import argparse
+import importlib.util
+import sys
+import time
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+import pandas_ta as ta
+from tradingcore.indicators import kernels
+from _data import synthetic_bars
+
+
+def python_kernels():
+    """The kernels module as imported without numba."""
+    spec = importlib.util.spec_from_file_location('kernels_without_numba', kernels.__file__)
+    module = importlib.util.module_from_spec(spec)
+    with patch.dict(sys.modules, {'numba': None}):
+        spec.loader.exec_module(module)
+    return module
+
+
+def loop_backtest(signals, opens, initial_capital, purchase_fraction, sell_fraction, take_profit):
+    """The loop of Backtester.run_backtest before the kernel."""
+    capital, holdings, max_holdings, price_bought = initial_capital, 0.0, 0.0, 0.0
+    for i in range(len(signals) - 1):
+        if (capital > 0.0) and (signals[i] == 1):
+            amount_to_spend = min(capital, max(initial_capital, capital) * purchase_fraction)
+            shares_bought = amount_to_spend / opens[i+1]
+            price_bought = ((opens[i+1] * shares_bought)+(price_bought*holdings))/(shares_bought+holdings)
+            holdings += shares_bought
+            capital -= amount_to_spend
+            if max_holdings < holdings:
+                max_holdings = holdings
+        elif (holdings > 0.0) and (signals[i] == -1) and (price_bought * take_profit) < opens[i+1]:
+            shares_to_sell = min(holdings, max((max_holdings * sell_fraction), (initial_capital * purchase_fraction)))
+            holdings -= shares_to_sell
+            capital += shares_to_sell * opens[i+1]
+            if holdings == 0:
+                max_holdings = holdings
+    return capital, holdings
+
+
+def timed(func, repeat: int) -> float:
+    # Mean seconds per call, after a first call that compiles the numba kernels
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare pandas_ta and the kernels with and without numba")
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    fallback = python_kernels()
+    print(f"kernels backend: {kernels.BACKEND}")
+    print(f"{'rows':>9} {'kernel':>9} {'before ms':>10} {'python ms':>10} {'numba ms':>9} {'speed-up':>9}")
+    for rows in args.rows:
+        data = synthetic_bars(rows)
+        high, low, close = data['High'], data['Low'], data['Close']
+        # Backtester keeps the signals and prices as lists, the kernel gets the arrays
+        signals = pd.Series(np.random.default_rng(1).choice([-1, 0, 1], rows), index=data.index)
+        opens = data['Open']
+        cases = [
+            ('psar', lambda: ta.psar(high, low, close, af0=0.02, af=0.02, max_af=0.2),
+             lambda module: lambda: module.psar(high, low, close)),
+            ('ema', lambda: ta.ema(close, 50), lambda module: lambda: module.ema(close, 50)),
+            ('rsi', lambda: ta.rsi(close, 14), lambda module: lambda: module.rsi(close, 14)),
+            ('backtest', lambda: loop_backtest(signals.tolist(), opens.tolist(), 10000.0, 0.5, 0.5, 1.01),
+             lambda module: lambda: module.backtest(signals.to_numpy(), opens.to_numpy(), 10000.0, 0.5, 0.5, 1.01)),
+        ]
+        for name, before, kernel in cases:
+            times = [timed(func, args.repeat) for func in (before, kernel(fallback), kernel(kernels))]
+            print(f"{rows:>9} {name:>9} {times[0] * 1e3:>10,.2f} {times[1] * 1e3:>10,.2f} {times[2] * 1e3:>9,.2f} "
+                  f"{times[0] / times[2]:>8,.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import argparse
+import time
+import tracemalloc
+import numpy as np
+from tradingcore.indicators import (BollingerBands, FeatureStore, IchimokuCloud, KeltnerChannel, MACD, MovingAverage, PSAR, RSI,
+                                    StochasticOscillator)
+from _data import synthetic_bars
+
+
+def peak_bytes(func) -> int:
+    """Peak memory allocated by one call, as traced by tracemalloc (numpy included)."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def result_bytes(result) -> int:
+    return sum(values.nbytes for values in (result if isinstance(result, tuple) else (result,)))
+
+
+def timed(func, repeat: int) -> float:
+    # Mean seconds per call
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare allocations and time of calculate() and calculate_arrays()")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    indicators = [(MovingAverage, 'MA'), (RSI, 'RSI_Divergence'), (MACD, 'MACD'), (BollingerBands, 'Bollinger'),
+                  (KeltnerChannel, 'KC'), (StochasticOscillator, 'Stochastic'), (PSAR, 'PSAR'),
+                  (IchimokuCloud, 'KumoKiyunChikouPSAR'), (IchimokuCloud, None)]
+    print(f"{'rows':>7} {'strategy':>20} {'peak calculate MB':>18} {'peak arrays MB':>15} "
+          f"{'result KB':>10} {'arrays KB':>10} {'float32 KB':>11} {'calculate ms':>13} {'arrays ms':>10}")
+    for rows in args.rows:
+        data = synthetic_bars(rows)
+        for cls, strategy in indicators:
+            # Fresh indicator and feature store per call, as for bars seen the first time
+            calculate = lambda: cls(strategy, features=FeatureStore()).calculate(data)
+            arrays = lambda dtype=np.float64: cls(strategy, features=FeatureStore()).calculate_arrays(data, dtype)
+            sizes = [result_bytes(calculate()), result_bytes(arrays()), result_bytes(arrays(np.float32))]
+            peaks = [peak_bytes(calculate), peak_bytes(arrays)]
+            times = [timed(calculate, args.repeat), timed(arrays, args.repeat)]
+            print(f"{rows:>7} {str(strategy):>20} {peaks[0] / 2**20:>18,.2f} {peaks[1] / 2**20:>15,.2f} "
+                  f"{sizes[0] / 2**10:>10,.0f} {sizes[1] / 2**10:>10,.0f} {sizes[2] / 2**10:>11,.0f} "
+                  f"{times[0] * 1e3:>13,.2f} {times[1] * 1e3:>10,.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import argparse
+import time
+from tradingcore.indicators import (BollingerBands, FeatureStore, IchimokuCloud, KeltnerChannel, MACD, MovingAverage, Panel,
+                                    PSAR, RSI, StochasticOscillator)
+from _data import synthetic_bars
+
+
+def screen(tickers: int, rows: int) -> dict:
+    """One frame per ticker, a tenth of them listed later."""
+    return {f'T{seed}': synthetic_bars(rows, seed).iloc[rows // 3 if seed % 10 == 0 else 0:] for seed in range(tickers)}
+
+
+def ticker_by_ticker(cls, bars, strategy):
+    """One indicator and calculate() per ticker, as a screen loop does."""
+    return {ticker: cls(strategy, features=FeatureStore()).calculate(data) for ticker, data in bars.items()}
+
+
+def timed(func, repeat: int) -> float:
+    # Mean seconds per call
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare screening tickers one by one with panel()")
+    parser.add_argument('--tickers', type=int, default=500)
+    parser.add_argument('--rows', type=int, nargs='+', default=[250, 1_000, 5_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    screens = [(MovingAverage, 'MA'), (RSI, 'RSI_Cross'), (MACD, 'MACD'), (BollingerBands, 'Bollinger'),
+               (KeltnerChannel, 'KC'), (StochasticOscillator, 'Stochastic'), (PSAR, 'PSAR'),
+               (IchimokuCloud, 'KumoKiyunChikouPSAR')]
+    print(f"{'rows':>6} {'strategy':>20} {'one by one ms':>14} {'panel ms':>9} {'speed-up':>9}")
+    for rows in args.rows:
+        bars = screen(args.tickers, rows)
+        align = timed(lambda: Panel(bars)['Close'], args.repeat)
+        print(f"{rows:>6} {'(align Close)':>20} {'':>14} {align * 1e3:>9,.1f}")
+        for cls, strategy in screens:
+            expected = ticker_by_ticker(cls, bars, strategy)
+            result = cls.panel(bars, strategy)
+            assert all((result.loc[ticker, signal.index] == signal).all() for ticker, signal in expected.items())
+            separate = timed(lambda: ticker_by_ticker(cls, bars, strategy), args.repeat)
+            # A screen aligns its tickers once for every indicator
+            panel = Panel(bars)
+            together = timed(lambda: cls.panel(panel, strategy), args.repeat)
+            print(f"{rows:>6} {strategy:>20} {separate * 1e3:>14,.1f} {together * 1e3:>9,.1f} "
+                  f"{separate / together:>8,.1f}x")
+
+
+if __name__ == "__main__":
+    main()
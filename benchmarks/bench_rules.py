@@ -0,0 +1,49 @@
+import argparse
+import time
+from tradingcore.indicators import FeatureStore, IchimokuCloud
+from _data import synthetic_bars
+
+
+def separate(data):
+    """Every strategy on its own: components and conditions computed per strategy."""
+    return [IchimokuCloud(strategy, features=FeatureStore()).calculate(data)
+            for strategy in IchimokuCloud.POSSIBLE_STRATEGIES[1:]]
+
+
+def shared_store(data):
+    """One indicator per strategy sharing a feature store, as the tasks of a worker do."""
+    features = FeatureStore()
+    return [IchimokuCloud(strategy, features=features).calculate(data)
+            for strategy in IchimokuCloud.POSSIBLE_STRATEGIES[1:]]
+
+
+def all_at_once(data):
+    return IchimokuCloud(features=FeatureStore()).calculate_strategies(data)
+
+
+def timed(func, repeat: int) -> float:
+    # Mean seconds per call
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time evaluating every Ichimoku strategy on the same bars")
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'separate ms':>12} {'shared store ms':>16} {'all at once ms':>15}")
+    for rows in args.rows:
+        data = synthetic_bars(rows)
+        expected = separate(data)
+        assert all((a.to_numpy() == b.to_numpy()).all() for a, b in zip(expected, shared_store(data)))
+        assert all((a.to_numpy() == b).all() for a, b in zip(expected, all_at_once(data).T.to_numpy()))
+        times = [timed(lambda: func(data), args.repeat) for func in (separate, shared_store, all_at_once)]
+        print(f"{rows:>8} {times[0] * 1e3:>12,.1f} {times[1] * 1e3:>16,.1f} {times[2] * 1e3:>15,.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import argparse
+import time
+from tradingcore.indicators import FeatureStore, IchimokuCloud, MACD, MovingAverage, RSI, StochasticOscillator
+from _data import synthetic_bars
+
+
+def whole_history(indicator, data):
+    """The previous latest-signal path of indicator_app."""
+    signals = indicator.calculate(data)
+    signal = signals.iloc[-1]
+    for i in range(1, len(signals)):
+        if signals.iloc[-i] != signal:
+            return signal, len(data) - i + 1
+    return signal, None
+
+
+def timed(func, repeat: int) -> float:
+    # Mean seconds per call
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare latest-signal requests over the whole history and over the tail")
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    strategies = [(MovingAverage, 'MA'), (RSI, 'RSI'), (MACD, 'MACD'), (StochasticOscillator, 'Stochastic'),
+                  (IchimokuCloud, 'KumoChikou')]
+    print(f"{'rows':>8} {'strategy':>12} {'lookback':>9} {'whole ms':>9} {'tail ms':>8}")
+    for rows in args.rows:
+        data = synthetic_bars(rows)
+        for cls, strategy in strategies:
+            # A new indicator and feature store per request, as for every task of the worker
+            fresh = lambda: cls(strategy, features=FeatureStore())
+            assert whole_history(fresh(), data) == fresh().latest_signal(data)
+            whole = timed(lambda: whole_history(fresh(), data), args.repeat)
+            tail = timed(lambda: fresh().latest_signal(data), args.repeat)
+            print(f"{rows:>8} {strategy:>12} {fresh().lookback():>9} {whole * 1e3:>9,.1f} {tail * 1e3:>8,.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import argparse
+import time
+import numpy as np
+from tradingcore.indicators import AwesomeOscillator, FeatureStore, RSI
+from _data import synthetic_bars
+
+
+def loop_divergences(data, rsi):
+    """The previous row by row RSI divergence detection."""
+    bullish_divergence = np.zeros(len(data))
+    bearish_divergence = np.zeros(len(data))
+    for i in range(2, len(data)):
+        if data['Low'].iloc[i] < data['Low'].iloc[i-1] and rsi.iloc[i] > rsi.iloc[i-1]:
+            bullish_divergence[i] = 1
+        if data['High'].iloc[i] > data['High'].iloc[i-1] and rsi.iloc[i] < rsi.iloc[i-1]:
+            bearish_divergence[i] = 1
+    return bullish_divergence, bearish_divergence
+
+
+def apply_signal(ao):
+    """The previous AwesomeOscillator signal."""
+    return ao.apply(lambda x: 1 if x > 0 else (-1 if x < 0 else 0))
+
+
+def timed(func, *args, repeat: int = 1) -> float:
+    # Mean seconds per call
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(*args)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the row by row RSI divergence and AO signal against the vectorised ones")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--loop-max-rows', type=int, default=1_000_000,
+                        help="Skip the row by row versions above this many rows")
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'divergence loop ms':>19} {'vectorised ms':>14} {'AO apply ms':>12} {'vectorised ms':>14}")
+    for rows in args.rows:
+        data = synthetic_bars(rows)
+        rsi = RSI(features=FeatureStore())
+        rsi.calculate(data)
+        rsi_slow = rsi.components['RSI_Slow']
+        ao = AwesomeOscillator('SMA_Crossover', features=FeatureStore())
+        ao.calculate(data)
+
+        vectorised = timed(rsi._find_divergences, data, rsi_slow, repeat=args.repeat)
+        # Signal only, the AO itself is cached after the first calculate()
+        ao_vectorised = timed(ao.calculate, data, repeat=args.repeat)
+        if rows <= args.loop_max_rows:
+            loop = timed(loop_divergences, data, rsi_slow)
+            ao_apply = timed(apply_signal, ao.components['AO'])
+            print(f"{rows:>9} {loop * 1e3:>19,.1f} {vectorised * 1e3:>14,.2f} {ao_apply * 1e3:>12,.1f} {ao_vectorised * 1e3:>14,.2f}")
+        else:
+            print(f"{rows:>9} {'-':>19} {vectorised * 1e3:>14,.2f} {'-':>12} {ao_vectorised * 1e3:>14,.2f}")
+
+
+if __name__ == "__main__":
+    main()
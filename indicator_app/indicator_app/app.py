@@ -1,4 +1,4 @@
-from tradingcore import TimeSeriesData, Backtester, connect_db, init_database, AwesomeOscillator,BollingerBands,IchimokuCloud,KeltnerChannel,MovingAverage,MACD,PSAR,RSI,StochasticOscillator,VolumeIndicator,Hold
+from tradingcore import TimeSeriesData, BarCache, PostgresBarStore, ChunkedBarStore, FileBarStore, Backtester, ConnectionPool, init_database, AwesomeOscillator,BollingerBands,IchimokuCloud,KeltnerChannel,MovingAverage,MACD,PSAR,RSI,StochasticOscillator,VolumeIndicator,Hold
 
 import pika
 import logging
@@ -15,6 +15,12 @@ POSTGRES_HOST = os.getenv("POSTGRES_HOST", "localhost")
 POSTGRES_DB = os.getenv("POSTGRES_DB", "timeseries_db")
 POSTGRES_USER = os.getenv("POSTGRES_USER", "postgres")
 POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "postgres")
+BAR_CACHE_TTL = float(os.getenv("BAR_CACHE_TTL", "300"))
+BAR_CACHE_MAX_BYTES = int(os.getenv("BAR_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+POSTGRES_PARTITIONED = os.getenv("POSTGRES_PARTITIONED", "false").lower() in ("1", "true", "yes")
+BAR_STORAGE = os.getenv("BAR_STORAGE", "rows")  # rows (DataTimeSeries), chunks (DataTimeSeries_chunks) or files
+BAR_STORAGE_PATH = os.getenv("BAR_STORAGE_PATH", "/data/bars")  # Root directory of the files storage
+POSTGRES_POOL_SIZE = int(os.getenv("POSTGRES_POOL_SIZE", "2"))
 
 print("Configuration Loaded:")
 print(f"RABBITMQ_HOST = {RABBITMQ_HOST}")
@@ -24,6 +30,12 @@ print(f"POSTGRES_HOST = {POSTGRES_HOST}")
 print(f"POSTGRES_DB = {POSTGRES_DB}")
 print(f"POSTGRES_USER = {POSTGRES_USER}")
 print(f"POSTGRES_PASSWORD = {POSTGRES_PASSWORD}")
+print(f"BAR_CACHE_TTL = {BAR_CACHE_TTL}")
+print(f"BAR_CACHE_MAX_BYTES = {BAR_CACHE_MAX_BYTES}")
+print(f"POSTGRES_PARTITIONED = {POSTGRES_PARTITIONED}")
+print(f"BAR_STORAGE = {BAR_STORAGE}")
+print(f"BAR_STORAGE_PATH = {BAR_STORAGE_PATH}")
+print(f"POSTGRES_POOL_SIZE = {POSTGRES_POOL_SIZE}")
 
 logging.basicConfig(level=logging.INFO)
 
@@ -39,7 +51,17 @@ class IndicatorWorker:
         # Set QoS for load balancing
         self.channel.basic_qos(prefetch_count=1)
 
-        self.db_connection = connect_db(POSTGRES_HOST, POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_DB)
+        # Pooled connections are health checked and replaced, so a database restart does not kill the worker
+        self.db_connection = ConnectionPool(POSTGRES_HOST, POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_DB,
+                                            min_size=1, max_size=POSTGRES_POOL_SIZE)
+        # Backtest fan-outs send many tasks for the same ticker back-to-back, reuse the loaded bars
+        self.bar_cache = BarCache(ttl=BAR_CACHE_TTL, max_bytes=BAR_CACHE_MAX_BYTES)
+        if BAR_STORAGE == 'files':
+            self.bar_storage = FileBarStore(BAR_STORAGE_PATH)
+        elif BAR_STORAGE == 'chunks':
+            self.bar_storage = ChunkedBarStore(self.db_connection)
+        else:
+            self.bar_storage = PostgresBarStore(self.db_connection)
     def process_task(self, ch, method, properties, body):
         logging.info(f"[{self.instance_id}] Processing task: {body}")
         # Process the task 
@@ -54,9 +76,11 @@ class IndicatorWorker:
         }
         if 'ticker' in task_data and 'indicator' in task_data and 'strategy' in task_data:
 
-            ts = TimeSeriesData(ticker=task_data['ticker'], interval='1d', db_connection=self.db_connection)
+            ts = TimeSeriesData(ticker=task_data['ticker'], interval='1d', db_connection=self.db_connection, cache=self.bar_cache,
+                                storage=self.bar_storage)
             ts.update_data()
-            logging.info(f"Last data point: {ts.data.index[-1]}")
+            logging.info(f"Last data point: {ts.data.index[-1]}, next bar expected at {ts.refresh.next_bar_time(ts.ticker, ts.interval, ts.data.index[-1])}")
+            logging.debug(f"Bar cache stats: {self.bar_cache.stats()}")
             indicator = globals()[task_data['indicator']]()
             indicator.setStrategy(task_data['strategy'])  
 
@@ -107,14 +131,12 @@ class IndicatorWorker:
 
             # Run indicator
             else:
-                bs = indicator.calculate(ts.data)                
-                signal = bs.iloc[-1]
+                # Only the tail of the bars the last signals depend on is evaluated
+                signal, start = indicator.latest_signal(ts.data)
                 result_data['signals']={str(ts.data.index[-1].timestamp()*1000):signal}
-                for i in range(1,len(bs)):
-                    if bs.iloc[-i] != signal: 
-                        result_data['signals'].update({str(ts.data.index[-i+1].timestamp()*1000):bs.iloc[-i+1]})
-                        break
-                        
+                if start is not None:
+                    result_data['signals'].update({str(ts.data.index[start].timestamp()*1000):signal})
+
                 logging.debug(f'Finished indicator {task_data["strategy"]} on {task_data["ticker"]}')
             logging.info(f"Result data: {result_data}")
             self.channel.basic_publish(
@@ -152,7 +174,7 @@ class IndicatorWorker:
 if __name__ == "__main__":
     instance_id = "instance_1"  # Example; you could auto-generate this or use environment variables
     coordinator_url = f"http://{RABBITMQ_HOST}:5000"  # Coordinator URL for reporting status
-    init_database(POSTGRES_HOST, POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_DB)
+    init_database(POSTGRES_HOST, POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_DB, partitioned=POSTGRES_PARTITIONED)
     
     worker = IndicatorWorker(instance_id, coordinator_url)
     try:
@@ -0,0 +1,11 @@
+import numpy as np
+import pandas as pd
+
+def bars(rows, seed=0, start='2024-01-01', freq='h'):
+    """Random walk OHLCV bars, with highs and lows rounded so that equal consecutive ones also occur."""
+    index = pd.date_range(start, periods=rows, freq=freq, tz='UTC')
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, rows))
+    return pd.DataFrame({'Open': close, 'High': (close + rng.random(rows)).round(1),
+                         'Low': (close - rng.random(rows)).round(1), 'Close': close,
+                         'Volume': np.full(rows, 1000)}, index=index)
@@ -0,0 +1,62 @@
+import unittest
+import numpy as np
+import pandas as pd
+from tradingcore.indicators import (AwesomeOscillator, BollingerBands, FeatureStore, IchimokuCloud, KeltnerChannel, MACD,
+                                    MovingAverage, PSAR, RSI, StochasticOscillator, VolumeIndicator)
+from . import bars
+
+INDICATORS = [
+    (MovingAverage, {'length': 20}), (MovingAverage, {'length': 20, 'ma_type': 'ema'}), (RSI, {}),
+    (MACD, {'fast': 30, 'slow': 10, 'signal': 5}), (BollingerBands, {}), (KeltnerChannel, {'length': 10}),
+    (StochasticOscillator, {}), (PSAR, {}), (IchimokuCloud, {}), (IchimokuCloud, {'include_chikou': False}),
+    (AwesomeOscillator, {}), (VolumeIndicator, {}),
+]
+
+def arguments(cls, params):
+    return params if cls is VolumeIndicator else dict(params, features=FeatureStore())
+
+class TestCalculateArrays(unittest.TestCase):
+
+    def setUp(self):
+        self.data = bars(1000)
+        self.original = self.data.copy()
+
+    def test_signals_match_calculate(self):
+        for cls, params in INDICATORS:
+            for strategy in cls.POSSIBLE_STRATEGIES[1:]:
+                with self.subTest(indicator=cls.__name__, strategy=strategy, params=params):
+                    expected = cls(strategy, **arguments(cls, params)).calculate(self.data.copy())
+                    result = cls(strategy, **arguments(cls, params)).calculate_arrays(self.data)
+                    self.assertEqual(result.dtype, np.int8)
+                    np.testing.assert_array_equal(result, expected.fillna(0))
+
+    def test_components_match_calculate(self):
+        for cls, params in INDICATORS:
+            for dtype in [np.float64, np.float32]:
+                with self.subTest(indicator=cls.__name__, params=params, dtype=dtype):
+                    expected = cls(**arguments(cls, params)).calculate(self.data.copy())
+                    result = cls(**arguments(cls, params)).calculate_arrays(self.data, dtype=dtype)
+                    if not isinstance(expected, tuple):
+                        expected, result = (expected,), (result,)
+                    self.assertEqual(len(result), len(expected))
+                    for values, series in zip(result, expected):
+                        self.assertEqual(values.dtype, dtype)
+                        np.testing.assert_allclose(values, series.to_numpy(dtype=float), rtol=1e-6 if dtype == np.float32 else 1e-9)
+
+    def test_input_is_read_only(self):
+        features = FeatureStore()
+        for cls, params in INDICATORS[:-2]:
+            for strategy in cls.POSSIBLE_STRATEGIES:
+                indicator = cls(strategy, **dict(params, features=features))
+                indicator.calculate_arrays(self.data)
+                # Nothing is cached or kept for the next call
+                self.assertTrue(indicator.components.empty)
+        self.assertEqual((features.hits, features.misses), (0, 0))
+        pd.testing.assert_frame_equal(self.data, self.original)
+
+    def test_rsi_calculate_leaves_input(self):
+        RSI('RSI').calculate(self.data)
+        pd.testing.assert_frame_equal(self.data, self.original)
+
+if __name__ == '__main__':
+    unittest.main()
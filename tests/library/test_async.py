@@ -0,0 +1,193 @@
+import asyncio
+import json
+import threading
+import unittest
+from collections import Counter
+from contextlib import asynccontextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+import asyncpg
+import pandas as pd
+from tradingcore.data.async_timeseries import copy_bars_async, delete_bars_before_async, get_ticker_state_async
+from tradingcore.data.freshness import RefreshController
+from tradingcore.data.postgresql import CREATE_STAGING_TABLE, STATEMENTS
+from tradingcore.data.sources import AsyncChartAPISource, ChartAPISource, FetchError, ThreadedSource, aiohttp
+from tradingcore.utils.rate_limit import TokenBucket
+
+def chart(bars=3):
+    timestamps = [1735828200 + 86400 * i for i in range(bars)]
+    close = [100.0 + i for i in range(bars)]
+    return {'chart': {'result': [{
+        'meta': {'exchangeTimezoneName': 'America/New_York'},
+        'timestamp': timestamps,
+        'indicators': {'quote': [{'open': close, 'high': close, 'low': close, 'close': close, 'volume': [10] * bars}]},
+    }], 'error': None}}
+
+class StandInHandler(BaseHTTPRequestHandler):
+    # THROTTLED symbols get a 429 on their first request
+    def do_GET(self):
+        symbol = urlparse(self.path).path.rsplit('/', 1)[-1]
+        with self.server.lock:
+            self.server.requests[symbol] += 1
+            first = self.server.requests[symbol] == 1
+        if symbol.startswith('THROTTLED') and first:
+            self.send_response(429)
+            self.end_headers()
+            return
+        body = json.dumps(chart()).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class TestRunAsync(unittest.TestCase):
+
+    def test_concurrent_refreshes_are_coalesced(self):
+        controller = RefreshController()
+        calls = []
+
+        async def refresh():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return len(calls)
+
+        async def main():
+            return await asyncio.gather(*(controller.run_async('AAPL', '1h', refresh) for _ in range(10)))
+
+        self.assertEqual(asyncio.run(main()), [1] * 10)
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(controller.is_fresh('AAPL', '1h'))
+
+    def test_error_reaches_every_waiter(self):
+        controller = RefreshController()
+
+        async def refresh():
+            await asyncio.sleep(0.01)
+            raise FetchError("throttled")
+
+        async def main():
+            return await asyncio.gather(*(controller.run_async('AAPL', '1h', refresh) for _ in range(3)),
+                                        return_exceptions=True)
+
+        results = asyncio.run(main())
+        self.assertTrue(all(isinstance(result, FetchError) for result in results))
+        self.assertFalse(controller.is_fresh('AAPL', '1h'))
+
+    def test_acquire_async_waits_for_tokens(self):
+        now = [0.0]
+        bucket = TokenBucket(rate=1000, capacity=1, clock=lambda: now[0])
+
+        async def main():
+            await bucket.acquire_async()
+            now[0] += 0.001
+            await bucket.acquire_async()
+
+        asyncio.run(main())
+        self.assertLess(bucket.tokens, 1)
+
+class TestAsyncSources(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+        cls.server.lock = threading.Lock()
+        cls.server.requests = Counter()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_threaded_source(self):
+        data = asyncio.run(ThreadedSource(ChartAPISource(self.base_url)).fetch('AAPL', '1d', period='5d'))
+        self.assertEqual(len(data), 3)
+
+    @unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+    def test_async_chart_api_source(self):
+        async def main():
+            source = AsyncChartAPISource(self.base_url, rate=1000, backoff=0.01)
+            try:
+                return await asyncio.gather(*(source.fetch(ticker, '1d', period='5d')
+                                              for ticker in ['A', 'B', 'THROTTLED1']))
+            finally:
+                await source.close()
+
+        results = asyncio.run(main())
+        self.assertEqual([len(data) for data in results], [3, 3, 3])
+        self.assertEqual(self.server.requests['THROTTLED1'], 2)
+        pd.testing.assert_frame_equal(results[0], ChartAPISource.parse_chart(chart()))
+
+class FakeAsyncConnection:
+    """asyncpg pool and connection of a partitioned database, raising the errors queued for a statement."""
+    def __init__(self, relkind='p'):
+        self.relkind = relkind
+        self.executed = []
+        self.errors = {}
+        self.copied = 0
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+    async def execute(self, query, *args):
+        self.executed.append((query, args))
+        if self.errors.get(query):
+            raise self.errors[query].pop(0)
+        return f"INSERT 0 {self.copied}" if query == STATEMENTS['merge_staged_bars'] else "DELETE 7"
+
+    async def fetchval(self, query):
+        return self.relkind
+
+    async def fetchrow(self, query, *args):
+        self.executed.append((query, args))
+        return ('AAPL', '1m', pd.Timestamp('2025-01-01', tz='UTC'), pd.Timestamp('2025-02-01', tz='UTC'), 100, None)
+
+    async def copy_records_to_table(self, table, records, columns):
+        self.copied = len(records)
+
+    def statements(self):
+        return [query for query, _ in self.executed]
+
+class TestAsyncStorage(unittest.TestCase):
+
+    def bars(self, start):
+        index = pd.date_range(start, periods=5, freq='D', tz='UTC')
+        return pd.DataFrame({'Open': 1.0, 'High': 2.0, 'Low': 0.5, 'Close': 1.5, 'Volume': 100}, index=index)
+
+    def test_same_statements_as_psycopg2(self):
+        pool = FakeAsyncConnection(relkind='r')
+        self.assertEqual(asyncio.run(copy_bars_async(pool, 'AAPL', '1d', self.bars('2025-01-10'))), 5)
+        self.assertEqual(pool.statements(), [CREATE_STAGING_TABLE, STATEMENTS['merge_staged_bars'],
+                                             STATEMENTS['merged_ticker_state']])
+        self.assertEqual(pool.executed[-1][1], ('AAPL', '1d', 5))
+        pool.executed.clear()
+        self.assertEqual(asyncio.run(delete_bars_before_async(pool, 'AAPL', '1m', pd.Timestamp('2025-01-15', tz='UTC'))), 7)
+        self.assertEqual(pool.statements(), [STATEMENTS['get_ticker_state'], STATEMENTS['delete_bars_before'],
+                                             STATEMENTS['deleted_ticker_state']])
+        self.assertEqual(asyncio.run(get_ticker_state_async(pool, 'AAPL', '1m')).row_count, 100)
+
+    def test_partitions_created_once_and_after_a_drop(self):
+        pool = FakeAsyncConnection()
+        asyncio.run(copy_bars_async(pool, 'AAPL', '1d', self.bars('2025-01-30')))
+        asyncio.run(copy_bars_async(pool, 'AAPL', '1d', self.bars('2025-02-10')))
+        created = [query for query in pool.statements() if 'CREATE TABLE IF NOT EXISTS' in query]
+        self.assertEqual(len(created), 2)
+        # e.g. the retention job dropped the partition from another process
+        pool.errors[STATEMENTS['merge_staged_bars']] = [asyncpg.CheckViolationError("no partition found for row")]
+        self.assertEqual(asyncio.run(copy_bars_async(pool, 'AAPL', '1d', self.bars('2025-02-10'))), 5)
+        created = [query for query in pool.statements() if 'CREATE TABLE IF NOT EXISTS' in query]
+        self.assertEqual(len(created), 3)
+        self.assertIn('"datatimeseries_1d_2025_02" PARTITION OF "datatimeseries_1d"', created[-1])
+
+if __name__ == '__main__':
+    unittest.main()
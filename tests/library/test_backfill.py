@@ -0,0 +1,127 @@
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+from tradingcore.data.backfill import PROVIDER_LIMITS, Backfill, plan_windows
+from tradingcore.data.filestore import FileBarStore
+from tradingcore.data.postgresql import TickerState
+from tradingcore.data.sources import BatchedFetcher, DataSource, FetchError
+from tradingcore.data.storage import BarStore
+
+NOW = datetime(2025, 6, 30, tzinfo=timezone.utc)
+
+class WindowSource(DataSource):
+    """Hourly bars for any [start, end) window, failing for the tickers in fail_after past that date."""
+
+    def __init__(self, fail_after: dict = None):
+        self.calls = []
+        self.fail_after = fail_after or {}
+
+    def fetch(self, ticker, interval, period=None, start=None, end=None):
+        self.calls.append((ticker, start))
+        if ticker in self.fail_after and start >= self.fail_after[ticker]:
+            raise FetchError("throttled")
+        index = pd.date_range(start, end, freq='h', inclusive='left')
+        close = np.arange(len(index), dtype=float) + index.asi8 / 1e15
+        return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 1}, index=index)
+
+class MarketHoursSource(WindowSource):
+    """Hourly bars from 14:00 to 20:00 UTC on weekdays only."""
+
+    def fetch(self, ticker, interval, period=None, start=None, end=None):
+        data = super().fetch(ticker, interval, period, start, end)
+        return data[(data.index.hour >= 14) & (data.index.hour <= 20) & (data.index.dayofweek < 5)]
+
+class RowStore(BarStore):
+    """In-memory store that, like the row layout, also takes bars older than the stored ones."""
+
+    def __init__(self):
+        self.bars = {}
+
+    def write_bars(self, ticker, interval, data):
+        stored = self.bars.get((ticker, interval))
+        new = data if stored is None else data[~data.index.isin(stored.index)]
+        self.bars[ticker, interval] = pd.concat([stored, new]).sort_index() if stored is not None else new
+        return len(new)
+
+    def get_ticker_state(self, ticker, interval):
+        bars = self.bars.get((ticker, interval))
+        if bars is None:
+            return None
+        return TickerState(ticker, interval, bars.index[0].to_pydatetime(), bars.index[-1].to_pydatetime(), len(bars), None)
+
+class TestBackfill(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.store = FileBarStore(self.root)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def backfill(self, source, store=None):
+        # 30 day windows so the hourly range takes several requests
+        limits = dict(PROVIDER_LIMITS, **{'60m': (timedelta(days=30), None)})
+        return Backfill(store or self.store, BatchedFetcher(source, rate=1000, retries=0), limits)
+
+    def test_plan_windows(self):
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        windows = plan_windows(start, start + timedelta(days=150), timedelta(days=59))
+        self.assertEqual([(w[1] - w[0]).days for w in windows], [59, 59, 32])
+        self.assertEqual(windows[1][0], windows[0][1])
+
+    def test_start_is_clamped_to_provider_history(self):
+        source = WindowSource()
+        self.backfill(source).run(['A'], '1m', NOW - timedelta(days=90), now=NOW)
+        first_start = min(start for _, start in source.calls)
+        self.assertGreaterEqual(first_start, NOW - timedelta(days=30))
+
+    def test_resume_after_interruption(self):
+        start = NOW - timedelta(days=200)
+        source = WindowSource(fail_after={'B': start + timedelta(days=60)})
+        written = self.backfill(source).run(['A', 'B'], '60m', start, now=NOW)
+        self.assertEqual(written['A'], 200 * 24)
+        self.assertLess(written['B'], written['A'])
+        high_water_mark = self.store.get_ticker_state('B', '60m').last_bar
+
+        source = WindowSource()
+        written = self.backfill(source).run(['A', 'B'], '60m', start, now=NOW)
+        # A only checks the newest window for new bars and B fetches the windows from its high-water mark
+        self.assertEqual(written['A'], 0)
+        self.assertEqual([ticker for ticker, _ in source.calls].count('A'), 1)
+        self.assertTrue(all(start + timedelta(days=30) > high_water_mark for _, start in source.calls))
+        self.assertEqual(self.store.get_ticker_state('B', '60m').row_count, 200 * 24)
+        dates = self.store.read_bars('B', '60m')['date']
+        self.assertTrue((np.diff(dates) == np.timedelta64(1, 'h')).all())
+
+    def test_resume_on_row_store(self):
+        # The first stored bar is at 14:00, hours after start
+        store, start = RowStore(), NOW - timedelta(days=200)
+        source = MarketHoursSource(fail_after={'B': start + timedelta(days=60)})
+        written = self.backfill(source, store).run(['A', 'B'], '60m', start, now=NOW)
+        self.assertGreater(store.get_ticker_state('B', '60m').first_bar - start, timedelta(hours=1))
+        high_water_mark = store.get_ticker_state('B', '60m').last_bar
+
+        source = MarketHoursSource()
+        resumed = self.backfill(source, store).run(['A', 'B'], '60m', start, now=NOW)
+        # Each ticker fetches the window of the gap before its first bar and those from its high-water mark
+        calls = [window_start for ticker, window_start in source.calls if ticker == 'B']
+        self.assertEqual(calls[0], start)
+        self.assertTrue(all(window_start + timedelta(days=30) > high_water_mark for window_start in calls[1:]))
+        self.assertEqual([ticker for ticker, _ in source.calls].count('A'), 2)
+        self.assertEqual(resumed['A'], 0)
+        self.assertEqual(written['B'] + resumed['B'], written['A'])
+
+    def test_row_store_fills_range_before_first_bar(self):
+        store, start = RowStore(), NOW - timedelta(days=200)
+        self.backfill(WindowSource(), store).run(['A'], '60m', start + timedelta(days=100), now=NOW)
+        source = WindowSource()
+        written = self.backfill(source, store).run(['A'], '60m', start, now=NOW)
+        self.assertEqual(written['A'], 100 * 24)
+        self.assertEqual(store.get_ticker_state('A', '60m').first_bar, start)
+        self.assertEqual(len(source.calls), 5)
+
+if __name__ == '__main__':
+    unittest.main()
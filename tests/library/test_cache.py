@@ -0,0 +1,68 @@
+import unittest
+import numpy as np
+import pandas as pd
+from unittest.mock import patch
+from tradingcore.data.cache import BarCache
+from tradingcore.utils.data_version import stamp
+
+def bars(rows):
+    index = pd.date_range('2024-01-01', periods=rows, freq='D', tz='UTC')
+    return pd.DataFrame({'Open': np.arange(rows, dtype=float), 'Close': np.arange(rows, dtype=float)}, index=index)
+
+class TestBarCache(unittest.TestCase):
+
+    def test_hit_and_miss(self):
+        cache = BarCache()
+        self.assertIsNone(cache.get('AAPL', '1d'))
+        cache.put('AAPL', '1d', bars(10))
+        self.assertEqual(len(cache.get('AAPL', '1d')), 10)
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_ttl_expiry(self):
+        cache = BarCache(ttl=60)
+        with patch('tradingcore.data.cache.time.monotonic', return_value=1000.0):
+            cache.put('AAPL', '1d', bars(10))
+        with patch('tradingcore.data.cache.time.monotonic', return_value=1030.0):
+            self.assertIsNotNone(cache.get('AAPL', '1d'))
+        with patch('tradingcore.data.cache.time.monotonic', return_value=1061.0):
+            self.assertIsNone(cache.get('AAPL', '1d'))
+        self.assertEqual(cache.stats()['entries'], 0)
+
+    def test_lru_eviction_under_budget(self):
+        size = int(bars(100).memory_usage(index=True).sum())
+        cache = BarCache(max_bytes=2 * size)
+        cache.put('A', '1d', bars(100))
+        cache.put('B', '1d', bars(100))
+        cache.get('A', '1d')  # B is now the least recently used
+        cache.put('C', '1d', bars(100))
+        self.assertIsNotNone(cache.get('A', '1d'))
+        self.assertIsNone(cache.get('B', '1d'))
+        self.assertIsNotNone(cache.get('C', '1d'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+        self.assertLessEqual(cache.stats()['size_bytes'], 2 * size)
+
+    def test_oversized_frame_not_cached(self):
+        cache = BarCache(max_bytes=10)
+        cache.put('A', '1d', bars(100))
+        self.assertIsNone(cache.get('A', '1d'))
+
+    def test_new_columns_do_not_leak_into_cache(self):
+        cache = BarCache()
+        cache.put('A', '1d', bars(10))
+        data = cache.get('A', '1d')
+        data['RSI_Slow'] = 1.0
+        self.assertNotIn('RSI_Slow', cache.get('A', '1d').columns)
+
+    def test_copies_keep_the_revision(self):
+        cache = BarCache()
+        data = bars(10)
+        cache.put('A', '1d', data)
+        first, second = cache.get('A', '1d'), cache.get('A', '1d')
+        self.assertEqual(stamp(first), stamp(data))
+        self.assertEqual(stamp(second), stamp(data))
+        cache.put('A', '1d', bars(11))
+        self.assertNotEqual(stamp(cache.get('A', '1d')), stamp(data))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from tradingcore.data.calendar import NYSE, BME, calendar_for
+from tradingcore.data.freshness import RefreshController
+
+NEW_YORK = ZoneInfo('America/New_York')
+
+class TestTradingCalendar(unittest.TestCase):
+
+    def test_daily_bar_after_weekend(self):
+        # Friday 2024-06-07 bar -> next bar when the market opens on Monday
+        last_bar = datetime(2024, 6, 7, tzinfo=NEW_YORK)
+        self.assertEqual(NYSE.next_bar_time(last_bar, '1d'), datetime(2024, 6, 10, 9, 30, tzinfo=NEW_YORK))
+
+    def test_daily_bar_skips_holiday(self):
+        # Wednesday 2024-07-03 bar -> Independence Day is skipped
+        last_bar = datetime(2024, 7, 3, 4, 0, tzinfo=timezone.utc)
+        self.assertEqual(NYSE.next_bar_time(last_bar, '1d'), datetime(2024, 7, 5, 9, 30, tzinfo=NEW_YORK))
+
+    def test_intraday_bar_within_session(self):
+        last_bar = datetime(2024, 6, 7, 10, 0, tzinfo=NEW_YORK)
+        self.assertEqual(NYSE.next_bar_time(last_bar, '15m'), datetime(2024, 6, 7, 10, 15, tzinfo=NEW_YORK))
+        self.assertEqual(NYSE.next_bar_time(last_bar, '1h'), datetime(2024, 6, 7, 11, 0, tzinfo=NEW_YORK))
+
+    def test_intraday_bar_after_close(self):
+        last_bar = datetime(2024, 6, 7, 15, 30, tzinfo=NEW_YORK)
+        self.assertEqual(NYSE.next_bar_time(last_bar, '1h'), datetime(2024, 6, 10, 9, 30, tzinfo=NEW_YORK))
+
+    def test_intraday_bar_after_early_close(self):
+        last_bar = datetime(2024, 11, 29, 12, 55, tzinfo=NEW_YORK)
+        self.assertEqual(NYSE.next_bar_time(last_bar, '5m'), datetime(2024, 12, 2, 9, 30, tzinfo=NEW_YORK))
+
+    def test_calendar_for_ticker(self):
+        self.assertIs(calendar_for('AAPL'), NYSE)
+        self.assertIs(calendar_for('BRK-B'), NYSE)
+        self.assertIs(calendar_for('SAN.MC'), BME)
+        self.assertIsNone(calendar_for('BTC-USD'))
+        self.assertIsNone(calendar_for('VOD.L'))
+
+class TestCalendarAwareFreshness(unittest.TestCase):
+
+    def test_no_fetch_over_weekend(self):
+        controller = RefreshController()
+        last_bar = datetime(2024, 6, 7, tzinfo=NEW_YORK)
+        saturday = datetime(2024, 6, 8, 12, 0, tzinfo=NEW_YORK)
+        monday_open = datetime(2024, 6, 10, 9, 30, tzinfo=NEW_YORK)
+        self.assertTrue(controller.is_fresh('AAPL', '1d', saturday, last_bar))
+        self.assertFalse(controller.is_fresh('AAPL', '1d', monday_open, last_bar))
+
+    def test_always_open_market_is_not_skipped(self):
+        controller = RefreshController()
+        last_bar = datetime(2024, 6, 7, tzinfo=timezone.utc)
+        saturday = datetime(2024, 6, 8, 12, 0, tzinfo=timezone.utc)
+        self.assertFalse(controller.is_fresh('BTC-USD', '1d', saturday, last_bar))
+
+    def test_min_interval_still_applies_when_bar_is_due(self):
+        controller = RefreshController()
+        last_bar = datetime(2024, 6, 7, 10, 0, tzinfo=NEW_YORK)
+        now = datetime(2024, 6, 7, 10, 20, tzinfo=NEW_YORK)
+        controller.mark_refreshed('AAPL', '15m', now - timedelta(minutes=5))
+        self.assertTrue(controller.is_fresh('AAPL', '15m', now, last_bar))
+
+if __name__ == '__main__':
+    unittest.main()
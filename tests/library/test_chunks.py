@@ -0,0 +1,38 @@
+import unittest
+import numpy as np
+import pandas as pd
+from tradingcore.data.chunks import encode_chunk, decode_chunk, chunk_periods, to_epoch_us
+
+def bars(rows):
+    rng = np.random.default_rng(1)
+    close = np.round(100 + np.cumsum(rng.normal(0, 0.05, rows)), 2)
+    dates = pd.date_range('2025-03-03 14:30', periods=rows, freq='min', tz='UTC').as_unit('us').asi8
+    return {'date': dates, 'open': close, 'high': close + 0.05, 'low': close - 0.05, 'close': close,
+            'volume': rng.integers(0, 100_000, rows)}
+
+class TestChunkEncoding(unittest.TestCase):
+
+    def test_round_trip_is_exact(self):
+        original = bars(390)
+        decoded = decode_chunk(390, encode_chunk(original))
+        for name, values in original.items():
+            np.testing.assert_array_equal(decoded[name], values)
+
+    def test_chunk_is_smaller_than_raw(self):
+        original = bars(390)
+        self.assertLess(sum(len(payload) for payload in encode_chunk(original)), 390 * 8 * 6 / 2)
+
+    def test_periods(self):
+        dates = pd.DatetimeIndex(['2025-03-03 23:59', '2025-03-04 00:00', '2025-04-01'], tz='UTC').as_unit('us').asi8
+        np.testing.assert_array_equal(chunk_periods(dates, '1m'),
+                                      np.array(['2025-03-03', '2025-03-04', '2025-04-01'], dtype='datetime64[D]'))
+        np.testing.assert_array_equal(chunk_periods(dates, '1d'),
+                                      np.array(['2025-03-01', '2025-03-01', '2025-04-01'], dtype='datetime64[D]'))
+
+    def test_naive_dates_are_utc(self):
+        self.assertEqual(to_epoch_us(pd.Timestamp('2025-01-01')), to_epoch_us(pd.Timestamp('2025-01-01', tz='UTC')))
+        self.assertEqual(to_epoch_us(pd.Timestamp('2025-01-01 01:00', tz='Europe/Madrid')),
+                         to_epoch_us(pd.Timestamp('2025-01-01', tz='UTC')))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+import numpy as np
+import pandas as pd
+from tradingcore.data.cache import BarCache
+from tradingcore.data.filestore import FileBarStore
+from tradingcore.data.freshness import RefreshController
+from tradingcore.data.sources import DataSource
+from tradingcore.data.timeseries import TimeSeriesData
+from tradingcore.indicators import MovingAverage
+from tradingcore.utils.data_version import fingerprint, stamp
+
+def bars(rows, start=None):
+    start = start if start is not None else pd.Timestamp.now(tz='UTC').floor('D') - pd.Timedelta(days=100)
+    index = pd.date_range(start, periods=rows, freq='D', tz='UTC')
+    close = 100 + np.arange(rows, dtype=float)
+    return pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                         'Volume': np.full(rows, 1000)}, index=index)
+
+class TestFingerprint(unittest.TestCase):
+
+    def test_changes_with_the_bars(self):
+        data = bars(100)
+        version = fingerprint(data)
+        self.assertEqual(fingerprint(data), version)
+        self.assertNotEqual(fingerprint(bars(101)), version)
+        self.assertNotEqual(fingerprint(data.iloc[1:]), version)
+        edited = data.copy()
+        edited.iloc[-1, edited.columns.get_loc('Close')] += 0.5
+        self.assertNotEqual(fingerprint(edited), version)
+
+    def test_ignores_derived_columns(self):
+        data = bars(100)
+        version = fingerprint(data)
+        data['RSI_Slow'] = 50.0
+        self.assertEqual(fingerprint(data), version)
+
+    def test_revision_belongs_to_the_frame(self):
+        data = bars(10)
+        revision = stamp(data)
+        self.assertEqual(stamp(data), revision)
+        self.assertEqual(fingerprint(data).revision, revision)
+        # Copies inherit attrs but are different frames
+        copy = data.copy()
+        self.assertIsNone(fingerprint(copy).revision)
+        self.assertGreater(stamp(copy), revision)
+
+    def test_empty(self):
+        self.assertEqual(fingerprint(bars(0)).length, 0)
+
+class TestVersionedData(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.source = MagicMock(spec=DataSource)
+        self.source.fetch.return_value = bars(50)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_version_follows_updates(self):
+        ts = TimeSeriesData('AAPL', '1d', None, storage=FileBarStore(self.root), source=self.source,
+                            refresh=RefreshController())
+        version = ts.version
+        self.assertIsNotNone(version.revision)
+        new_bars = bars(3, start=ts.data.index[-1] + pd.Timedelta(days=1))
+        new_bars[['Open', 'High', 'Low', 'Close']] += 1000
+        self.source.fetch.return_value = new_bars
+        ts.update_data(force=True)
+        self.assertEqual(len(ts.data), 53)
+        self.assertGreater(ts.version.revision, version.revision)
+
+    def test_version_shared_through_cache(self):
+        cache = BarCache()
+        a, b = (TimeSeriesData('AAPL', '1d', None, cache=cache, storage=FileBarStore(self.root), source=self.source,
+                               refresh=RefreshController()) for _ in range(2))
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertIsNot(a.data, b.data)
+        self.assertEqual(a.version, b.version)
+        self.assertIsNotNone(b.version.revision)
+        # New bars are a new revision, cached for the next instance
+        self.source.fetch.return_value = bars(3, start=a.data.index[-1] + pd.Timedelta(days=1))
+        a.update_data(force=True)
+        self.assertNotEqual(a.version, b.version)
+        c = TimeSeriesData('AAPL', '1d', None, cache=cache, storage=FileBarStore(self.root), source=self.source,
+                           refresh=RefreshController())
+        self.assertEqual(c.version, a.version)
+
+    def test_indicator_reuses_results(self):
+        ts = TimeSeriesData('AAPL', '1d', None, storage=FileBarStore(self.root), source=self.source,
+                            refresh=RefreshController())
+        indicator = MovingAverage('MA', length=5)
+        with patch('tradingcore.indicators.ma.ta.sma', wraps=__import__('pandas_ta').sma) as sma:
+            first = indicator.calculate(ts.data).copy()
+            second = indicator.calculate(ts.data)
+            self.assertEqual(sma.call_count, 1)
+            edited = ts.data.copy()
+            edited.iloc[-1, edited.columns.get_loc('Close')] += 1
+            ts.data = edited
+            indicator.calculate(ts.data)
+            self.assertEqual(sma.call_count, 2)
+        pd.testing.assert_series_equal(first, second)
+
+if __name__ == '__main__':
+    unittest.main()
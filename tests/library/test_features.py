@@ -0,0 +1,94 @@
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+import pandas as pd
+import pandas_ta as ta
+from tradingcore.data.cache import BarCache
+from tradingcore.data.filestore import FileBarStore
+from tradingcore.data.freshness import RefreshController
+from tradingcore.data.sources import DataSource
+from tradingcore.data.timeseries import TimeSeriesData
+from tradingcore.indicators import FeatureStore, IchimokuCloud, MovingAverage, AwesomeOscillator, RSI, kernels
+from tradingcore.utils.data_version import stamp
+from . import bars
+
+class TestFeatureStore(unittest.TestCase):
+
+    def test_computes_once_per_version(self):
+        store = FeatureStore()
+        data = bars(100)
+        calls = []
+        compute = lambda: calls.append(1) or len(calls)
+        self.assertEqual(store.get(data, 'x(1)', compute), 1)
+        self.assertEqual(store.get(data, 'x(1)', compute), 1)
+        self.assertEqual(store.get(data, 'y(1)', compute), 2)
+        self.assertEqual(store.get(bars(101), 'x(1)', compute), 3)
+        self.assertEqual(store.stats(), {'versions': 2, 'features': 3, 'hits': 1, 'misses': 3})
+
+    def test_evicts_least_recently_used_version(self):
+        store = FeatureStore(max_versions=2)
+        first, second, third = bars(10), bars(11), bars(12)
+        store.get(first, 'x', lambda: 1)
+        store.get(second, 'x', lambda: 2)
+        store.get(first, 'x', lambda: 0)
+        store.get(third, 'x', lambda: 3)
+        self.assertEqual(store.get(first, 'x', lambda: -1), 1)
+        self.assertEqual(store.get(second, 'x', lambda: -2), -2)
+
+    def test_ichimoku_and_psar_shared_across_strategies(self):
+        store = FeatureStore()
+        data = bars(300)
+        stamp(data)
+        strategies = ['Ichimoku', 'Kumo', 'KijunPSAR', 'TenkanKijunPSAR', 'KumoKiyunChikouPSAR']
+        with patch('tradingcore.indicators.ichimoku.ta.ichimoku', wraps=ta.ichimoku) as ichimoku, \
+             patch('tradingcore.indicators.psar.kernels.psar', wraps=kernels.psar) as psar:
+            shared = [IchimokuCloud(strategy, features=store).calculate(data) for strategy in strategies]
+        self.assertEqual(ichimoku.call_count, 1)
+        self.assertEqual(psar.call_count, 1)
+        # Same signals as indicators that compute everything themselves
+        for strategy, signal in zip(strategies, shared):
+            pd.testing.assert_series_equal(signal, IchimokuCloud(strategy, features=FeatureStore()).calculate(data))
+
+    def test_moving_averages_shared_with_ao(self):
+        store = FeatureStore()
+        data = bars(200)
+        # ma and ao use the same pandas_ta module
+        with patch('tradingcore.indicators.ma.ta.sma', wraps=ta.sma) as sma:
+            MovingAverage('MA', length=5, features=store).calculate(data)
+            AwesomeOscillator('AO', features=store).calculate(data)
+        self.assertEqual(sma.call_count, 2)
+
+    def test_rsi_unchanged(self):
+        data = bars(300)
+        signal = RSI('RSI', features=FeatureStore()).calculate(data.copy())
+        again = RSI('RSI', features=FeatureStore()).calculate(data.copy())
+        pd.testing.assert_series_equal(signal, again)
+
+class TestSharedAcrossTasks(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_tasks_on_one_cache_share_features(self):
+        # Every task of a worker builds its own TimeSeriesData from the process BarCache
+        source = MagicMock(spec=DataSource)
+        source.fetch.return_value = bars(300, start=pd.Timestamp.now(tz='UTC').floor('D') - pd.Timedelta(days=300),
+                                         freq='D')
+        cache, store = BarCache(), FeatureStore()
+        with patch('tradingcore.indicators.ma.ta.sma', wraps=ta.sma) as sma:
+            for _ in range(2):
+                ts = TimeSeriesData('AAPL', '1d', None, cache=cache, storage=FileBarStore(self.root), source=source,
+                                    refresh=RefreshController())
+                MovingAverage('MA', length=5, features=store).calculate(ts.data)
+        self.assertEqual(sma.call_count, 1)
+        self.assertEqual(source.fetch.call_count, 1)
+        stats = store.stats()
+        self.assertEqual(stats['versions'], 1)
+        self.assertGreater(stats['hits'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
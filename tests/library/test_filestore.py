@@ -0,0 +1,76 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from unittest.mock import MagicMock
+from tradingcore.data.filestore import FileBarStore
+from tradingcore.data.sources import DataSource
+from tradingcore.data.timeseries import TimeSeriesData
+
+def bars(rows, start='2025-03-03 14:30'):
+    index = pd.date_range(start, periods=rows, freq='min', tz='UTC')
+    close = 100 + np.arange(rows) * 0.01
+    return pd.DataFrame({'Open': close, 'High': close + 0.05, 'Low': close - 0.05, 'Close': close,
+                         'Volume': np.arange(rows) * 10}, index=index)
+
+class TestFileBarStore(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.store = FileBarStore(self.root)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_append_only_newer_bars(self):
+        data = bars(100)
+        self.assertEqual(self.store.write_bars('AAPL', '1m', data.iloc[:60]), 60)
+        self.assertEqual(self.store.write_bars('AAPL', '1m', data.iloc[30:]), 40)
+        self.assertEqual(self.store.write_bars('AAPL', '1m', data), 0)
+        stored = self.store.read_bars('AAPL', '1m')
+        np.testing.assert_array_equal(stored['close'], data['Close'].to_numpy())
+        np.testing.assert_array_equal(stored['date'], data.index.tz_convert(None).values.astype('datetime64[us]'))
+        state = self.store.get_ticker_state('AAPL', '1m')
+        self.assertEqual((state.row_count, state.first_bar, state.last_bar), (100, data.index[0], data.index[-1]))
+
+    def test_interrupted_write_is_discarded(self):
+        self.store.write_bars('AAPL', '1m', bars(10))
+        # Bytes appended without publishing meta.json are not visible and get overwritten
+        with open(os.path.join(self.root, '1m', 'AAPL', 'close.0'), 'ab') as file:
+            file.write(b'\x00' * 12)
+        self.assertEqual(len(self.store.read_bars('AAPL', '1m')['close']), 10)
+        self.store.write_bars('AAPL', '1m', bars(20))
+        np.testing.assert_array_equal(self.store.read_bars('AAPL', '1m')['close'], bars(20)['Close'].to_numpy())
+
+    def test_range_and_many(self):
+        data = bars(100)
+        self.store.write_bars('A', '1m', data)
+        self.store.write_bars('B', '1m', data.iloc[::2])
+        self.assertEqual(len(self.store.read_bars('A', '1m', data.index[10], data.index[19])['date']), 10)
+        many = self.store.read_bars_many(['B', 'A'], '1m')
+        np.testing.assert_array_equal(np.bincount(many['ticker']), [50, 100])
+        self.assertTrue((np.diff(many['date']) >= np.timedelta64(0)).all())
+
+    def test_delete_keeps_open_mappings(self):
+        data = bars(100)
+        self.store.write_bars('A', '1m', data)
+        mapped = self.store.read_bars('A', '1m')
+        self.assertEqual(self.store.delete_bars_before('A', '1m', data.index[40]), 40)
+        self.assertEqual(len(mapped['close']), 100)
+        self.assertEqual(self.store.get_ticker_state('A', '1m').first_bar, data.index[40])
+        self.assertEqual(self.store.write_bars('A', '1m', bars(110)), 10)
+        self.assertEqual(self.store.get_ticker_state('A', '1m').row_count, 70)
+
+    def test_timeseries_without_database(self):
+        source = MagicMock(spec=DataSource)
+        source.fetch.return_value = bars(50)
+        TimeSeriesData('AAPL', '1m', None, storage=self.store, source=source)
+        ts = TimeSeriesData('AAPL', '1m', None, storage=self.store, source=source)
+        source.fetch.assert_called_once()
+        self.assertEqual(len(ts.data), 50)
+        self.assertIsNotNone(self.store.get_ticker_state('AAPL', '1m').last_fetch_at)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from tradingcore.data.freshness import RefreshController
+
+class TestRefreshController(unittest.TestCase):
+
+    def test_min_refresh_interval(self):
+        controller = RefreshController()
+        now = datetime(2024, 1, 2, 15, 0, tzinfo=timezone.utc)
+        self.assertFalse(controller.is_fresh('AAPL', '5m', now))
+        controller.mark_refreshed('AAPL', '5m', now)
+        self.assertTrue(controller.is_fresh('AAPL', '5m', now + timedelta(minutes=4)))
+        self.assertFalse(controller.is_fresh('AAPL', '5m', now + timedelta(minutes=5)))
+        self.assertFalse(controller.is_fresh('MSFT', '5m', now))
+
+    def test_daily_bars_refreshed_once_a_day(self):
+        # A market without a calendar only has the min refresh interval
+        controller = RefreshController()
+        now = datetime(2024, 1, 2, 15, 0, tzinfo=timezone.utc)
+        controller.mark_refreshed('BTC-USD', '1d', now)
+        self.assertTrue(controller.is_fresh('BTC-USD', '1d', now + timedelta(hours=23)))
+        self.assertFalse(controller.is_fresh('BTC-USD', '1d', now + timedelta(days=1)))
+
+    def test_custom_min_interval(self):
+        controller = RefreshController({'1d': timedelta(hours=6)})
+        now = datetime(2024, 1, 2, 15, 0, tzinfo=timezone.utc)
+        controller.mark_refreshed('AAPL', '1d', now)
+        self.assertTrue(controller.is_fresh('AAPL', '1d', now + timedelta(hours=5)))
+
+    def test_shared_refresh_marker(self):
+        # e.g. ticker_state.last_fetch_at written by another worker process
+        controller = RefreshController()
+        now = datetime(2024, 1, 2, 15, 0, tzinfo=timezone.utc)
+        self.assertTrue(controller.is_fresh('AAPL', '5m', now, refreshed_at=now - timedelta(minutes=2)))
+        self.assertFalse(controller.is_fresh('AAPL', '5m', now, refreshed_at=now - timedelta(minutes=6)))
+
+    def test_concurrent_refreshes_are_coalesced(self):
+        controller = RefreshController()
+        calls = []
+        started = threading.Event()
+
+        def refresh():
+            calls.append(1)
+            started.set()
+            time.sleep(0.2)
+            return object()
+
+        results = []
+        def worker():
+            results.append(controller.run('AAPL', '1d', refresh))
+
+        leader = threading.Thread(target=worker)
+        leader.start()
+        started.wait()
+        followers = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in followers:
+            thread.start()
+        for thread in [leader] + followers:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertTrue(controller.is_fresh('AAPL', '1d'))
+
+    def test_error_is_shared_and_not_marked_fresh(self):
+        controller = RefreshController()
+
+        def refresh():
+            raise ConnectionError("Yahoo Finance unavailable")
+
+        with self.assertRaises(ConnectionError):
+            controller.run('AAPL', '1d', refresh)
+        self.assertFalse(controller.is_fresh('AAPL', '1d'))
+        # A failed flight must not block the next attempt
+        self.assertEqual(controller.run('AAPL', '1d', lambda: 42), 42)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+import numpy as np
+import pandas as pd
+from tradingcore.indicators import (BaseIndicator, BollingerBands, IchimokuCloud, KeltnerChannel, MACD, MovingAverage,
+                                    RSI)
+from tradingcore.indicators.grid import RollingExtremes, rolling_means
+from . import bars
+
+GRIDS = [
+    (MovingAverage, {'length': (5, 20, 50), 'ma_type': ('sma', 'ema')}),
+    (RSI, {'length': (7, 14, 21)}),
+    (MACD, {'fast': (8, 12, 30), 'slow': (21, 26), 'signal': (5, 9)}),
+    (BollingerBands, {'length': (10, 20), 'std': (1.5, 2.0)}),
+    (KeltnerChannel, {'length': (10, 20), 'scalar': (1.0, 2.0)}),
+    (IchimokuCloud, {'tenkan': (7, 9), 'kijun': (22, 26), 'senkou': (44, 52)}),
+]
+
+def one_by_one(cls, data, strategy, grid):
+    # One calculate() per combination
+    return BaseIndicator.batch.__func__(cls, data, strategy, **grid)
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.data = bars(1500)
+
+    def test_signals_match_calculate(self):
+        for cls, grid in GRIDS:
+            for strategy in cls.POSSIBLE_STRATEGIES[1:]:
+                with self.subTest(indicator=cls.__name__, strategy=strategy, grid=grid):
+                    expected = one_by_one(cls, self.data, strategy, grid)
+                    result = cls.batch(self.data, strategy, **grid)
+                    np.testing.assert_array_equal(result.to_numpy(), expected.to_numpy())
+                    pd.testing.assert_index_equal(result.columns, self.data.index)
+
+    def test_components_match_calculate(self):
+        for cls, grid in GRIDS:
+            with self.subTest(indicator=cls.__name__, grid=grid):
+                expected = one_by_one(cls, self.data, None, grid)
+                result = cls.batch(self.data, **grid)
+                self.assertLessEqual(set(result), set(expected))
+                for name, frame in result.items():
+                    np.testing.assert_allclose(frame.to_numpy(), expected[name].to_numpy(), rtol=1e-9, atol=1e-9)
+
+    def test_parameter_index(self):
+        result = BollingerBands.batch(self.data, 'Bollinger', length=[10, 20], std=[1.5, 2.0, 2.5])
+        self.assertEqual(result.index.names, ['length', 'std'])
+        self.assertEqual(list(result.index), [(10, 1.5), (10, 2.0), (10, 2.5), (20, 1.5), (20, 2.0), (20, 2.5)])
+        np.testing.assert_array_equal(result.loc[(20, 2.0)].to_numpy(),
+                                      BollingerBands('Bollinger').calculate(self.data).to_numpy())
+
+class TestKernels(unittest.TestCase):
+
+    def test_rolling_extremes(self):
+        values = bars(300)['High'].to_numpy()
+        highest, lowest = RollingExtremes(values), RollingExtremes(values, highest=False)
+        for length in [1, 2, 3, 7, 8, 9, 26, 52, 299, 300, 301]:
+            with self.subTest(length=length):
+                np.testing.assert_array_equal(highest.window(length), pd.Series(values).rolling(length).max())
+                np.testing.assert_array_equal(lowest.window(length), pd.Series(values).rolling(length).min())
+
+    def test_rolling_means(self):
+        values = bars(300)['Close'].to_numpy()
+        lengths = [1, 5, 50, 300, 301]
+        for length, means in zip(lengths, rolling_means(values, lengths)):
+            np.testing.assert_allclose(means, pd.Series(values).rolling(length).mean(), rtol=1e-12)
+
+if __name__ == '__main__':
+    unittest.main()
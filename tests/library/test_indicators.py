@@ -0,0 +1,94 @@
+import unittest
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+import pandas_ta as ta
+from tradingcore.indicators import (AwesomeOscillator, BollingerBands, FeatureStore, Hold, IchimokuCloud, KeltnerChannel,
+                                    MACD, MovingAverage, PSAR, RSI, StochasticOscillator, VolumeIndicator)
+from . import bars
+
+def loop_divergences(data, rsi):
+    # Row by row implementation the vectorised one replaced
+    bullish_divergence = np.zeros(len(data))
+    bearish_divergence = np.zeros(len(data))
+    for i in range(2, len(data)):
+        if data['Low'].iloc[i] < data['Low'].iloc[i-1] and rsi.iloc[i] > rsi.iloc[i-1]:
+            bullish_divergence[i] = 1
+        if data['High'].iloc[i] > data['High'].iloc[i-1] and rsi.iloc[i] < rsi.iloc[i-1]:
+            bearish_divergence[i] = 1
+    return bullish_divergence, bearish_divergence
+
+class TestVectorised(unittest.TestCase):
+
+    def test_rsi_divergences(self):
+        for rows in [0, 1, 2, 3, 20, 2000]:
+            data = bars(rows)
+            rsi = pd.Series(np.random.default_rng(1).uniform(0, 100, rows), index=data.index)
+            # Undefined values during the warm-up are never divergences
+            rsi.iloc[:14] = np.nan
+            expected = loop_divergences(data, rsi)
+            result = RSI()._find_divergences(data, rsi)
+            for got, want in zip(result, expected):
+                np.testing.assert_array_equal(got, want)
+                self.assertEqual(got.dtype, want.dtype)
+
+    def test_rsi_divergence_signal(self):
+        data = bars(2000)
+        indicator = RSI('RSI_Divergence', features=FeatureStore())
+        signal = indicator.calculate(data.copy())
+        bullish, bearish = loop_divergences(data, indicator.components['RSI_Slow'])
+        np.testing.assert_array_equal(indicator.components['RSI_Bullish_Divergence'], bullish)
+        np.testing.assert_array_equal(indicator.components['RSI_Bearish_Divergence'], bearish)
+        self.assertTrue((signal != 0).any())
+
+    def test_ao_signal(self):
+        data = bars(2000)
+        indicator = AwesomeOscillator('SMA_Crossover', features=FeatureStore())
+        signal = indicator.calculate(data)
+        ao = indicator.components['AO']
+        expected = ao.apply(lambda x: 1 if x > 0 else (-1 if x < 0 else 0)).rename('AO_Signal')
+        pd.testing.assert_series_equal(signal, expected)
+
+def walk_back(signals, index):
+    # Last signal and the first bar of its run from the whole history
+    signal = signals.iloc[-1]
+    for i in range(1, len(signals) + 1):
+        if signals.iloc[-i] != signal:
+            return signal, index[-i+1]
+    return signal, None
+
+class TestTail(unittest.TestCase):
+
+    def indicators(self):
+        for cls in [AwesomeOscillator, BollingerBands, IchimokuCloud, KeltnerChannel, MACD, MovingAverage, PSAR, RSI,
+                    StochasticOscillator, VolumeIndicator, Hold]:
+            for strategy in cls.POSSIBLE_STRATEGIES[1:]:
+                yield lambda: cls(strategy, features=FeatureStore()) if cls not in (Hold, VolumeIndicator) else cls(strategy)
+        yield lambda: MovingAverage('MA', ma_type='ema', features=FeatureStore())
+        yield lambda: RSI('RSI_Cross', length=3, features=FeatureStore())
+
+    def test_tail_matches_whole_history(self):
+        data = bars(3000)
+        for make in self.indicators():
+            indicator = make()
+            with self.subTest(indicator=type(indicator).__name__, strategy=indicator.strategy):
+                expected = make().calculate(data.copy())
+                for tail in [1, 200]:
+                    np.testing.assert_array_equal(indicator.calculate_tail(data, tail).to_numpy(),
+                                                  expected.iloc[-tail:].to_numpy())
+                signal, start = indicator.latest_signal(data)
+                expected_signal, expected_start = walk_back(expected, data.index)
+                self.assertEqual(signal, expected_signal)
+                self.assertEqual(None if start is None else data.index[start], expected_start)
+
+    def test_tail_is_short(self):
+        data = bars(3000)
+        indicator = IchimokuCloud('Kumo', features=FeatureStore())
+        self.assertEqual(indicator.lookback(), 76)
+        self.assertIsNone(IchimokuCloud('KijunPSAR').lookback())
+        with patch('tradingcore.indicators.ichimoku.ta.ichimoku', wraps=ta.ichimoku) as ichimoku:
+            indicator.calculate_tail(data, 10)
+        self.assertEqual(len(ichimoku.call_args.args[0]), 86)
+
+if __name__ == '__main__':
+    unittest.main()
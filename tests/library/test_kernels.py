@@ -0,0 +1,130 @@
+import importlib.util
+import sys
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+import pandas_ta as ta
+from tradingcore.backtesting.backtester import Backtester
+from tradingcore.indicators import MovingAverage, PSAR, RSI, kernels
+from . import bars
+
+def python_kernels():
+    # Separate copy of the module imported as if numba were not installed
+    spec = importlib.util.spec_from_file_location('kernels_without_numba', kernels.__file__)
+    module = importlib.util.module_from_spec(spec)
+    with patch.dict(sys.modules, {'numba': None}):
+        spec.loader.exec_module(module)
+    return module
+
+def loop_backtest(signals, opens, initial_capital, purchase_fraction, sell_fraction, take_profit):
+    # Loop of Backtester.run_backtest before the kernel
+    capital, holdings, max_holdings, price_bought = initial_capital, 0.0, 0.0, 0.0
+    for i in range(len(signals) - 1):
+        if (capital > 0.0) and (signals[i] == 1):
+            amount_to_spend = min(capital, max(initial_capital, capital) * purchase_fraction)
+            shares_bought = amount_to_spend / opens[i+1]
+            price_bought = ((opens[i+1] * shares_bought)+(price_bought*holdings))/(shares_bought+holdings)
+            holdings += shares_bought
+            capital -= amount_to_spend
+            if max_holdings < holdings:
+                max_holdings = holdings
+        elif (holdings > 0.0) and (signals[i] == -1) and (price_bought * take_profit) < opens[i+1]:
+            shares_to_sell = min(holdings, max((max_holdings * sell_fraction), (initial_capital * purchase_fraction)))
+            holdings -= shares_to_sell
+            capital += shares_to_sell * opens[i+1]
+            if holdings == 0:
+                max_holdings = holdings
+    return capital, holdings
+
+class TestKernels(unittest.TestCase):
+
+    def backends(self):
+        yield kernels
+        yield python_kernels()
+
+    def test_python_fallback(self):
+        self.assertEqual(python_kernels().BACKEND, 'python')
+
+    def test_matches_pandas_ta(self):
+        for module in self.backends():
+            for seed in range(3):
+                data = bars(2000, seed)
+                with self.subTest(backend=module.BACKEND, seed=seed):
+                    psar = ta.psar(data['High'], data['Low'], data['Close'], af0=0.02, af=0.02, max_af=0.2)
+                    long, short = module.psar(data['High'], data['Low'], data['Close'])
+                    np.testing.assert_array_equal(long, psar.iloc[:, 0])
+                    np.testing.assert_array_equal(short, psar.iloc[:, 1])
+                    for length in [1, 2, 5, 14, 50, 200]:
+                        np.testing.assert_array_equal(module.ema(data['Close'], length), ta.ema(data['Close'], length))
+                        np.testing.assert_array_equal(module.rsi(data['Close'], length), ta.rsi(data['Close'], length))
+
+    def test_ewm_with_gaps(self):
+        values = bars(500)['Close'].to_numpy(copy=True)
+        values[[0, 1, 100, 101, 300]] = np.nan
+        for module in self.backends():
+            for com in [0.5, 6.5, 13.0]:
+                np.testing.assert_array_equal(module.ewm(values, com),
+                                              pd.Series(values).ewm(com=com, adjust=False).mean())
+
+    def test_ewm_of_rows(self):
+        rows = np.array([bars(300, seed)['Close'].to_numpy() for seed in range(3)])
+        rows[1, :50] = np.nan
+        for module in self.backends():
+            np.testing.assert_array_equal(module.ewm(rows, 6.5), [module.ewm(row, 6.5) for row in rows])
+            np.testing.assert_array_equal(module.rsi(rows, 14), [module.rsi(row, 14) for row in rows])
+
+    def test_read_only_input(self):
+        close = bars(300)['Close']
+        values = close.to_numpy(copy=True)
+        values.flags.writeable = False
+        for module in self.backends():
+            for source in [close, values]:
+                np.testing.assert_array_equal(module.ema(source, 20), ta.ema(close, 20))
+        np.testing.assert_array_equal(values, close)
+
+    def test_short_inputs(self):
+        for module in self.backends():
+            for rows in [0, 1, 2]:
+                data = bars(rows)
+                long, short = module.psar(data['High'], data['Low'], data['Close'])
+                self.assertEqual((len(long), len(short)), (rows, rows))
+                self.assertTrue(np.isnan(module.ema(data['Close'], 5)).all())
+
+    def test_backtest(self):
+        rng = np.random.default_rng(0)
+        for module in self.backends():
+            for take_profit in [1.0, 1.01, 1.04]:
+                signals = rng.choice([-1, 0, 1], 3000).tolist()
+                opens = (100 + np.cumsum(rng.normal(0, 1, 3000))).tolist()
+                args = (10000.0, 0.5, 0.5, take_profit)
+                self.assertEqual(module.backtest(signals, opens, *args), loop_backtest(signals, opens, *args))
+
+class TestIndicatorsUseKernels(unittest.TestCase):
+
+    def test_indicators(self):
+        data = bars(1000)
+        psar = ta.psar(data['High'], data['Low'], data['Close'], af0=0.02, af=0.02, max_af=0.2)
+        long, short = PSAR().calculate(data)
+        np.testing.assert_array_equal(long, psar.iloc[:, 0])
+        np.testing.assert_array_equal(short, psar.iloc[:, 1])
+        np.testing.assert_array_equal(MovingAverage(length=20, ma_type='ema').calculate(data), ta.ema(data['Close'], 20))
+        indicator = RSI()
+        indicator.calculate(data.copy())
+        np.testing.assert_array_equal(indicator.components['RSI_Slow'], ta.rsi(data['Close'], 14))
+
+    def test_backtester(self):
+        data = bars(1000, freq='D')
+        for indicator in [PSAR('PSAR'), MovingAverage('MA', length=20, ma_type='ema')]:
+            backtester = Backtester(SimpleNamespace(data=data, ticker='TEST'), indicator, take_profit=1.01)
+            total_return = backtester.run_backtest()
+            # Same period and prices as run_backtest
+            signals = indicator.calculate(data).loc[data.index[-1] - pd.Timedelta(days=182):].tolist()
+            opens = data['Open'].iloc[-len(signals):].tolist()
+            capital, holdings = loop_backtest(signals, opens, 10000.0, 0.5, 0.5, 1.01)
+            self.assertEqual(total_return, (capital + holdings * opens[-1] - 10000.0) / 10000.0 * 100)
+            self.assertNotEqual(total_return, 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
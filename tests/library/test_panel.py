@@ -0,0 +1,71 @@
+import unittest
+import numpy as np
+import pandas as pd
+from tradingcore.indicators import (AwesomeOscillator, BaseIndicator, BollingerBands, IchimokuCloud, KeltnerChannel, MACD,
+                                    MovingAverage, PSAR, Panel, RSI, StochasticOscillator)
+from . import bars
+
+def screen():
+    # Tickers listed later, one that stopped trading and one with missing bars (e.g. other
+    # holidays or halts), on the same hourly bars
+    data = {f'T{seed}': bars(800, seed) for seed in range(4)}
+    data['LATE'] = bars(800, 4).iloc[300:]
+    data['GONE'] = bars(800, 5).iloc[:650]
+    data['BOTH'] = bars(800, 6).iloc[100:700]
+    gaps = np.random.default_rng(7).choice(np.arange(100, 700), 30, replace=False)
+    data['GAPS'] = bars(800, 7).drop(bars(800, 7).index[gaps])
+    return data
+
+INDICATORS = [
+    (MovingAverage, {'length': 20}), (MovingAverage, {'length': 20, 'ma_type': 'ema'}),
+    (RSI, {}), (RSI, {'length': 7}), (MACD, {}), (MACD, {'fast': 30, 'slow': 10, 'signal': 5}),
+    (BollingerBands, {}), (KeltnerChannel, {'length': 10}), (StochasticOscillator, {}), (PSAR, {}),
+    (IchimokuCloud, {}), (IchimokuCloud, {'tenkan': 7, 'kijun': 22, 'senkou': 44}),
+]
+
+def ticker_by_ticker(cls, data, strategy, params):
+    # One calculate() per ticker
+    return BaseIndicator.panel.__func__(cls, data, strategy, **params)
+
+class TestPanel(unittest.TestCase):
+
+    def setUp(self):
+        self.data = screen()
+        self.panel = Panel(self.data)
+
+    def test_alignment(self):
+        self.assertEqual(list(self.panel.tickers), list(self.data))
+        pd.testing.assert_index_equal(self.panel.index, self.data['T0'].index)
+        close = self.panel.frame(self.panel['Close'])
+        self.assertTrue(close.loc['LATE'].iloc[:300].isna().all())
+        pd.testing.assert_series_equal(close.loc['GONE'].iloc[:650], self.data['GONE']['Close'], check_names=False)
+        self.assertEqual(int(close.loc['GAPS'].isna().sum()), 30)
+        pd.testing.assert_series_equal(close.loc['GAPS'].dropna(), self.data['GAPS']['Close'], check_names=False)
+
+    def test_signals_match_calculate(self):
+        for cls, params in INDICATORS:
+            for strategy in cls.POSSIBLE_STRATEGIES[1:]:
+                with self.subTest(indicator=cls.__name__, strategy=strategy, params=params):
+                    expected = ticker_by_ticker(cls, self.data, strategy, params)
+                    result = cls.panel(self.panel, strategy, **params)
+                    np.testing.assert_array_equal(result.to_numpy(), expected.to_numpy())
+                    pd.testing.assert_index_equal(result.index, self.panel.tickers)
+                    pd.testing.assert_index_equal(result.columns, self.panel.index)
+
+    def test_components_match_calculate(self):
+        for cls, params in INDICATORS:
+            with self.subTest(indicator=cls.__name__, params=params):
+                expected = ticker_by_ticker(cls, self.data, None, params)
+                result = cls.panel(self.data, **params)
+                self.assertEqual(set(result), set(expected))
+                for name, frame in result.items():
+                    np.testing.assert_allclose(frame.to_numpy(), expected[name].to_numpy(), rtol=1e-9, atol=1e-9)
+
+    def test_fallback(self):
+        signals = AwesomeOscillator.panel(self.data, 'SMA_Crossover')
+        self.assertEqual(signals.shape, (len(self.data), 800))
+        np.testing.assert_array_equal(signals.loc['LATE'].iloc[:300], 0)
+        np.testing.assert_array_equal(signals.loc['T1'], AwesomeOscillator('SMA_Crossover').calculate(self.data['T1']))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,271 @@
+import argparse
+import itertools
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+import pandas as pd
+import psycopg2.errors
+from psycopg2 import sql
+from tradingcore.data import partitions
+from tradingcore.data.partitions import (PARTITION_NAME_RE, drop_expired_partitions, ensure_partitions, is_partitioned,
+                                         migrate_to_partitioned, month_partition, month_start, next_month, parse_retention,
+                                         run_retention)
+from tradingcore.data.postgresql import copy_bars, delete_bars_before
+
+DSNS = itertools.count()
+
+def render(query) -> str:
+    # Text of a psycopg2.sql query without a server connection, whitespace collapsed
+    def text(part):
+        if isinstance(part, sql.Composed):
+            return ''.join(text(child) for child in part.seq)
+        if isinstance(part, sql.Identifier):
+            return '.'.join(f'"{string}"' for string in part.strings)
+        return part.string if isinstance(part, sql.SQL) else part
+    return ' '.join(text(query).split())
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.rowcount = -1
+        self.rows = []
+
+    def execute(self, query, params=None):
+        query = render(query)
+        self.connection.executed.append((query, params))
+        for prefix, errors in self.connection.errors.items():
+            if query.startswith(prefix) and errors:
+                raise errors.pop(0)
+        self.rows = next((rows for prefix, rows in self.connection.results.items() if query.startswith(prefix)), [])
+        self.rowcount = len(self.rows)
+
+    def copy_expert(self, query, buffer):
+        self.connection.executed.append((render(query), None))
+        self.connection.results['INSERT INTO DataTimeSeries (date'] = buffer.read().splitlines()
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return list(self.rows)
+
+    def close(self):
+        pass
+
+class FakeConnection:
+    """
+    psycopg2 connection of a database that answers queries starting with a prefix of
+    results with its rows, and raises the errors queued for a prefix in errors.
+    """
+    def __init__(self, relkind='p', results=None):
+        self.dsn = f"dbname=test{next(DSNS)}"
+        self.results = {"SELECT relkind": [(relkind,)]}
+        self.results.update(results or {})
+        self.errors = {}
+        self.executed = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def queries(self, prefix: str) -> list:
+        return [query for query, _ in self.executed if query.startswith(prefix)]
+
+def bars(start, rows):
+    index = pd.date_range(start, periods=rows, freq='D', tz='UTC')
+    return pd.DataFrame({'Open': 1.0, 'High': 2.0, 'Low': 0.5, 'Close': 1.5, 'Volume': 100}, index=index)
+
+class TestPartitionNames(unittest.TestCase):
+
+    def test_month_start_is_utc(self):
+        moment = datetime(2025, 3, 31, 23, 30, tzinfo=timezone.utc)
+        self.assertEqual(month_start(moment), datetime(2025, 3, 1, tzinfo=timezone.utc))
+
+    def test_next_month_wraps_year(self):
+        self.assertEqual(next_month(datetime(2024, 12, 1, tzinfo=timezone.utc)), datetime(2025, 1, 1, tzinfo=timezone.utc))
+
+    def test_partition_name_round_trip(self):
+        name = month_partition('15m', datetime(2025, 7, 1, tzinfo=timezone.utc))
+        self.assertEqual(name, 'datatimeseries_15m_2025_07')
+        match = PARTITION_NAME_RE.match(name)
+        self.assertEqual((match[1], match[2], match[3]), ('15m', '2025', '07'))
+
+class TestPartitionCache(unittest.TestCase):
+
+    def test_partitions_created_once(self):
+        conn = FakeConnection()
+        self.assertEqual(copy_bars(conn, 'AAPL', '1d', bars('2025-01-30', 5)), 5)
+        self.assertEqual(copy_bars(conn, 'AAPL', '1d', bars('2025-02-10', 5)), 5)
+        created = conn.queries('CREATE TABLE IF NOT EXISTS')
+        self.assertEqual(len(created), 2)
+        self.assertIn('"datatimeseries_1d_2025_01" PARTITION OF "datatimeseries_1d"', created[0])
+        self.assertIn('"datatimeseries_1d_2025_02" PARTITION OF "datatimeseries_1d"', created[1])
+
+    def test_write_recreates_dropped_partition(self):
+        # e.g. the retention job dropped the partition from another process
+        conn = FakeConnection()
+        copy_bars(conn, 'AAPL', '1d', bars('2025-01-10', 5))
+        conn.errors['INSERT INTO DataTimeSeries (date'] = [psycopg2.errors.CheckViolation("no partition found for row")]
+        self.assertEqual(copy_bars(conn, 'AAPL', '1d', bars('2025-01-20', 5)), 5)
+        self.assertEqual(len(conn.queries('CREATE TABLE IF NOT EXISTS "datatimeseries_1d_2025_01"')), 2)
+        self.assertEqual(len(conn.queries('INSERT INTO DataTimeSeries (date')), 3)
+
+    def test_retries_once(self):
+        conn = FakeConnection()
+        conn.errors['INSERT INTO DataTimeSeries (date'] = [psycopg2.errors.CheckViolation("no partition found for row")] * 2
+        with self.assertRaises(psycopg2.errors.CheckViolation):
+            copy_bars(conn, 'AAPL', '1d', bars('2025-01-10', 5))
+        self.assertEqual(conn.commits, 2)
+
+    def test_rolled_back_partitions_are_not_remembered(self):
+        conn = FakeConnection()
+        first, last = datetime(2025, 1, 1, tzinfo=timezone.utc), datetime(2025, 2, 1, tzinfo=timezone.utc)
+        conn.errors['CREATE TABLE IF NOT EXISTS "datatimeseries_1d_2025_02"'] = [psycopg2.errors.DuplicateTable()]
+        ensure_partitions(conn, '1d', first, last)
+        self.assertEqual((conn.commits, conn.rollbacks), (0, 1))
+        ensure_partitions(conn, '1d', first, last)
+        self.assertEqual(len(conn.queries('CREATE TABLE IF NOT EXISTS "datatimeseries_1d_2025_01"')), 2)
+        ensure_partitions(conn, '1d', first, last)
+        self.assertEqual(len(conn.queries('CREATE TABLE IF NOT EXISTS')), 4)
+
+    def test_flat_table_is_checked_again(self):
+        # e.g. migrate_to_partitioned run by another process
+        conn = FakeConnection(relkind='r')
+        self.assertFalse(is_partitioned(conn))
+        conn.results['SELECT relkind'] = [('p',)]
+        self.assertFalse(is_partitioned(conn))
+        with patch.object(partitions, 'PARTITIONING_RECHECK', 0.0):
+            self.assertTrue(is_partitioned(conn))
+        conn.results['SELECT relkind'] = [('r',)]
+        self.assertTrue(is_partitioned(conn))
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+class TestDropExpiredPartitions(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = FakeConnection(results={
+            'SELECT child.relname': [('datatimeseries_1m_2025_02',), ('datatimeseries_1m_2024_12',),
+                                     ('datatimeseries_1m_2025_01',), ('datatimeseries_1m_default',)],
+            'SELECT ticker, count(*) FROM "datatimeseries_1m_2024_12"': [('AAPL', 100), ('MSFT', 40)],
+        })
+
+    def test_drops_partitions_before_cutoff(self):
+        # January ends on the cutoff, February still holds bars after it
+        dropped = drop_expired_partitions(self.conn, '1m', utc(2025, 2, 1))
+        self.assertEqual(dropped, ['datatimeseries_1m_2024_12', 'datatimeseries_1m_2025_01'])
+        self.assertEqual(self.conn.queries('DROP TABLE'),
+                         ['DROP TABLE "datatimeseries_1m_2024_12"', 'DROP TABLE "datatimeseries_1m_2025_01"'])
+        self.assertEqual(self.conn.executed[0][1], ('datatimeseries_1m',))
+        self.assertEqual(drop_expired_partitions(FakeConnection(), '1m', utc(2025, 2, 1)), [])
+        self.assertEqual(drop_expired_partitions(self.conn, '1m', utc(2025, 1, 31)), ['datatimeseries_1m_2024_12'])
+
+    def test_updates_ticker_state(self):
+        drop_expired_partitions(self.conn, '1m', utc(2025, 1, 15))
+        updates = [params for query, params in self.conn.executed if query.startswith('UPDATE ticker_state')]
+        self.assertEqual(updates, [(100, 'AAPL', '1m', 100, 'AAPL', '1m'), (40, 'MSFT', '1m', 40, 'MSFT', '1m')])
+        self.assertEqual((self.conn.commits, self.conn.rollbacks), (1, 0))
+
+    def test_rolls_back_on_error(self):
+        self.conn.errors['DROP TABLE "datatimeseries_1m_2025_01"'] = [psycopg2.errors.LockNotAvailable()]
+        with self.assertRaises(psycopg2.errors.LockNotAvailable):
+            drop_expired_partitions(self.conn, '1m', utc(2025, 2, 1))
+        self.assertEqual((self.conn.commits, self.conn.rollbacks), (0, 1))
+
+class TestRunRetention(unittest.TestCase):
+
+    def cutoffs(self, **kwargs):
+        with patch.object(partitions, 'drop_expired_partitions', return_value=[]) as drop:
+            run_retention(FakeConnection(), now=utc(2025, 6, 1), **kwargs)
+        return {call.args[1]: call.args[2] for call in drop.call_args_list}
+
+    def test_refresh_period_by_default(self):
+        cutoffs = self.cutoffs()
+        self.assertEqual(cutoffs['1m'], utc(2025, 5, 25))
+        self.assertEqual(cutoffs['1d'], utc(2024, 6, 1))
+
+    def test_retention_per_interval(self):
+        # e.g. a year of backfilled minute bars
+        cutoffs = self.cutoffs(retention={'1m': timedelta(days=365)})
+        self.assertEqual(cutoffs['1m'], utc(2024, 6, 1))
+        self.assertEqual(cutoffs['5m'], utc(2025, 5, 2))
+
+    def test_not_partitioned(self):
+        conn = FakeConnection(relkind='r')
+        self.assertEqual(run_retention(conn, retention={'1m': timedelta(days=365)}), [])
+        self.assertEqual(conn.queries('SELECT child.relname'), [])
+
+    def test_parse_retention(self):
+        self.assertEqual(parse_retention('1m=365d'), ('1m', timedelta(days=365)))
+        self.assertEqual(parse_retention('1h=12h'), ('1h', timedelta(hours=12)))
+        for value in ['1m', '3mo=10d', '1m=soon']:
+            with self.assertRaises(argparse.ArgumentTypeError):
+                parse_retention(value)
+
+class TestMigrateToPartitioned(unittest.TestCase):
+
+    def flat_database(self, ranges):
+        return FakeConnection(relkind='r', results={'SELECT interval, min(date), max(date)': ranges,
+                                                     'INSERT INTO DataTimeSeries SELECT': [()] * 3})
+
+    def test_moves_bars_into_partitions(self):
+        conn = self.flat_database([('1m', utc(2025, 1, 20), utc(2025, 3, 2)), ('1d', utc(2024, 12, 31), utc(2024, 12, 31))])
+        migrate_to_partitioned(conn)
+        self.assertEqual(conn.queries('ALTER TABLE'), ['ALTER TABLE DataTimeSeries RENAME TO DataTimeSeries_legacy'])
+        created = [query.split('"')[1] for query in conn.queries('CREATE TABLE IF NOT EXISTS')]
+        self.assertEqual(created[0], 'datatimeseries')
+        self.assertEqual(created[-4:], ['datatimeseries_1m_2025_01', 'datatimeseries_1m_2025_02', 'datatimeseries_1m_2025_03',
+                                        'datatimeseries_1d_2024_12'])
+        self.assertEqual(conn.queries('DROP TABLE'), ['DROP TABLE DataTimeSeries_legacy'])
+        self.assertEqual((conn.commits, conn.rollbacks), (1, 0))
+        # The table and its partitions are known, writes create no partition again
+        self.assertTrue(is_partitioned(conn))
+        ensure_partitions(conn, '1m', utc(2025, 2, 1), utc(2025, 3, 1))
+        self.assertEqual(len(conn.queries('CREATE TABLE IF NOT EXISTS')), len(created))
+
+    def test_keep_legacy(self):
+        conn = self.flat_database([('1m', utc(2025, 1, 20), utc(2025, 1, 21))])
+        migrate_to_partitioned(conn, keep_legacy=True)
+        self.assertEqual(conn.queries('DROP TABLE'), [])
+
+    def test_rolls_back_on_error(self):
+        conn = self.flat_database([('1m', utc(2025, 1, 20), utc(2025, 1, 21)), ('3mo', utc(2025, 1, 1), utc(2025, 1, 1))])
+        with self.assertRaises(ValueError):
+            migrate_to_partitioned(conn)
+        self.assertEqual((conn.commits, conn.rollbacks), (0, 1))
+        self.assertFalse(is_partitioned(conn))
+        # Partitions of the rolled back transaction are created again
+        conn.results['SELECT relkind'] = [('p',)]
+        with patch.object(partitions, 'PARTITIONING_RECHECK', 0.0):
+            ensure_partitions(conn, '1m', utc(2025, 1, 20), utc(2025, 1, 21))
+        self.assertEqual(len(conn.queries('CREATE TABLE IF NOT EXISTS "datatimeseries_1m_2025_01"')), 2)
+
+    def test_already_partitioned(self):
+        conn = FakeConnection()
+        migrate_to_partitioned(conn)
+        self.assertEqual(conn.queries('ALTER TABLE'), [])
+
+class TestDeleteBarsBefore(unittest.TestCase):
+
+    def test_no_op_on_partitioned_table(self):
+        conn = FakeConnection()
+        self.assertEqual(delete_bars_before(conn, 'AAPL', '1m', utc(2025, 1, 1)), 0)
+        self.assertEqual([query for query, _ in conn.executed if not query.startswith('SELECT relkind')], [])
+
+    def test_deletes_on_flat_table(self):
+        state = ('AAPL', '1m', utc(2024, 12, 1), utc(2025, 2, 1), 500, None)
+        conn = FakeConnection(relkind='r', results={'SELECT ticker, interval, first_bar': [state], 'DELETE': [()] * 20})
+        self.assertEqual(delete_bars_before(conn, 'AAPL', '1m', utc(2025, 1, 1)), 20)
+        self.assertEqual(len(conn.queries('DELETE FROM DataTimeSeries')), 1)
+        self.assertEqual(conn.commits, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+import os
+import pickle
+import threading
+import unittest
+import struct
+from unittest.mock import MagicMock
+import numpy as np
+import psycopg2
+import psycopg2.extensions
+from tradingcore.data.postgresql import (decode_bar_copy, COPY_SIGNATURE, PG_EPOCH_US, PANEL_COPY_DTYPE, ConnectionPool,
+                                         PoolTimeout, execute_prepared)
+
+def copy_payload(rows, tickers=None):
+    # Build a binary COPY payload as PostgreSQL would send it
+    payload = COPY_SIGNATURE + struct.pack('>ii', 0, 0)
+    for i, (date_us, o, h, l, c, v) in enumerate(rows):
+        if tickers is None:
+            payload += struct.pack('>h', 6)
+        else:
+            payload += struct.pack('>hii', 7, 4, tickers[i])
+        payload += struct.pack('>iq', 8, date_us - PG_EPOCH_US)
+        for value in (o, h, l, c):
+            payload += struct.pack('>id', 8, value)
+        payload += struct.pack('>iq', 8, v)
+    return payload + struct.pack('>h', -1)
+
+class TestDecodeBarCopy(unittest.TestCase):
+
+    def test_decode_rows(self):
+        first = int(np.datetime64('2024-01-02T14:30:00', 'us').astype(np.int64))
+        rows = [(first, 10.0, 11.0, 9.5, 10.5, 1000), (first + 3_600_000_000, 10.5, 12.0, 10.0, 11.5, 2500)]
+        bars = decode_bar_copy(copy_payload(rows))
+        self.assertEqual(bars['date'][0], np.datetime64('2024-01-02T14:30:00', 'us'))
+        self.assertEqual(bars['date'][1], np.datetime64('2024-01-02T15:30:00', 'us'))
+        np.testing.assert_array_equal(bars['close'], [10.5, 11.5])
+        np.testing.assert_array_equal(bars['volume'], [1000, 2500])
+        self.assertTrue(bars['open'].flags['C_CONTIGUOUS'])
+        self.assertEqual(bars['open'].dtype, np.float64)
+
+    def test_decode_panel_rows(self):
+        first = int(np.datetime64('2024-01-02T00:00:00', 'us').astype(np.int64))
+        rows = [(first, 10.0, 11.0, 9.5, 10.5, 1000), (first, 20.0, 21.0, 19.5, 20.5, 3000)]
+        bars = decode_bar_copy(copy_payload(rows, tickers=[1, 0]), PANEL_COPY_DTYPE)
+        np.testing.assert_array_equal(bars['ticker'], [1, 0])
+        np.testing.assert_array_equal(bars['open'], [10.0, 20.0])
+
+    def test_decode_empty(self):
+        bars = decode_bar_copy(copy_payload([]))
+        self.assertEqual(len(bars['date']), 0)
+
+    def test_rejects_non_copy_payload(self):
+        with self.assertRaises(ValueError):
+            decode_bar_copy(b'date,open\n')
+
+class FakeConnection:
+    # Stand-in for a connect_db connection, closed like psycopg2 marks lost connections
+    def __init__(self):
+        self.closed = 0
+        self.prepared = set()
+        self.last_used = 0
+        self.info = MagicMock(transaction_status=psycopg2.extensions.TRANSACTION_STATUS_IDLE)
+        self.executed = []
+
+    def cursor(self):
+        cursor = MagicMock(connection=self)
+        cursor.execute.side_effect = lambda query, params=None: self.executed.append((query, params))
+        return cursor
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+
+class FakePool(ConnectionPool):
+
+    def _connect(self):
+        self.opened = getattr(self, 'opened', 0) + 1
+        return FakeConnection()
+
+class TestConnectionPool(unittest.TestCase):
+
+    def test_reuses_connections(self):
+        pool = FakePool(min_size=2, max_size=3)
+        self.assertEqual(pool.opened, 2)
+        with pool.connection() as first:
+            with pool.connection() as second:
+                self.assertIsNot(first, second)
+        with pool.connection() as conn:
+            self.assertIn(conn, (first, second))
+        self.assertEqual(pool.opened, 2)
+
+    def test_waits_for_a_free_connection(self):
+        pool = FakePool(min_size=0, max_size=1)
+        conn = pool.getconn()
+        with self.assertRaises(PoolTimeout):
+            pool.getconn(timeout=0.01)
+        threading.Timer(0.05, pool.putconn, [conn]).start()
+        self.assertIs(pool.getconn(timeout=5), conn)
+
+    def test_replaces_broken_connections(self):
+        pool = FakePool(min_size=1, max_size=1)
+        with pool.connection() as conn:
+            conn.closed = 2
+        self.assertEqual(pool._size, 0)
+        with pool.connection() as replacement:
+            self.assertIsNot(replacement, conn)
+
+    def test_health_check_after_idle(self):
+        pool = FakePool(min_size=1, max_size=1, check_after=0)
+        with pool.connection() as conn:
+            pass
+        with pool.connection() as checked:
+            self.assertIs(checked, conn)
+        self.assertIn(("SELECT 1", None), conn.executed)
+
+    def test_run_retries_on_lost_connection(self):
+        pool = FakePool(min_size=2, max_size=2)
+        calls = []
+
+        def query(conn):
+            calls.append(conn)
+            if len(calls) == 1:
+                conn.closed = 2
+                raise psycopg2.OperationalError("server closed the connection unexpectedly")
+            return 'ok'
+
+        self.assertEqual(pool.run(query), 'ok')
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(calls[1].closed, 0)
+        # The idle connection that may have lost its session too was dropped
+        self.assertEqual(pool.opened, 3)
+
+    def test_run_does_not_retry_query_errors(self):
+        pool = FakePool(min_size=1, max_size=1)
+
+        def query(conn):
+            raise psycopg2.OperationalError("canceling statement due to statement timeout")
+
+        with self.assertRaises(psycopg2.OperationalError):
+            pool.run(query)
+
+    def test_pickled_or_forked_pool_opens_its_own_connections(self):
+        pool = FakePool(min_size=1, max_size=2)
+        copy = pickle.loads(pickle.dumps(pool))
+        self.assertEqual((copy._size, copy._idle), (0, []))
+        self.assertEqual(copy.max_size, 2)
+
+        inherited = pool._idle[0]
+        pool._pid = os.getpid() + 1  # As seen from a forked child
+        with pool.connection() as conn:
+            self.assertIsNot(conn, inherited)
+        self.assertFalse(inherited.closed)
+
+class TestExecutePrepared(unittest.TestCase):
+
+    def test_prepares_once_per_connection(self):
+        conn = FakeConnection()
+        execute_prepared(conn.cursor(), 'get_ticker_state', ('AAPL', '1d'))
+        execute_prepared(conn.cursor(), 'get_ticker_state', ('MSFT', '1d'))
+        self.assertTrue(conn.executed[0][0].startswith("PREPARE get_ticker_state AS"))
+        self.assertEqual(conn.executed[1:], [("EXECUTE get_ticker_state (%s, %s)", ('AAPL', '1d')),
+                                             ("EXECUTE get_ticker_state (%s, %s)", ('MSFT', '1d'))])
+
+    def test_plain_connection_runs_the_query(self):
+        conn = MagicMock(spec=['cursor'])
+        cursor = MagicMock(connection=conn)
+        execute_prepared(cursor, 'deleted_ticker_state', (5, 'AAPL', '1d'))
+        query, params = cursor.execute.call_args[0]
+        self.assertIn("GREATEST(row_count - %(1)s::bigint, 0)", query)
+        self.assertEqual(params, {'1': 5, '2': 'AAPL', '3': '1d'})
+
+if __name__ == '__main__':
+    unittest.main()
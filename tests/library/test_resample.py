@@ -0,0 +1,64 @@
+import unittest
+import numpy as np
+import pandas as pd
+from tradingcore.data.calendar import NYSE
+from tradingcore.data.resample import Resampler, can_resample
+
+AGGREGATIONS = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+
+def session_bars(start, end):
+    # Regular NYSE session 1m bars, spanning the 2025-03-09 DST change
+    sessions = [pd.Timestamp(day.date()).tz_localize('America/New_York') + pd.Timedelta(hours=9, minutes=30)
+                for day in pd.bdate_range(start, end)]
+    index = pd.DatetimeIndex(np.concatenate([
+        pd.date_range(open_, periods=390, freq='min').tz_convert('UTC').values for open_ in sessions])).tz_localize('UTC')
+    rng = np.random.default_rng(0)
+    close = 100 + rng.standard_normal(len(index)).cumsum()
+    return pd.DataFrame({'Open': close + 0.1, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                         'Volume': rng.integers(0, 1000, len(index))}, index=index)
+
+class TestResampler(unittest.TestCase):
+
+    def setUp(self):
+        self.data = session_bars('2025-03-05', '2025-03-12')
+
+    def expected(self, rule, offset=None):
+        local = self.data.tz_convert('America/New_York')
+        expected = local.resample(rule, offset=offset).agg(AGGREGATIONS).dropna().tz_convert('UTC')
+        expected['Volume'] = expected['Volume'].astype(np.int64)
+        return expected
+
+    def test_matches_pandas_resample(self):
+        for interval, rule, offset in [('5m', '5min', None), ('15m', '15min', None), ('60m', '60min', '30min'),
+                                       ('1d', 'D', None)]:
+            result = Resampler(interval, '1m', NYSE).resample(self.data)
+            pd.testing.assert_frame_equal(result, self.expected(rule, offset), check_freq=False)
+
+    def test_hourly_bars_start_at_session_open_across_dst(self):
+        result = Resampler('60m', '1m', NYSE).resample(self.data)
+        local = result.index.tz_convert('America/New_York')
+        self.assertEqual(set(local.strftime('%H:%M')), {'09:30', '10:30', '11:30', '12:30', '13:30', '14:30', '15:30'})
+
+    def test_incremental_updates_match_full_resample(self):
+        for interval in ['5m', '60m', '1d']:
+            resampler = Resampler(interval, '1m', NYSE)
+            for end in range(97, len(self.data), 401):
+                resampler.update(self.data.iloc[:end])
+            pd.testing.assert_frame_equal(resampler.update(self.data), Resampler(interval, '1m', NYSE).resample(self.data))
+
+    def test_without_calendar_anchors_at_utc_midnight(self):
+        index = pd.date_range('2025-01-01 00:07', periods=120, freq='min', tz='UTC')
+        data = pd.DataFrame({'Open': 1.0, 'High': 1.0, 'Low': 1.0, 'Close': 1.0, 'Volume': 1}, index=index)
+        result = Resampler('60m', '1m').resample(data)
+        self.assertEqual(list(result.index.strftime('%H:%M')), ['00:00', '01:00', '02:00'])
+        self.assertEqual(list(result['Volume']), [53, 60, 7])
+
+    def test_invalid_base(self):
+        self.assertFalse(can_resample('15m', '5m'))
+        self.assertFalse(can_resample('1d', '60m'))
+        self.assertFalse(can_resample('60m', '90m'))
+        with self.assertRaises(ValueError):
+            Resampler('5m', '15m')
+
+if __name__ == '__main__':
+    unittest.main()
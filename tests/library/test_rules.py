@@ -0,0 +1,80 @@
+import unittest
+from unittest.mock import patch
+import numpy as np
+import pandas_ta as ta
+from tradingcore.indicators import FeatureStore, IchimokuCloud, RuleSet, kernels
+from tradingcore.indicators.ichimoku import RULES
+from tradingcore.indicators.rules import Condition
+from . import bars
+
+class TestRuleSet(unittest.TestCase):
+
+    def setUp(self):
+        self.rules = RuleSet({'Up': (['a > b', 'a > c'], ['a < b', 'c > a']),
+                              'Cross': (['b < a'], ['b > a'])})
+        self.values = {'a': np.array([3.0, 1.0, 2.0, np.nan]), 'b': np.array([1.0, 2.0, 2.0, 1.0]),
+                       'c': np.array([2.0, 3.0, 1.0, 1.0])}
+
+    def test_parse(self):
+        self.assertEqual(Condition.parse('b < a'), Condition.parse('a > b'))
+        self.assertEqual(str(Condition.parse('b <= a')), 'a >= b')
+        with self.assertRaises(ValueError):
+            Condition.parse('a == b')
+
+    def test_signals(self):
+        masks = self.rules.masks(self.values)
+        np.testing.assert_array_equal(masks.signal('Up'), [1, -1, 0, 0])
+        np.testing.assert_array_equal(masks.signal('Cross'), [1, -1, 0, 0])
+        np.testing.assert_array_equal(masks.signal('Unknown'), 0)
+        for i in range(4):
+            bar = {name: values[i] for name, values in self.values.items()}
+            self.assertEqual(self.rules.signal('Up', bar), masks.signal('Up')[i])
+
+    def test_conditions_are_computed_once(self):
+        calls = []
+        values = {name: (lambda name=name: calls.append(name) or self.values[name]) for name in self.values}
+        masks = self.rules.masks(values)
+        masks.signal('Up')
+        masks.signal('Cross')
+        # 'a > b' and 'b < a' are the same condition, the shared one comes first so that the
+        # conjunctions of Cross are prefixes of those of Up; each value is fetched once
+        self.assertEqual(masks.stats(), {'conditions': 4, 'conjunctions': 4})
+        self.assertEqual(sorted(calls), ['a', 'b', 'c'])
+        self.assertEqual(self.rules.names('Cross'), {'a', 'b'})
+
+class TestIchimokuRules(unittest.TestCase):
+
+    def setUp(self):
+        self.data = bars(1000)
+
+    def test_matches_comparisons(self):
+        # The comparisons calculate() made before the strategies were declared as rules
+        indicator = IchimokuCloud('KumoKiyunChikouPSAR', features=FeatureStore())
+        signal = indicator.calculate(self.data)
+        components = indicator.components
+        close = self.data['Close']
+        chikou, close_26 = components['Ichimoku_Chikou'].shift(26), close.shift(26)
+        buy = ((components['Ichimoku_Kijun'] < close) & (close > components['Ichimoku_SenkouA']) &
+               (close > components['Ichimoku_SenkouB']) & (chikou > close_26) & (close > components['PSAR_Long']))
+        sell = ((components['Ichimoku_Kijun'] > close) & (close < components['Ichimoku_SenkouA']) &
+                (close < components['Ichimoku_SenkouB']) & (chikou < close_26) & (close < components['PSAR_Short']))
+        np.testing.assert_array_equal(signal, np.where(sell, -1, np.where(buy, 1, 0)))
+        self.assertTrue((signal == 1).any() and (signal == -1).any())
+
+    def test_strategies_share_masks(self):
+        features = FeatureStore()
+        with patch('tradingcore.indicators.ichimoku.ta.ichimoku', wraps=ta.ichimoku) as ichimoku, \
+             patch('tradingcore.indicators.psar.kernels.psar', wraps=kernels.psar) as psar:
+            all_signals = IchimokuCloud(features=features).calculate_strategies(self.data)
+            for strategy in IchimokuCloud.POSSIBLE_STRATEGIES[1:]:
+                np.testing.assert_array_equal(IchimokuCloud(strategy, features=features).calculate(self.data),
+                                              all_signals[strategy])
+        self.assertEqual(ichimoku.call_count, 1)
+        self.assertEqual(psar.call_count, 1)
+        # Every distinct condition of the twelve strategies is evaluated once
+        masks = IchimokuCloud(features=features).masks(self.data)
+        conditions = {condition for rule in RULES.rules.values() for side in rule for condition in side}
+        self.assertEqual(masks.stats()['conditions'], len(conditions))
+
+if __name__ == '__main__':
+    unittest.main()
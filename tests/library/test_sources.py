@@ -0,0 +1,121 @@
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+import numpy as np
+from tradingcore.data.filestore import FileBarStore
+from tradingcore.data.freshness import RefreshController
+from tradingcore.data.sources import BatchedFetcher, ChartAPISource, FetchError
+from tradingcore.data.timeseries import TimeSeriesData
+from tradingcore.utils.rate_limit import TokenBucket
+
+def chart(symbol, bars=5):
+    # Minimal v8 chart response: daily bars starting 2025-01-02 14:30 UTC
+    timestamps = [1735828200 + 86400 * i for i in range(bars)]
+    close = [100.0 + i for i in range(bars)]
+    return {'chart': {'result': [{
+        'meta': {'symbol': symbol, 'exchangeTimezoneName': 'America/New_York'},
+        'timestamp': timestamps,
+        'indicators': {'quote': [{'open': close, 'high': [c + 1 for c in close], 'low': [c - 1 for c in close],
+                                  'close': close[:-1] + [None], 'volume': [1000] * bars}]},
+    }], 'error': None}}
+
+class StandInHandler(BaseHTTPRequestHandler):
+    # Serves /v8/finance/chart/<symbol>; THROTTLED symbols get a 429 on their first request
+    def do_GET(self):
+        symbol = urlparse(self.path).path.rsplit('/', 1)[-1]
+        with self.server.lock:
+            self.server.requests[symbol] += 1
+            first = self.server.requests[symbol] == 1
+        if symbol.startswith('THROTTLED') and first:
+            self.send_response(429)
+            self.end_headers()
+            return
+        if symbol.startswith('UNKNOWN'):
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = json.dumps(chart(symbol)).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_waits_for_tokens(self):
+        now = [0.0]
+        sleeps = []
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+        bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0], sleep=sleep)
+        for _ in range(4):
+            bucket.acquire()
+        self.assertEqual(sleeps, [0.5, 0.5])
+        self.assertAlmostEqual(now[0], 1.0)
+
+class TestSources(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+        cls.server.lock = threading.Lock()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.source = ChartAPISource(f"http://127.0.0.1:{cls.server.server_port}")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.requests = Counter()
+
+    def test_parse_chart(self):
+        data = self.source.fetch('AAPL', '1d', period='5d')
+        self.assertEqual(list(data.columns), ['Open', 'High', 'Low', 'Close', 'Volume'])
+        self.assertEqual(len(data), 5)
+        self.assertTrue(np.isnan(data['Close'].iloc[-1]))
+        self.assertEqual(str(data.index.tz), 'America/New_York')
+
+    def test_fetch_many_retries_and_skips_unknown(self):
+        fetcher = BatchedFetcher(self.source, max_workers=4, rate=1000, backoff=0.01)
+        tickers = [f'T{i}' for i in range(20)] + ['THROTTLED1', 'UNKNOWN1']
+        results = fetcher.fetch_many(tickers, '1d', period='5d')
+        self.assertEqual(len(results['THROTTLED1']), 5)
+        self.assertTrue(results['UNKNOWN1'].empty)
+        self.assertEqual(self.server.requests['THROTTLED1'], 2)
+        self.assertEqual(sum(self.server.requests.values()), len(tickers) + 1)
+
+    def test_retries_exhausted(self):
+        fetcher = BatchedFetcher(self.source, rate=1000, retries=0)
+        with self.assertRaises(FetchError):
+            fetcher.fetch('THROTTLED2', '1d', period='5d')
+        self.assertEqual(fetcher.fetch_many(['THROTTLED3'], '1d', period='5d'), {})
+
+    def test_timeseries_through_stand_in(self):
+        root = tempfile.mkdtemp()
+        try:
+            store = FileBarStore(root)
+            fetcher = BatchedFetcher(self.source, rate=1000)
+            written = TimeSeriesData.fetch_many(['AAPL', 'MSFT'], '1d', None, fetcher=fetcher, storage=store,
+                                                refresh=RefreshController())
+            # The bar without a close is not stored
+            self.assertEqual(written, {'AAPL': 4, 'MSFT': 4})
+            ts = TimeSeriesData('AAPL', '1d', None, storage=store, source=fetcher)
+            self.assertEqual(len(ts.data), 4)
+            self.assertEqual(self.server.requests['AAPL'], 1)
+        finally:
+            shutil.rmtree(root)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import pickle
+import unittest
+import numpy as np
+import pandas as pd
+from tradingcore.indicators import (BollingerBands, FeatureStore, IchimokuCloud, KeltnerChannel, MACD,
+                                    MovingAverage, PSAR, RSI, StochasticOscillator)
+from . import bars
+
+def assert_components_equal(streamed, calculated):
+    # Running sums and variances agree with pandas to rounding
+    for got, expected in zip(zip(*streamed), calculated):
+        np.testing.assert_allclose(np.array(got, dtype=float), np.asarray(expected, dtype=float),
+                                   rtol=1e-9, atol=1e-9)
+
+class TestUpdate(unittest.TestCase):
+
+    def setUp(self):
+        self.data = bars(600)
+
+    def check(self, make, strategies):
+        for strategy in strategies:
+            with self.subTest(strategy=strategy):
+                expected = make(strategy).calculate(self.data.copy())
+                streamed = make(strategy).replay(self.data)
+                if strategy is None:
+                    assert_components_equal(streamed, expected)
+                else:
+                    np.testing.assert_array_equal(streamed, expected.to_numpy())
+                    self.assertTrue(any(streamed))
+
+    def test_moving_average(self):
+        for ma_type in ['sma', 'ema']:
+            make = lambda strategy: MovingAverage(strategy, length=20, ma_type=ma_type, features=FeatureStore())
+            self.check(make, ['MA'])
+            streamed = make(None).replay(self.data)
+            np.testing.assert_allclose(streamed, make(None).calculate(self.data), rtol=1e-12)
+
+    def test_rsi(self):
+        self.check(lambda strategy: RSI(strategy, features=FeatureStore()), RSI.POSSIBLE_STRATEGIES)
+
+    def test_macd(self):
+        self.check(lambda strategy: MACD(strategy, features=FeatureStore()), MACD.POSSIBLE_STRATEGIES)
+
+    def test_bollinger(self):
+        self.check(lambda strategy: BollingerBands(strategy, features=FeatureStore()), BollingerBands.POSSIBLE_STRATEGIES)
+        make = lambda strategy: BollingerBands(strategy, length=10, std=1.5, features=FeatureStore())
+        self.check(make, BollingerBands.POSSIBLE_STRATEGIES)
+
+    def test_keltner(self):
+        self.check(lambda strategy: KeltnerChannel(strategy, features=FeatureStore()), KeltnerChannel.POSSIBLE_STRATEGIES)
+
+    def test_stochastic(self):
+        self.check(lambda strategy: StochasticOscillator(strategy, features=FeatureStore()),
+                   StochasticOscillator.POSSIBLE_STRATEGIES)
+
+    def test_psar(self):
+        self.check(lambda strategy: PSAR(strategy, features=FeatureStore()), PSAR.POSSIBLE_STRATEGIES)
+
+    def test_ichimoku(self):
+        make = lambda strategy: IchimokuCloud(strategy, features=FeatureStore())
+        self.check(make, IchimokuCloud.POSSIBLE_STRATEGIES[1:])
+        streamed = make(None).replay(self.data)
+        # Chikou needs the bars ahead
+        expected = make(None).calculate(self.data)
+        assert_components_equal([bar[:4] for bar in streamed], expected[:4])
+        self.assertTrue(all(np.isnan(bar[4]) for bar in streamed))
+
+class TestSnapshot(unittest.TestCase):
+
+    def test_restore_replays_revised_bar(self):
+        data = bars(300)
+        revised = data.iloc[-1].copy()
+        revised['Close'] += 3
+        for indicator in [RSI('RSI_Cross'), MACD(), StochasticOscillator(), IchimokuCloud('KumoChikouPSAR')]:
+            with self.subTest(indicator=type(indicator).__name__):
+                indicator.replay(data.iloc[:-1])
+                snapshot = indicator.snapshot()
+                indicator.update(data.iloc[-1])
+                indicator.restore(snapshot)
+                result = indicator.update(revised)
+                expected = type(indicator)(indicator.strategy).replay(pd.concat([data.iloc[:-1], revised.to_frame().T]))
+                np.testing.assert_array_equal(np.asarray(result, dtype=float), np.asarray(expected[-1], dtype=float))
+
+    def test_snapshot_is_picklable(self):
+        indicator = IchimokuCloud('KumoChikouPSAR')
+        indicator.replay(bars(100))
+        restored = IchimokuCloud('KumoChikouPSAR')
+        restored.restore(pickle.loads(pickle.dumps(indicator.snapshot())))
+        bar = bars(101).iloc[-1]
+        self.assertEqual(restored.update(bar), indicator.update(bar))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,17 @@
 # data/__init__.py
 from .timeseries import TimeSeriesData
-from .postgresql import connect_db, init_database
+from .postgresql import connect_db, init_database, ConnectionPool
+from .cache import BarCache
+from .freshness import RefreshController
+from .calendar import TradingCalendar, calendar_for
+from .storage import BarStore, PostgresBarStore
+from .chunks import ChunkedBarStore
+from .filestore import FileBarStore
+from .resample import Resampler
+from .sources import DataSource, YahooFinanceSource, ChartAPISource, BatchedFetcher, AsyncDataSource, ThreadedSource, AsyncChartAPISource
+from .async_timeseries import AsyncTimeSeriesData, create_pool
 
-__all__ = ['TimeSeriesData','connect_db', 'init_database']
\ No newline at end of file
+__all__ = ['TimeSeriesData','connect_db', 'init_database', 'ConnectionPool', 'BarCache', 'RefreshController', 'TradingCalendar', 'calendar_for', 'BarStore', 'PostgresBarStore',
+           'ChunkedBarStore', 'FileBarStore', 'Resampler',
+           'DataSource', 'YahooFinanceSource', 'ChartAPISource', 'BatchedFetcher',
+           'AsyncDataSource', 'ThreadedSource', 'AsyncChartAPISource', 'AsyncTimeSeriesData', 'create_pool']
\ No newline at end of file
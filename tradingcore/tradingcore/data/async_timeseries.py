@@ -0,0 +1,255 @@
+import asyncio
+import io
+import logging
+from datetime import datetime, timedelta, timezone
+import pandas as pd
+import asyncpg
+from tradingcore.data.cache import BarCache
+from tradingcore.data.freshness import RefreshController, default_refresh_controller
+from tradingcore.data.partitions import forget_partitions, missing_partitions, remember_partitions
+from tradingcore.data.postgresql import CREATE_STAGING_TABLE, STATEMENTS, TickerState, decode_bar_copy
+from tradingcore.data.sources import AsyncDataSource, ThreadedSource
+from tradingcore.data.timeseries import TimeSeriesData, bars_to_frame, calc_period, calculate_cutoff_date
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+async def create_pool(host="localhost", user="postgres", password="postgres", database="postgres",
+                      min_size: int = 2, max_size: int = 10) -> asyncpg.Pool:
+    """asyncpg connection pool for AsyncTimeSeriesData."""
+    return await asyncpg.create_pool(host=host, user=user, password=password, database=database,
+                                     min_size=min_size, max_size=max_size)
+
+async def get_ticker_state_async(pool, ticker: str, interval: str):
+    row = await pool.fetchrow(STATEMENTS['get_ticker_state'], ticker, interval)
+    return TickerState(*row) if row is not None else None
+
+async def read_bars_async(pool, ticker: str, interval: str, start=None, end=None) -> dict:
+    """Async postgresql.read_bars: binary COPY decoded into NumPy columns."""
+    query = """
+        SELECT date, open, high, low, close, volume
+        FROM DataTimeSeries
+        WHERE ticker = $1 AND interval = $2
+    """
+    params = [ticker, interval]
+    if start is not None:
+        params.append(start)
+        query += f" AND date >= ${len(params)}"
+    if end is not None:
+        params.append(end)
+        query += f" AND date <= ${len(params)}"
+    buffer = io.BytesIO()
+    async with pool.acquire() as conn:
+        await conn.copy_from_query(query + " ORDER BY date ASC", *params, output=buffer, format='binary')
+    return decode_bar_copy(buffer.getbuffer())
+
+async def record_fetch_async(pool, ticker: str, interval: str):
+    await pool.execute(STATEMENTS['record_fetch'], ticker, interval)
+
+async def is_partitioned_async(conn) -> bool:
+    relkind = await conn.fetchval("SELECT relkind::text FROM pg_class WHERE oid = to_regclass('public.datatimeseries')")
+    return relkind == 'p'
+
+async def ensure_partitions_async(conn, database, interval: str, first: datetime, last: datetime):
+    # partitions.ensure_partitions, database is the key of the partitions known to exist (the pool)
+    created = []
+    for name, statement in missing_partitions(database, interval, first, last):
+        try:
+            await conn.execute(statement)
+        except (asyncpg.DuplicateTableError, asyncpg.UniqueViolationError):
+            # Another task created the same partition concurrently
+            pass
+        created.append(name)
+    remember_partitions(database, created)
+
+async def merge_bars_async(conn, ticker: str, interval: str, records: list) -> int:
+    # COPY the records into the staging table and merge them in one transaction
+    async with conn.transaction():
+        await conn.execute(CREATE_STAGING_TABLE)
+        await conn.copy_records_to_table('datatimeseries_staging', records=records,
+                                         columns=['date', 'open', 'high', 'low', 'close', 'volume'])
+        status = await conn.execute(STATEMENTS['merge_staged_bars'], ticker, interval)
+        inserted = int(status.split()[-1])
+        await conn.execute(STATEMENTS['merged_ticker_state'], ticker, interval, inserted)
+    return inserted
+
+async def copy_bars_async(pool, ticker: str, interval: str, data: pd.DataFrame) -> int:
+    """Async postgresql.copy_bars: COPY into a staging table and merge. Returns the inserted rows."""
+    bars = data[['Open', 'High', 'Low', 'Close', 'Volume']].dropna()
+    if bars.empty:
+        return 0
+    index = pd.to_datetime(bars.index, utc=True)
+    records = list(zip(index.to_pydatetime(), bars['Open'].astype(float), bars['High'].astype(float),
+                       bars['Low'].astype(float), bars['Close'].astype(float), bars['Volume'].astype(float)))
+
+    async with pool.acquire() as conn:
+        if await is_partitioned_async(conn):
+            await ensure_partitions_async(conn, pool, interval, index.min(), index.max())
+        try:
+            return await merge_bars_async(conn, ticker, interval, records)
+        except asyncpg.CheckViolationError:
+            # No partition for some bars, another process dropped one that was remembered as created
+            logging.warning(f"Missing partition for {ticker} with interval {interval}, creating it again")
+            forget_partitions(pool)
+            if not await is_partitioned_async(conn):
+                raise
+            await ensure_partitions_async(conn, pool, interval, index.min(), index.max())
+            return await merge_bars_async(conn, ticker, interval, records)
+
+async def delete_bars_before_async(pool, ticker: str, interval: str, cutoff_date) -> int:
+    """Async postgresql.delete_bars_before, skipped on partitioned tables."""
+    async with pool.acquire() as conn:
+        if await is_partitioned_async(conn):
+            return 0
+        state = await get_ticker_state_async(conn, ticker, interval)
+        if state is None or state.first_bar is None or state.first_bar >= cutoff_date:
+            return 0
+        async with conn.transaction():
+            status = await conn.execute(STATEMENTS['delete_bars_before'], cutoff_date, ticker, interval)
+            deleted = int(status.split()[-1])
+            await conn.execute(STATEMENTS['deleted_ticker_state'], deleted, ticker, interval)
+    return deleted
+
+class AsyncTimeSeriesData:
+    """
+    asyncio variant of TimeSeriesData with the same load and update semantics, backed
+    by an asyncpg pool and an AsyncDataSource. Instances are built with
+    `await AsyncTimeSeriesData.create(...)`; load_all keeps the I/O of many tickers in
+    flight at once. CPU-bound work on the loaded frames should go to an executor, e.g.
+    `await loop.run_in_executor(pool, indicator.calculate, ts.data)`.
+    """
+    ALLOWED_INTERVALS = TimeSeriesData.ALLOWED_INTERVALS
+    data = TimeSeriesData.data
+    version = TimeSeriesData.version
+
+    def __init__(self, ticker: str, interval: str, pool, start: datetime = None, end: datetime = None,
+                 cache: BarCache = None, refresh: RefreshController = None, source: AsyncDataSource = None,
+                 retention: timedelta = None):
+        # Same arguments as TimeSeriesData, use create() to also load the data
+        self.ticker = ticker
+        if interval not in self.ALLOWED_INTERVALS:
+            raise ValueError(f"Interval '{interval}' is not allowed. Allowed values are: {', '.join(self.ALLOWED_INTERVALS)}")
+        self.interval = interval
+        self.period = calc_period(interval)
+        self.retention = retention
+        self.pool = pool
+        self.start = start
+        self.end = end
+        self.refresh = refresh or default_refresh_controller
+        self.source = source or ThreadedSource()
+        # Bounded loads are partial views of the series and are never cached
+        self.cache = cache if start is None and end is None else None
+        self.data = None
+
+    @classmethod
+    async def create(cls, ticker: str, interval: str, pool, **kwargs) -> 'AsyncTimeSeriesData':
+        series = cls(ticker, interval, pool, **kwargs)
+        data = series.cache.get(ticker, interval) if series.cache is not None else None
+        if data is None:
+            data = await series.load_data(series.start, series.end)
+            duplicated = data.duplicated(subset=['Open'], keep='first')
+            if duplicated.any():
+                data = data[~duplicated]
+            if series.cache is not None:
+                series.cache.put(ticker, interval, data)
+        series.data = data
+        return series
+
+    @classmethod
+    async def load_all(cls, tickers: list, interval: str, pool, concurrency: int = 32, update: bool = False,
+                       **kwargs) -> dict:
+        """
+        Create (and optionally update) the series of many tickers with at most
+        concurrency of them doing I/O at a time. Returns ticker -> AsyncTimeSeriesData;
+        tickers that fail are logged and left out.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def load(ticker):
+            async with semaphore:
+                series = await cls.create(ticker, interval, pool, **kwargs)
+                if update:
+                    await series.update_data()
+                return series
+
+        tickers = list(dict.fromkeys(tickers))
+        results = await asyncio.gather(*(load(ticker) for ticker in tickers), return_exceptions=True)
+        loaded = {}
+        for ticker, result in zip(tickers, results):
+            if isinstance(result, Exception):
+                logging.error(f"Failed to load {ticker} with interval {interval}: {result}")
+            else:
+                loaded[ticker] = result
+        return loaded
+
+    async def load_data(self, start: datetime = None, end: datetime = None) -> pd.DataFrame:
+        try:
+            state = await get_ticker_state_async(self.pool, self.ticker, self.interval)
+            bars = await read_bars_async(self.pool, self.ticker, self.interval, start, end) \
+                if state and state.row_count else None
+            if bars is not None and len(bars['date']) > 0:
+                logging.info(f"Loaded data from PostgreSQL for {self.ticker} with interval {self.interval}")
+                return bars_to_frame(bars)
+            logging.info(f"No data found in PostgreSQL for {self.ticker} with interval {self.interval}")
+        except (asyncpg.PostgresError, OSError) as e:
+            logging.error(f"Error loading data from PostgreSQL: {e}")
+        return await self.fetch_new_data()
+
+    async def fetch_new_data(self) -> pd.DataFrame:
+        logging.info(f"Fetching new data for {self.ticker} with interval {self.interval} and period {self.period}")
+        data = await self.source.fetch(self.ticker, self.interval, period=self.period)
+        await self.cache_data(data)
+        await record_fetch_async(self.pool, self.ticker, self.interval)
+        self.refresh.mark_refreshed(self.ticker, self.interval)
+        return data
+
+    async def cache_data(self, data: pd.DataFrame):
+        # Only bars newer than the last stored one are written, the rest already exist
+        state = await get_ticker_state_async(self.pool, self.ticker, self.interval)
+        if state is not None and state.last_bar is not None:
+            data = data[pd.to_datetime(data.index, utc=True) > pd.Timestamp(state.last_bar)]
+        inserted = await copy_bars_async(self.pool, self.ticker, self.interval, data)
+        logging.info(f"Cached {inserted} rows to PostgreSQL for {self.ticker} with interval {self.interval}")
+
+    async def delete_old_data(self, cutoff_date):
+        deleted = await delete_bars_before_async(self.pool, self.ticker, self.interval, cutoff_date)
+        if deleted:
+            logging.debug(f"Deleted {deleted} rows for {self.ticker} with interval {self.interval}")
+
+    async def update_data(self, force: bool = False):
+        # Same freshness policy as TimeSeriesData.update_data, coalescing concurrent refreshes on the loop
+        if not force:
+            state = await get_ticker_state_async(self.pool, self.ticker, self.interval)
+            last_bar = state.last_bar if state and state.last_bar else self.data.index[-1]
+            refreshed_at = state.last_fetch_at if state else None
+            if self.refresh.is_fresh(self.ticker, self.interval, last_bar=last_bar, refreshed_at=refreshed_at):
+                logging.debug(f"Data for {self.ticker} with interval {self.interval} is fresh, skipping update")
+                return
+        self.data = await self.refresh.run_async(self.ticker, self.interval, self._refresh_data)
+
+        if self.cache is not None:
+            self.cache.put(self.ticker, self.interval, self.data)
+
+    async def _refresh_data(self) -> pd.DataFrame:
+        data = self.data
+        last_date = pd.to_datetime(data.index[-1])
+        cutoff_date = self.calculate_cutoff_date()
+        await self.delete_old_data(cutoff_date)
+
+        if last_date < cutoff_date:
+            logging.debug("Last data point is before cutoff date. Fetching new data for the entire period.")
+            data = (await self.fetch_new_data()).drop_duplicates(subset=['Open'], keep='first')
+        else:
+            new_data = await self.source.fetch(self.ticker, self.interval, start=last_date)
+            await record_fetch_async(self.pool, self.ticker, self.interval)
+            if not new_data.empty and (new_data.index[-1] - last_date) >= timedelta(hours=1):
+                logging.debug("Last data point is after cutoff date. Fetching incremental data.")
+                data = pd.concat([data, new_data]).drop_duplicates(subset=['Open'], keep='first')
+                data.index = pd.to_datetime(data.index, utc=True)
+                await self.cache_data(new_data)
+        return data
+
+    def calculate_cutoff_date(self) -> datetime:
+        if self.retention is not None:
+            return datetime.now(timezone.utc) - self.retention
+        return calculate_cutoff_date(self.period)
@@ -0,0 +1,147 @@
+import argparse
+import logging
+from datetime import datetime, timedelta, timezone
+import pandas as pd
+from tradingcore.data.calendar import INTERVAL_MINUTES
+from tradingcore.data.sources import BatchedFetcher
+from tradingcore.data.storage import BarStore
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Interval -> (longest range of one request, how far back Yahoo Finance serves the interval)
+PROVIDER_LIMITS = {
+    '1m': (timedelta(days=7), timedelta(days=30)),
+    '2m': (timedelta(days=59), timedelta(days=60)),
+    '5m': (timedelta(days=59), timedelta(days=60)),
+    '15m': (timedelta(days=59), timedelta(days=60)),
+    '30m': (timedelta(days=59), timedelta(days=60)),
+    '90m': (timedelta(days=59), timedelta(days=60)),
+    '60m': (timedelta(days=365), timedelta(days=730)),
+    '1h': (timedelta(days=365), timedelta(days=730)),
+    '1d': (timedelta(days=3650), None),
+}
+
+def bar_length(interval: str) -> timedelta:
+    return timedelta(minutes=INTERVAL_MINUTES[interval]) if interval in INTERVAL_MINUTES else timedelta(days=1)
+
+def plan_windows(start: datetime, end: datetime, window: timedelta) -> list:
+    # Consecutive [start, end) request windows covering the range
+    windows = []
+    while start < end:
+        windows.append((start, min(start + window, end)))
+        start += window
+    return windows
+
+class Backfill:
+    """
+    Fill the stored history of many tickers for one interval between start and end.
+
+    The range is split into windows the provider accepts in one request. Windows are
+    processed oldest first, and every window is fetched for all the tickers that still
+    need it through a BatchedFetcher, i.e. in concurrent, rate limited batches, then
+    bulk written. Each ticker resumes from its stored high-water mark (ticker_state
+    last_bar), so an interrupted backfill continues where it stopped. Stores that accept
+    bars older than the stored ones (the row layout) also get the range before their
+    first stored bar, when it is longer than a bar.
+
+    Series kept longer than the refresh period need TimeSeriesData(retention=...) so
+    that update_data does not delete the backfilled history, and the same retention for
+    the partition retention job (python -m tradingcore.data.partitions retention --retention 1m=365d).
+    """
+
+    def __init__(self, storage: BarStore, fetcher: BatchedFetcher = None, limits: dict = None):
+        self.storage = storage
+        self.fetcher = fetcher or BatchedFetcher()
+        self.limits = limits or PROVIDER_LIMITS
+
+    def resume_ranges(self, ticker: str, interval: str, start: datetime) -> list:
+        """[from, to) ranges that still have to be fetched for ticker, to None being the end of the backfill."""
+        state = self.storage.get_ticker_state(ticker, interval)
+        if state is None or state.last_bar is None:
+            return [(start, None)]
+        ranges = []
+        # The first stored bar is rarely at start (clamped start, market hours), only a gap
+        # of more than a bar before it is fetched again
+        if not self.storage.append_only and state.first_bar - start > bar_length(interval):
+            ranges.append((start, state.first_bar))
+        ranges.append((max(start, state.last_bar), None))
+        return ranges
+
+    def run(self, tickers: list, interval: str, start: datetime, end: datetime = None, now: datetime = None) -> dict:
+        """Backfill tickers and return ticker -> number of stored bars."""
+        window, history = self.limits[interval]
+        now = now or datetime.now(timezone.utc)
+        end = min(end or now, now)
+        if history is not None and start < now - history:
+            # Keep an hour of margin so the first window is not rejected by the provider
+            logging.warning(f"Yahoo Finance only serves {history.days} days of {interval} bars, starting at {now - history}")
+            start = now - history + timedelta(hours=1)
+
+        tickers = list(dict.fromkeys(tickers))
+        resume = {ticker: self.resume_ranges(ticker, interval, start) for ticker in tickers}
+        windows = plan_windows(start, end, window)
+        written = dict.fromkeys(tickers, 0)
+        for i, (window_start, window_end) in enumerate(windows, 1):
+            pending = [ticker for ticker in tickers
+                       if any(begin < window_end and (until is None or window_start < until) for begin, until in resume[ticker])]
+            if not pending:
+                continue
+            fetched = self.fetcher.fetch_many(pending, interval, start=window_start, end=window_end)
+            for ticker, data in fetched.items():
+                if data is not None and not data.empty:
+                    written[ticker] += self.storage.write_bars(ticker, interval, data)
+            # A failed window would leave a gap, those tickers resume from their high-water mark on the next run
+            failed = [ticker for ticker in pending if ticker not in fetched]
+            if failed:
+                logging.error(f"Stopping the backfill of {len(failed)} tickers ({failed[0]}...) after a failed window")
+                tickers = [ticker for ticker in tickers if ticker not in failed]
+            logging.info(f"Backfill window {i}/{len(windows)} ({window_start:%Y-%m-%d} - {window_end:%Y-%m-%d}): "
+                         f"{len(fetched)}/{len(pending)} tickers, {sum(written.values())} bars stored so far")
+        return written
+
+def open_storage(args) -> BarStore:
+    # Storage selected on the command line, same layouts as the indicator worker
+    if args.storage == 'files':
+        from tradingcore.data.filestore import FileBarStore
+        return FileBarStore(args.path)
+    from tradingcore.data.postgresql import connect_db
+    conn = connect_db(args.host, args.user, args.password, args.database)
+    if args.storage == 'chunks':
+        from tradingcore.data.chunks import ChunkedBarStore
+        return ChunkedBarStore(conn)
+    from tradingcore.data.storage import PostgresBarStore
+    return PostgresBarStore(conn)
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill the stored history of many tickers")
+    parser.add_argument('tickers', nargs='*', help="Tickers to backfill")
+    parser.add_argument('--sp500', action='store_true', help="Backfill every S&P 500 ticker")
+    parser.add_argument('--interval', default='1m')
+    parser.add_argument('--start', required=True, help="First date, e.g. 2025-01-01")
+    parser.add_argument('--end', help="Last date, now by default")
+    parser.add_argument('--storage', choices=['rows', 'chunks', 'files'], default='rows')
+    parser.add_argument('--path', default='/data/bars', help="Root directory of the files storage")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--user', default='postgres')
+    parser.add_argument('--password', default='postgres')
+    parser.add_argument('--database', default='postgres')
+    parser.add_argument('--workers', type=int, default=4, help="Concurrent provider requests")
+    parser.add_argument('--batch-size', type=int, default=50, help="Tickers per provider request")
+    parser.add_argument('--rate', type=float, default=2.0, help="Provider requests per second")
+    args = parser.parse_args()
+
+    tickers = list(args.tickers)
+    if args.sp500:
+        from tradingcore.utils.sp500_tickers import get_sp500_tickers
+        tickers += get_sp500_tickers()
+    if not tickers:
+        parser.error("No tickers given")
+
+    backfill = Backfill(open_storage(args),
+                        BatchedFetcher(batch_size=args.batch_size, max_workers=args.workers, rate=args.rate))
+    written = backfill.run(tickers, args.interval, pd.Timestamp(args.start, tz='UTC').to_pydatetime(),
+                           pd.Timestamp(args.end, tz='UTC').to_pydatetime() if args.end else None)
+    logging.info(f"Backfilled {sum(written.values())} bars for {len(tickers)} tickers with interval {args.interval}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import threading
+import time
+import logging
+from collections import OrderedDict
+import pandas as pd
+from tradingcore.utils.data_version import restamp, stamp
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+class BarCache:
+    """
+    Process-local cache of loaded bars keyed by (ticker, interval).
+
+    Entries expire after ttl seconds and the least recently used ones are evicted
+    once the cached frames exceed max_bytes. Safe to share between threads. Frames keep
+    their data_version revision through the cache, so every TimeSeriesData built from the
+    same cached bars has the same version.
+    """
+
+    def __init__(self, ttl: float = 300.0, max_bytes: int = 256 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size_bytes = 0
+        self._entries = OrderedDict()  # (ticker, interval) -> (data, nbytes, stored_at, revision)
+        self._lock = threading.Lock()
+
+    def get(self, ticker: str, interval: str):
+        # Returns a shallow copy so callers adding columns don't alter the cached frame
+        key = (ticker, interval)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[2] > self.ttl:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            data = entry[0].copy(deep=False)
+        restamp(data, entry[3])
+        return data
+
+    def put(self, ticker: str, interval: str, data: pd.DataFrame):
+        key = (ticker, interval)
+        nbytes = int(data.memory_usage(index=True).sum())
+        revision = stamp(data)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if nbytes > self.max_bytes:
+                logging.debug(f"Not caching {ticker} {interval}: {nbytes} bytes exceed the cache budget")
+                return
+            self._entries[key] = (data.copy(deep=False), nbytes, time.monotonic(), revision)
+            self.size_bytes += nbytes
+            # Evict least recently used entries until the budget is met
+            while self.size_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, ticker: str, interval: str):
+        with self._lock:
+            if (ticker, interval) in self._entries:
+                self._remove((ticker, interval))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'size_bytes': self.size_bytes, 'hits': self.hits,
+                    'misses': self.misses, 'evictions': self.evictions}
+
+    def _remove(self, key):
+        _, nbytes, _, _ = self._entries.pop(key)
+        self.size_bytes -= nbytes
@@ -0,0 +1,99 @@
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+INTERVAL_MINUTES = {'1m': 1, '2m': 2, '5m': 5, '15m': 15, '30m': 30, '60m': 60, '90m': 90, '1h': 60}
+
+NYSE_HOLIDAYS = {
+    date(2024, 1, 1), date(2024, 1, 15), date(2024, 2, 19), date(2024, 3, 29), date(2024, 5, 27),
+    date(2024, 6, 19), date(2024, 7, 4), date(2024, 9, 2), date(2024, 11, 28), date(2024, 12, 25),
+    date(2025, 1, 1), date(2025, 1, 9), date(2025, 1, 20), date(2025, 2, 17), date(2025, 4, 18),
+    date(2025, 5, 26), date(2025, 6, 19), date(2025, 7, 4), date(2025, 9, 1), date(2025, 11, 27),
+    date(2025, 12, 25),
+    date(2026, 1, 1), date(2026, 1, 19), date(2026, 2, 16), date(2026, 4, 3), date(2026, 5, 25),
+    date(2026, 6, 19), date(2026, 7, 3), date(2026, 9, 7), date(2026, 11, 26), date(2026, 12, 25),
+    date(2027, 1, 1), date(2027, 1, 18), date(2027, 2, 15), date(2027, 3, 26), date(2027, 5, 31),
+    date(2027, 6, 18), date(2027, 7, 5), date(2027, 9, 6), date(2027, 11, 25), date(2027, 12, 24),
+}
+NYSE_EARLY_CLOSES = {
+    date(2024, 7, 3): time(13, 0), date(2024, 11, 29): time(13, 0), date(2024, 12, 24): time(13, 0),
+    date(2025, 7, 3): time(13, 0), date(2025, 11, 28): time(13, 0), date(2025, 12, 24): time(13, 0),
+    date(2026, 11, 27): time(13, 0), date(2026, 12, 24): time(13, 0),
+    date(2027, 11, 26): time(13, 0),
+}
+BME_HOLIDAYS = {
+    date(2024, 1, 1), date(2024, 3, 29), date(2024, 4, 1), date(2024, 5, 1), date(2024, 12, 24),
+    date(2024, 12, 25), date(2024, 12, 26), date(2024, 12, 31),
+    date(2025, 1, 1), date(2025, 4, 18), date(2025, 4, 21), date(2025, 5, 1), date(2025, 12, 24),
+    date(2025, 12, 25), date(2025, 12, 26), date(2025, 12, 31),
+    date(2026, 1, 1), date(2026, 4, 3), date(2026, 4, 6), date(2026, 5, 1), date(2026, 12, 24),
+    date(2026, 12, 25), date(2026, 12, 31),
+    date(2027, 1, 1), date(2027, 3, 26), date(2027, 3, 29), date(2027, 12, 24), date(2027, 12, 31),
+}
+
+class TradingCalendar:
+    """
+    Sessions and holidays of one exchange, used to know when the next bar can exist.
+
+    Session times are local to the exchange timezone. Holidays and early closes are
+    plain tables so they can be extended or replaced without code changes.
+    """
+
+    def __init__(self, timezone: str, open_time: time, close_time: time, holidays=(), early_closes: dict = None,
+                 weekend=(5, 6)):
+        self.tz = ZoneInfo(timezone)
+        self.open_time = open_time
+        self.close_time = close_time
+        self.holidays = set(holidays)
+        self.early_closes = dict(early_closes or {})
+        self.weekend = set(weekend)
+
+    def is_trading_day(self, day: date) -> bool:
+        return day.weekday() not in self.weekend and day not in self.holidays
+
+    def next_trading_day(self, day: date) -> date:
+        # First trading day strictly after day
+        day += timedelta(days=1)
+        while not self.is_trading_day(day):
+            day += timedelta(days=1)
+        return day
+
+    def session(self, day: date) -> tuple:
+        # (open, close) datetimes of the session on day, in the exchange timezone
+        close_time = self.early_closes.get(day, self.close_time)
+        return (datetime.combine(day, self.open_time, tzinfo=self.tz),
+                datetime.combine(day, close_time, tzinfo=self.tz))
+
+    def next_bar_time(self, last_bar: datetime, interval: str) -> datetime:
+        """
+        Earliest time a bar after last_bar can be published. Intraday bars are labelled
+        with their start time and daily bars with the session date, as Yahoo Finance does.
+        """
+        last_bar = last_bar.astimezone(self.tz)
+        if interval == '1d':
+            return self.session(self.next_trading_day(last_bar.date()))[0]
+
+        candidate = last_bar + timedelta(minutes=INTERVAL_MINUTES[interval])
+        day = candidate.date()
+        if self.is_trading_day(day):
+            session_open, session_close = self.session(day)
+            if candidate < session_open:
+                return session_open
+            if candidate < session_close:
+                return candidate
+        return self.session(self.next_trading_day(day))[0]
+
+NYSE = TradingCalendar('America/New_York', time(9, 30), time(16, 0), NYSE_HOLIDAYS, NYSE_EARLY_CLOSES)
+BME = TradingCalendar('Europe/Madrid', time(9, 0), time(17, 30), BME_HOLIDAYS)
+
+# Ticker suffix -> calendar. None means the market trades around the clock (crypto, FX, futures)
+DEFAULT_CALENDARS = {'.MC': BME, '-USD': None, '=X': None, '=F': None}
+
+def calendar_for(ticker: str, calendars: dict = DEFAULT_CALENDARS, default: TradingCalendar = NYSE):
+    """Return the calendar of ticker's exchange, or None when it is unknown or always open."""
+    for suffix, calendar in calendars.items():
+        if ticker.endswith(suffix):
+            return calendar
+    # Other Yahoo exchange suffixes have no local tables, so they are never skipped
+    if '.' in ticker:
+        return None
+    return default
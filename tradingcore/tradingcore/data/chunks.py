@@ -0,0 +1,287 @@
+import zlib
+import logging
+import numpy as np
+import pandas as pd
+from tradingcore.data.postgresql import get_ticker_state, record_fetch, run_with
+from tradingcore.data.storage import BarStore, to_epoch_us
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Column name -> little-endian dtype of the decoded array. Dates are microseconds since the Unix epoch
+CHUNK_COLUMNS = {'date': '<i8', 'open': '<f8', 'high': '<f8', 'low': '<f8', 'close': '<f8', 'volume': '<i8'}
+COMPRESSION_LEVEL = 6
+
+def encode_column(values: np.ndarray, delta: bool = False) -> bytes:
+    """
+    Compress one column of a chunk. Values are optionally delta encoded (dates) and
+    byte-shuffled, grouping the i-th byte of every value together, before zlib so
+    that the slowly changing high bytes of prices and timestamps compress well.
+    """
+    if delta:
+        values = np.diff(values, prepend=0)
+    raw = np.ascontiguousarray(values).view(np.uint8).reshape(-1, values.itemsize)
+    return zlib.compress(raw.T.tobytes(), COMPRESSION_LEVEL)
+
+def decode_column(payload, dtype: str, count: int, delta: bool = False) -> np.ndarray:
+    dtype = np.dtype(dtype)
+    raw = np.frombuffer(zlib.decompress(payload), np.uint8).reshape(dtype.itemsize, count)
+    values = np.ascontiguousarray(raw.T).view(dtype).ravel()
+    return np.cumsum(values) if delta else values
+
+def encode_chunk(bars: dict) -> list:
+    return [encode_column(np.asarray(bars[name], dtype), delta=name == 'date') for name, dtype in CHUNK_COLUMNS.items()]
+
+def decode_chunk(count: int, payloads) -> dict:
+    return {name: decode_column(payload, dtype, count, delta=name == 'date')
+            for (name, dtype), payload in zip(CHUNK_COLUMNS.items(), payloads)}
+
+def chunk_periods(dates: np.ndarray, interval: str) -> np.ndarray:
+    # Intraday bars are chunked per UTC day; a daily chunk would hold a single bar, so daily bars go per month
+    unit = 'M' if interval == '1d' else 'D'
+    return dates.astype('datetime64[us]').astype(f'datetime64[{unit}]').astype('datetime64[D]')
+
+def concat_bars(parts: list) -> dict:
+    if not parts:
+        return {name: np.empty(0, dtype) for name, dtype in CHUNK_COLUMNS.items()}
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+def select_bars(bars: dict, mask: np.ndarray) -> dict:
+    return {name: values[mask] for name, values in bars.items()}
+
+def as_read_result(bars: dict) -> dict:
+    # Same layout as postgresql.read_bars
+    result = dict(bars)
+    result['date'] = bars['date'].view('datetime64[us]')
+    return result
+
+class ChunkedBarStore(BarStore):
+    """
+    Bars packed into compressed columnar chunks, one row per (ticker, interval, period)
+    in DataTimeSeries_chunks where the period is a UTC day (a month for daily bars).
+
+    Each column is stored as a byte-shuffled zlib array, with dates delta encoded, so a
+    day of 1m bars takes a few KB instead of ~400 table rows. Reads fetch whole chunks
+    pruned by their first/last bar and decode them into the read_bars layout. Writes
+    only append bars newer than the last stored one; the open chunk of the period being
+    appended to is re-encoded. ticker_state is shared with the row layout, so a database
+    should use one layout or the other.
+    """
+    append_only = True
+
+    def __init__(self, conn):
+        # conn is a connection or a ConnectionPool
+        self.conn = conn
+        run_with(conn, self._create_table)
+
+    @staticmethod
+    def _create_table(conn):
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS DataTimeSeries_chunks (
+                ticker TEXT NOT NULL,
+                interval TEXT NOT NULL,
+                period_start DATE NOT NULL,
+                first_bar TIMESTAMPTZ NOT NULL,
+                last_bar TIMESTAMPTZ NOT NULL,
+                bar_count INT NOT NULL,
+                date BYTEA NOT NULL,
+                open BYTEA NOT NULL,
+                high BYTEA NOT NULL,
+                low BYTEA NOT NULL,
+                close BYTEA NOT NULL,
+                volume BYTEA NOT NULL,
+                PRIMARY KEY (ticker, interval, period_start)
+            )
+        """)
+        # The chunks are already compressed, keep TOAST from trying again
+        for column in CHUNK_COLUMNS:
+            cursor.execute(f"ALTER TABLE DataTimeSeries_chunks ALTER COLUMN {column} SET STORAGE EXTERNAL")
+        conn.commit()
+        cursor.close()
+
+    def _read(self, where: str, params: list, start=None, end=None, ticker_position: str = None) -> list:
+        return run_with(self.conn, self._read_chunks, where, params, start, end, ticker_position)
+
+    @staticmethod
+    def _read_chunks(conn, where: str, params: list, start=None, end=None, ticker_position: str = None) -> list:
+        # Return (position, bars) for every chunk overlapping [start, end]
+        params = list(params)
+        if start is not None:
+            where += " AND last_bar >= %s"
+            params.append(start)
+        if end is not None:
+            where += " AND first_bar <= %s"
+            params.append(end)
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"""
+                SELECT {ticker_position or '0'}, bar_count, {', '.join(CHUNK_COLUMNS)}
+                FROM DataTimeSeries_chunks
+                WHERE {where}
+                ORDER BY first_bar ASC
+            """, params)
+            rows = cursor.fetchall()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+        return [(row[0], decode_chunk(row[1], row[2:])) for row in rows]
+
+    @staticmethod
+    def _bound(bars: dict, start=None, end=None) -> dict:
+        # Chunks are pruned by period, trim the bars at the edges to the exact range
+        mask = np.ones(len(bars['date']), dtype=bool)
+        if start is not None:
+            mask &= bars['date'] >= to_epoch_us(start)
+        if end is not None:
+            mask &= bars['date'] <= to_epoch_us(end)
+        return bars if mask.all() else select_bars(bars, mask)
+
+    def read_bars(self, ticker: str, interval: str, start=None, end=None) -> dict:
+        chunks = self._read("ticker = %s AND interval = %s", [ticker, interval], start, end)
+        return as_read_result(self._bound(concat_bars([bars for _, bars in chunks]), start, end))
+
+    def read_bars_many(self, tickers: list, interval: str, start=None, end=None) -> dict:
+        chunks = self._read("ticker = ANY(%s) AND interval = %s", [list(tickers), list(tickers), interval], start, end,
+                            ticker_position="array_position(%s::text[], ticker) - 1")
+        bars = concat_bars([bars for _, bars in chunks])
+        bars['ticker'] = np.concatenate([np.full(len(chunk['date']), position, np.int32) for position, chunk in chunks]) \
+            if chunks else np.empty(0, np.int32)
+        bars = self._bound(bars, start, end)
+        # Same ordering as postgresql.read_bars_many
+        return as_read_result(select_bars(bars, np.argsort(bars['date'], kind='stable')))
+
+    def write_bars(self, ticker: str, interval: str, data: pd.DataFrame) -> int:
+        """
+        Append the bars of data newer than the last stored bar. Returns the number of bars written.
+        """
+        bars = data[['Open', 'High', 'Low', 'Close', 'Volume']].dropna()
+        if bars.empty:
+            return 0
+        dates = pd.DatetimeIndex(pd.to_datetime(bars.index, utc=True)).as_unit('us').asi8
+        dates, first = np.unique(dates, return_index=True)
+        new = {'date': dates, 'open': bars['Open'].to_numpy()[first], 'high': bars['High'].to_numpy()[first],
+               'low': bars['Low'].to_numpy()[first], 'close': bars['Close'].to_numpy()[first],
+               'volume': bars['Volume'].to_numpy()[first].astype(np.int64)}
+        return run_with(self.conn, self._append, ticker, interval, new)
+
+    @staticmethod
+    def _append(conn, ticker: str, interval: str, new: dict) -> int:
+        cursor = conn.cursor()
+        try:
+            # Lock the series so concurrent writers append one after the other
+            cursor.execute("""
+                INSERT INTO ticker_state (ticker, interval) VALUES (%s, %s)
+                ON CONFLICT (ticker, interval) DO NOTHING
+            """, (ticker, interval))
+            cursor.execute("""
+                SELECT last_bar FROM ticker_state WHERE ticker = %s AND interval = %s FOR UPDATE
+            """, (ticker, interval))
+            last_bar = cursor.fetchone()[0]
+            if last_bar is not None:
+                new = select_bars(new, new['date'] > to_epoch_us(last_bar))
+            if len(new['date']) == 0:
+                conn.commit()
+                return 0
+
+            periods = chunk_periods(new['date'], interval)
+            for period in np.unique(periods):
+                part = select_bars(new, periods == period)
+                cursor.execute(f"""
+                    SELECT bar_count, {', '.join(CHUNK_COLUMNS)}
+                    FROM DataTimeSeries_chunks
+                    WHERE ticker = %s AND interval = %s AND period_start = %s
+                """, (ticker, interval, period.item()))
+                existing = cursor.fetchone()
+                if existing is not None:
+                    part = concat_bars([decode_chunk(existing[0], existing[1:]), part])
+                cursor.execute(f"""
+                    INSERT INTO DataTimeSeries_chunks (ticker, interval, period_start, first_bar, last_bar, bar_count,
+                                                       {', '.join(CHUNK_COLUMNS)})
+                    VALUES (%s, %s, %s, %s, %s, %s, {', '.join(['%s'] * len(CHUNK_COLUMNS))})
+                    ON CONFLICT (ticker, interval, period_start) DO UPDATE SET
+                        first_bar = EXCLUDED.first_bar, last_bar = EXCLUDED.last_bar, bar_count = EXCLUDED.bar_count,
+                        {', '.join(f'{column} = EXCLUDED.{column}' for column in CHUNK_COLUMNS)}
+                """, [ticker, interval, period.item(),
+                      pd.Timestamp(part['date'][0], unit='us', tz='UTC'),
+                      pd.Timestamp(part['date'][-1], unit='us', tz='UTC'),
+                      len(part['date'])] + encode_chunk(part))
+
+            written = len(new['date'])
+            cursor.execute("""
+                UPDATE ticker_state SET
+                    first_bar = LEAST(first_bar, %s),
+                    last_bar = GREATEST(last_bar, %s),
+                    row_count = row_count + %s
+                WHERE ticker = %s AND interval = %s
+            """, (pd.Timestamp(new['date'][0], unit='us', tz='UTC'), pd.Timestamp(new['date'][-1], unit='us', tz='UTC'),
+                  written, ticker, interval))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+        return written
+
+    def get_ticker_state(self, ticker: str, interval: str):
+        return run_with(self.conn, get_ticker_state, ticker, interval)
+
+    def record_fetch(self, ticker: str, interval: str):
+        run_with(self.conn, record_fetch, ticker, interval)
+
+    def delete_bars_before(self, ticker: str, interval: str, cutoff_date) -> int:
+        """
+        Drop the chunks entirely older than cutoff_date and trim the chunk that straddles it.
+        Returns the number of deleted bars.
+        """
+        state = self.get_ticker_state(ticker, interval)
+        if state is None or state.first_bar is None or state.first_bar >= cutoff_date:
+            return 0
+        deleted = run_with(self.conn, self._delete, ticker, interval, cutoff_date)
+        logging.debug(f"Deleted {deleted} bars from the chunks of {ticker} with interval {interval}")
+        return deleted
+
+    @staticmethod
+    def _delete(conn, ticker: str, interval: str, cutoff_date) -> int:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                DELETE FROM DataTimeSeries_chunks
+                WHERE ticker = %s AND interval = %s AND last_bar < %s
+                RETURNING bar_count
+            """, (ticker, interval, cutoff_date))
+            deleted = sum(count for (count,) in cursor.fetchall())
+
+            cursor.execute(f"""
+                SELECT period_start, bar_count, {', '.join(CHUNK_COLUMNS)}
+                FROM DataTimeSeries_chunks
+                WHERE ticker = %s AND interval = %s AND first_bar < %s
+                FOR UPDATE
+            """, (ticker, interval, cutoff_date))
+            for period_start, count, *payloads in cursor.fetchall():
+                bars = decode_chunk(count, payloads)
+                bars = select_bars(bars, bars['date'] >= to_epoch_us(cutoff_date))
+                deleted += count - len(bars['date'])
+                cursor.execute(f"""
+                    UPDATE DataTimeSeries_chunks SET first_bar = %s, bar_count = %s,
+                        {', '.join(f'{column} = %s' for column in CHUNK_COLUMNS)}
+                    WHERE ticker = %s AND interval = %s AND period_start = %s
+                """, [pd.Timestamp(bars['date'][0], unit='us', tz='UTC'), len(bars['date'])] + encode_chunk(bars)
+                     + [ticker, interval, period_start])
+
+            cursor.execute("""
+                UPDATE ticker_state SET
+                    row_count = GREATEST(row_count - %s, 0),
+                    first_bar = (SELECT min(first_bar) FROM DataTimeSeries_chunks WHERE ticker = %s AND interval = %s),
+                    last_bar = CASE WHEN row_count - %s > 0 THEN last_bar END
+                WHERE ticker = %s AND interval = %s
+            """, (deleted, ticker, interval, deleted, ticker, interval))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+        return deleted
@@ -0,0 +1,198 @@
+import os
+import json
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from urllib.parse import quote
+import numpy as np
+import pandas as pd
+from tradingcore.data.postgresql import TickerState
+from tradingcore.data.storage import BarStore, to_epoch_us
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Column name -> dtype of its file. Dates are microseconds since the Unix epoch (UTC)
+FILE_COLUMNS = {'date': np.dtype('<i8'), 'open': np.dtype('<f8'), 'high': np.dtype('<f8'), 'low': np.dtype('<f8'),
+                'close': np.dtype('<f8'), 'volume': np.dtype('<i8')}
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+def from_epoch_us(value) -> datetime:
+    return EPOCH + timedelta(microseconds=int(value))
+
+class FileBarStore(BarStore):
+    """
+    Bars kept in local files, one directory per (ticker, interval) holding one raw
+    little-endian NumPy file per column and a meta.json with the committed bar count.
+
+    Reads memory-map the column files read-only, so loads are zero-copy and every
+    process reading the same series shares the OS page cache. Writes append bars newer
+    than the last stored one under a file lock and publish them by replacing meta.json,
+    so readers never see a partially written bar. Retention rewrites the columns into
+    a new generation of files and switches meta.json to it; mappings of the previous
+    generation held by readers stay valid.
+    """
+    append_only = True
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, ticker: str, interval: str, name: str = '') -> str:
+        return os.path.join(self.root, interval, quote(ticker, safe=''), name)
+
+    def _meta(self, ticker: str, interval: str) -> dict:
+        try:
+            with open(self._path(ticker, interval, 'meta.json')) as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {'generation': 0, 'count': 0, 'last_fetch_at': None}
+
+    def _write_meta(self, ticker: str, interval: str, meta: dict):
+        path = self._path(ticker, interval, 'meta.json')
+        with open(path + '.tmp', 'w') as file:
+            json.dump(meta, file)
+        os.replace(path + '.tmp', path)
+
+    def _column_path(self, ticker: str, interval: str, column: str, generation: int) -> str:
+        return self._path(ticker, interval, f"{column}.{generation}")
+
+    @contextmanager
+    def _lock(self, ticker: str, interval: str):
+        # Serialises writers of one series across threads and processes
+        os.makedirs(self._path(ticker, interval), exist_ok=True)
+        with open(self._path(ticker, interval, 'lock'), 'a+b') as file:
+            if fcntl is not None:
+                fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+            else:
+                msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+                else:
+                    file.seek(0)
+                    msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _map(self, ticker: str, interval: str) -> dict:
+        # Read-only memory maps of the committed bars
+        for _ in range(3):
+            meta = self._meta(ticker, interval)
+            if meta['count'] == 0:
+                return {name: np.empty(0, dtype) for name, dtype in FILE_COLUMNS.items()}
+            try:
+                return {name: np.memmap(self._column_path(ticker, interval, name, meta['generation']), dtype=dtype,
+                                        mode='r', shape=(meta['count'],))
+                        for name, dtype in FILE_COLUMNS.items()}
+            except FileNotFoundError:
+                # Retention switched to a new generation in between, read meta.json again
+                continue
+        raise RuntimeError(f"Could not map the bars of {ticker} with interval {interval}")
+
+    def read_bars(self, ticker: str, interval: str, start=None, end=None) -> dict:
+        """
+        Same layout as postgresql.read_bars. The arrays are read-only views of the
+        mapped files, except date which is viewed as datetime64[us].
+        """
+        bars = self._map(ticker, interval)
+        # Dates are sorted, so the range is a slice of the mapped columns
+        first = np.searchsorted(bars['date'], to_epoch_us(start), 'left') if start is not None else 0
+        last = np.searchsorted(bars['date'], to_epoch_us(end), 'right') if end is not None else len(bars['date'])
+        bars = {name: values[first:last] for name, values in bars.items()}
+        bars['date'] = bars['date'].view('datetime64[us]')
+        return bars
+
+    def read_bars_many(self, tickers: list, interval: str, start=None, end=None) -> dict:
+        parts = [self.read_bars(ticker, interval, start, end) for ticker in tickers]
+        bars = {name: np.concatenate([part[name] for part in parts]) if parts else np.empty(0, dtype)
+                for name, dtype in FILE_COLUMNS.items()}
+        bars['date'] = bars['date'].astype('datetime64[us]')
+        bars['ticker'] = np.repeat(np.arange(len(parts), dtype=np.int32), [len(part['date']) for part in parts])
+        # Same ordering as postgresql.read_bars_many
+        order = np.argsort(bars['date'], kind='stable')
+        return {name: values[order] for name, values in bars.items()}
+
+    def write_bars(self, ticker: str, interval: str, data: pd.DataFrame) -> int:
+        """
+        Append the bars of data newer than the last stored bar. Returns the number of bars written.
+        """
+        bars = data[['Open', 'High', 'Low', 'Close', 'Volume']].dropna()
+        if bars.empty:
+            return 0
+        dates = pd.DatetimeIndex(pd.to_datetime(bars.index, utc=True)).as_unit('us').asi8
+        dates, first = np.unique(dates, return_index=True)
+        new = {'date': dates, 'open': bars['Open'].to_numpy()[first], 'high': bars['High'].to_numpy()[first],
+               'low': bars['Low'].to_numpy()[first], 'close': bars['Close'].to_numpy()[first],
+               'volume': bars['Volume'].to_numpy()[first]}
+
+        with self._lock(ticker, interval):
+            meta = self._meta(ticker, interval)
+            if meta['count']:
+                last_bar = self._map(ticker, interval)['date'][-1]
+                keep = new['date'] > last_bar
+                new = {name: values[keep] for name, values in new.items()}
+            written = len(new['date'])
+            if written == 0:
+                return 0
+
+            for name, dtype in FILE_COLUMNS.items():
+                with open(self._column_path(ticker, interval, name, meta['generation']), 'ab') as file:
+                    # Drop whatever an interrupted write left after the committed bars
+                    file.truncate(meta['count'] * dtype.itemsize)
+                    file.write(np.ascontiguousarray(new[name], dtype).tobytes())
+            meta['count'] += written
+            self._write_meta(ticker, interval, meta)
+        return written
+
+    def get_ticker_state(self, ticker: str, interval: str):
+        meta = self._meta(ticker, interval)
+        if meta['count'] == 0 and meta['last_fetch_at'] is None:
+            return None
+        dates = self._map(ticker, interval)['date']
+        return TickerState(ticker, interval,
+                           from_epoch_us(dates[0]) if len(dates) else None,
+                           from_epoch_us(dates[-1]) if len(dates) else None,
+                           len(dates),
+                           datetime.fromisoformat(meta['last_fetch_at']) if meta['last_fetch_at'] else None)
+
+    def record_fetch(self, ticker: str, interval: str):
+        with self._lock(ticker, interval):
+            meta = self._meta(ticker, interval)
+            meta['last_fetch_at'] = datetime.now(timezone.utc).isoformat()
+            self._write_meta(ticker, interval, meta)
+
+    def delete_bars_before(self, ticker: str, interval: str, cutoff_date) -> int:
+        """
+        Rewrite the series without the bars older than cutoff_date. Returns the number of deleted bars.
+        """
+        with self._lock(ticker, interval):
+            meta = self._meta(ticker, interval)
+            bars = self._map(ticker, interval)
+            first = int(np.searchsorted(bars['date'], to_epoch_us(cutoff_date), 'left'))
+            if first == 0:
+                return 0
+
+            generation = meta['generation'] + 1
+            for name, values in bars.items():
+                with open(self._column_path(ticker, interval, name, generation), 'wb') as file:
+                    file.write(values[first:].tobytes())
+            del bars
+            old_generation = meta['generation']
+            meta.update(generation=generation, count=meta['count'] - first)
+            self._write_meta(ticker, interval, meta)
+
+            for name in FILE_COLUMNS:
+                try:
+                    os.remove(self._column_path(ticker, interval, name, old_generation))
+                except OSError:
+                    # Still mapped by a reader on Windows, it is left behind
+                    pass
+        logging.debug(f"Deleted {first} bars from the files of {ticker} with interval {interval}")
+        return first
@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import logging
+from datetime import datetime, timedelta, timezone
+from tradingcore.data.calendar import calendar_for as default_calendar_for
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# No new bar can appear sooner than one bar length after the last refresh.
+# A stored daily bar is not updated during its session, so daily bars are fetched
+# again once the next session opens, or a day later when the market has no calendar.
+MIN_REFRESH_INTERVALS = {
+    '1m': timedelta(minutes=1),
+    '2m': timedelta(minutes=2),
+    '5m': timedelta(minutes=5),
+    '15m': timedelta(minutes=15),
+    '30m': timedelta(minutes=30),
+    '60m': timedelta(hours=1),
+    '90m': timedelta(minutes=90),
+    '1h': timedelta(hours=1),
+    '1d': timedelta(days=1),
+}
+
+class _Flight:
+    # A refresh in progress that other callers can wait on
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class RefreshController:
+    """
+    Freshness policy for TimeSeriesData.update_data.
+
+    Keeps a "last refreshed" marker per (ticker, interval), reports whether a new
+    refresh is due, and coalesces concurrent refreshes of the same key so that only
+    one caller hits the network and the database while the others wait for its result.
+    When the ticker's exchange calendar is known, data is also fresh until the next
+    bar can exist (nights, weekends and holidays never trigger a fetch).
+    """
+
+    def __init__(self, min_intervals: dict = None, calendar_for=default_calendar_for):
+        self.min_intervals = dict(MIN_REFRESH_INTERVALS)
+        if min_intervals:
+            self.min_intervals.update(min_intervals)
+        self.calendar_for = calendar_for
+        self.refreshed_at = {}  # (ticker, interval) -> datetime of the last refresh
+        self._flights = {}
+        self._async_flights = {}  # (ticker, interval) -> asyncio.Future of the refresh in flight
+        self._lock = threading.Lock()
+
+    def is_fresh(self, ticker: str, interval: str, now: datetime = None, last_bar: datetime = None,
+                 refreshed_at: datetime = None) -> bool:
+        # refreshed_at lets callers pass a marker shared between processes (ticker_state.last_fetch_at)
+        now = now or datetime.now(timezone.utc)
+        markers = [m for m in (self.refreshed_at.get((ticker, interval)), refreshed_at) if m is not None]
+        if markers and now - max(markers) < self.min_intervals[interval]:
+            return True
+        return last_bar is not None and now < self.next_bar_time(ticker, interval, last_bar)
+
+    def next_bar_time(self, ticker: str, interval: str, last_bar: datetime) -> datetime:
+        # Without a calendar the next bar may exist at any time
+        calendar = self.calendar_for(ticker)
+        if calendar is None:
+            return last_bar
+        return calendar.next_bar_time(last_bar, interval)
+
+    def mark_refreshed(self, ticker: str, interval: str, when: datetime = None):
+        self.refreshed_at[(ticker, interval)] = when or datetime.now(timezone.utc)
+
+    def invalidate(self, ticker: str, interval: str):
+        self.refreshed_at.pop((ticker, interval), None)
+
+    def run(self, ticker: str, interval: str, refresh):
+        """
+        Run refresh() unless one is already in flight for ticker/interval, in which
+        case wait for it and return its result (or re-raise its error).
+        """
+        key = (ticker, interval)
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            logging.debug(f"Waiting for in-flight refresh of {ticker} with interval {interval}")
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = refresh()
+            self.mark_refreshed(ticker, interval)
+            return flight.result
+        except Exception as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    async def run_async(self, ticker: str, interval: str, refresh):
+        """
+        Await refresh() unless one is already in flight for ticker/interval on this
+        event loop, in which case await its result (or re-raise its error).
+        """
+        key = (ticker, interval)
+        flight = self._async_flights.get(key)
+        if flight is not None:
+            logging.debug(f"Waiting for in-flight refresh of {ticker} with interval {interval}")
+            return await asyncio.shield(flight)
+
+        flight = self._async_flights[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await refresh()
+            self.mark_refreshed(ticker, interval)
+            flight.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except Exception as error:
+            flight.set_exception(error)
+            # Mark the error as retrieved when nobody else was waiting for it
+            flight.exception()
+            raise
+        finally:
+            del self._async_flights[key]
+
+# Shared by every TimeSeriesData of the process unless another controller is given
+default_refresh_controller = RefreshController()
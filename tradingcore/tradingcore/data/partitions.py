@@ -0,0 +1,278 @@
+import argparse
+import logging
+import re
+import time
+from datetime import datetime, timezone
+import pandas as pd
+import psycopg2
+from psycopg2 import sql
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+INTERVALS = ['1m', '2m', '5m', '15m', '30m', '60m', '90m', '1h', '1d']
+# Monthly partitions are named datatimeseries_<interval>_<year>_<month>
+PARTITION_NAME_RE = re.compile(r'^datatimeseries_(\w+?)_(\d{4})_(\d{2})$')
+
+# Partitioning is detected per database and committed partitions are remembered per database.
+# Another process can migrate the table or drop partitions, so a flat table is checked again
+# after PARTITIONING_RECHECK seconds and copy_bars forgets the partitions when a write misses one
+PARTITIONING_RECHECK = 60.0
+_partitioned = {}  # dsn -> (partitioned, time.monotonic() of the check)
+_known_partitions = set()  # (dsn or asyncpg pool, partition name)
+
+
+def month_start(moment: datetime) -> datetime:
+    moment = moment.astimezone(timezone.utc)
+    return datetime(moment.year, moment.month, 1, tzinfo=timezone.utc)
+
+
+def next_month(moment: datetime) -> datetime:
+    if moment.month == 12:
+        return moment.replace(year=moment.year + 1, month=1)
+    return moment.replace(month=moment.month + 1)
+
+
+def interval_partition(interval: str) -> str:
+    return f"datatimeseries_{interval}"
+
+
+def month_partition(interval: str, month: datetime) -> str:
+    return f"datatimeseries_{interval}_{month.year:04d}_{month.month:02d}"
+
+
+def is_partitioned(conn) -> bool:
+    """Whether DataTimeSeries is the partitioned (interval, month) layout."""
+    partitioned, checked_at = _partitioned.get(conn.dsn, (False, None))
+    if partitioned or (checked_at is not None and time.monotonic() - checked_at < PARTITIONING_RECHECK):
+        return partitioned
+    cursor = conn.cursor()
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass('public.datatimeseries')")
+    result = cursor.fetchone()
+    cursor.close()
+    partitioned = result is not None and result[0] == 'p'
+    _partitioned[conn.dsn] = (partitioned, time.monotonic())
+    return partitioned
+
+
+def forget_partitions(database):
+    """
+    Forget what is known about the partitions of a database (the dsn of a psycopg2
+    connection or an asyncpg pool), e.g. after another process dropped some.
+    """
+    _partitioned.pop(database, None)
+    _known_partitions.difference_update({key for key in _known_partitions if key[0] == database})
+
+
+def remember_partitions(database, names):
+    # Partitions committed to database, never created again until forget_partitions
+    _known_partitions.update((database, name) for name in names)
+
+
+def missing_partitions(database, interval: str, first: datetime, last: datetime) -> list:
+    """
+    (name, CREATE statement) of the monthly partitions of interval between first and
+    last (inclusive) not known to exist in database. The statements have no parameters,
+    so psycopg2 and asyncpg run the same SQL.
+    """
+    missing = []
+    month = month_start(first)
+    while month <= last:
+        name = month_partition(interval, month)
+        if (database, name) not in _known_partitions:
+            missing.append((name, f"""
+                CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{interval_partition(interval)}"
+                FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month(month).isoformat()}')
+            """))
+        month = next_month(month)
+    return missing
+
+
+def create_partitioned_table(cursor, table: str = 'datatimeseries'):
+    """
+    Create DataTimeSeries partitioned by LIST (interval) and, below that, by monthly
+    RANGE (date). The primary key leads with ticker so per-ticker reads stay index scans.
+    """
+    cursor.execute(sql.SQL("""
+        CREATE TABLE IF NOT EXISTS {} (
+            date TIMESTAMPTZ NOT NULL,
+            ticker TEXT NOT NULL,
+            interval TEXT NOT NULL,
+            open FLOAT NOT NULL,
+            high FLOAT NOT NULL,
+            low FLOAT NOT NULL,
+            close FLOAT NOT NULL,
+            volume BIGINT NOT NULL,
+            dividends FLOAT DEFAULT 0,
+            stock_splits FLOAT DEFAULT 1,
+            PRIMARY KEY (ticker, interval, date)
+        ) PARTITION BY LIST (interval)
+    """).format(sql.Identifier(table)))
+    for interval in INTERVALS:
+        cursor.execute(sql.SQL("""
+            CREATE TABLE IF NOT EXISTS {} PARTITION OF {}
+            FOR VALUES IN (%s) PARTITION BY RANGE (date)
+        """).format(sql.Identifier(interval_partition(interval)), sql.Identifier(table)), (interval,))
+
+
+def create_month_partitions(cursor, interval: str, first: datetime, last: datetime) -> list:
+    """
+    Create every monthly partition of interval between first and last (inclusive) not
+    known to exist. Returns the names, for the caller to remember once it has committed.
+    """
+    created = []
+    for name, statement in missing_partitions(cursor.connection.dsn, interval, first, last):
+        cursor.execute(statement)
+        created.append(name)
+    return created
+
+
+def ensure_partitions(conn, interval: str, first: datetime, last: datetime):
+    """Make sure monthly partitions exist for bars between first and last, in their own transaction."""
+    cursor = conn.cursor()
+    try:
+        created = create_month_partitions(cursor, interval, first, last)
+        conn.commit()
+        remember_partitions(conn.dsn, created)
+    except psycopg2.errors.DuplicateTable:
+        # Another worker created the same partition concurrently, the next write creates the others
+        conn.rollback()
+    finally:
+        cursor.close()
+
+
+def drop_expired_partitions(conn, interval: str, cutoff_date: datetime) -> list:
+    """
+    Drop the monthly partitions of interval that only hold bars older than cutoff_date
+    and update ticker_state in the same transaction. Returns the dropped partitions.
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = to_regclass(%s)
+    """, (interval_partition(interval),))
+    expired = []
+    for (name,) in cursor.fetchall():
+        match = PARTITION_NAME_RE.match(name)
+        if match and next_month(datetime(int(match[2]), int(match[3]), 1, tzinfo=timezone.utc)) <= cutoff_date:
+            expired.append(name)
+
+    try:
+        for name in sorted(expired):
+            cursor.execute(sql.SQL("SELECT ticker, count(*) FROM {} GROUP BY ticker").format(sql.Identifier(name)))
+            counts = cursor.fetchall()
+            cursor.execute(sql.SQL("DROP TABLE {}").format(sql.Identifier(name)))
+            _known_partitions.discard((conn.dsn, name))
+            for ticker, count in counts:
+                cursor.execute("""
+                    UPDATE ticker_state SET
+                        row_count = GREATEST(row_count - %s, 0),
+                        first_bar = (SELECT min(date) FROM DataTimeSeries WHERE ticker = %s AND interval = %s),
+                        last_bar = CASE WHEN row_count - %s > 0 THEN last_bar END
+                    WHERE ticker = %s AND interval = %s
+                """, (count, ticker, interval, count, ticker, interval))
+            logging.info(f"Dropped partition {name} ({sum(count for _, count in counts)} rows)")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return expired
+
+
+def run_retention(conn, now: datetime = None, retention: dict = None) -> list:
+    """
+    Drop expired partitions of every interval. retention maps intervals to how much history
+    is kept, as TimeSeriesData(retention=...) does, e.g. for backfilled series; the other
+    intervals keep the TimeSeriesData refresh period.
+    """
+    from tradingcore.data.timeseries import calc_period, calculate_cutoff_date
+
+    if not is_partitioned(conn):
+        logging.info("DataTimeSeries is not partitioned, retention is done by TimeSeriesData.delete_old_data")
+        return []
+    now = now or datetime.now(timezone.utc)
+    retention = retention or {}
+    dropped = []
+    for interval in INTERVALS:
+        if interval in retention:
+            cutoff_date = now - retention[interval]
+        else:
+            cutoff_date = calculate_cutoff_date(calc_period(interval), now)
+        dropped += drop_expired_partitions(conn, interval, cutoff_date)
+    return dropped
+
+
+def parse_retention(value: str) -> tuple:
+    # --retention value, e.g. 1m=365d, as (interval, timedelta)
+    interval, _, period = value.partition('=')
+    if interval not in INTERVALS or not period:
+        raise argparse.ArgumentTypeError(f"Expected INTERVAL=PERIOD with an interval in {', '.join(INTERVALS)}, got '{value}'")
+    try:
+        return interval, pd.Timedelta(period).to_pytimedelta()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid retention period '{period}', e.g. 365d or 12h")
+
+
+def migrate_to_partitioned(conn, keep_legacy: bool = False):
+    """
+    Move an existing flat DataTimeSeries table into the partitioned layout in a single
+    transaction. The old table is kept as DataTimeSeries_legacy when keep_legacy is set.
+    """
+    if is_partitioned(conn):
+        logging.info("DataTimeSeries is already partitioned")
+        return
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute("ALTER TABLE DataTimeSeries RENAME TO DataTimeSeries_legacy")
+        cursor.execute("ALTER INDEX IF EXISTS datatimeseries_pkey RENAME TO datatimeseries_legacy_pkey")
+        create_partitioned_table(cursor)
+
+        cursor.execute("SELECT interval, min(date), max(date) FROM DataTimeSeries_legacy GROUP BY interval")
+        created = []
+        for interval, first, last in cursor.fetchall():
+            if interval not in INTERVALS:
+                raise ValueError(f"Interval '{interval}' has no partition")
+            created += create_month_partitions(cursor, interval, first, last)
+
+        cursor.execute("INSERT INTO DataTimeSeries SELECT * FROM DataTimeSeries_legacy")
+        logging.info(f"Migrated {cursor.rowcount} rows to the partitioned DataTimeSeries")
+        if not keep_legacy:
+            cursor.execute("DROP TABLE DataTimeSeries_legacy")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    _partitioned[conn.dsn] = (True, time.monotonic())
+    remember_partitions(conn.dsn, created)
+
+
+def main():
+    from tradingcore.data.postgresql import connect_db
+
+    parser = argparse.ArgumentParser(description="Maintain the partitioned DataTimeSeries table")
+    parser.add_argument('operation', choices=['migrate', 'retention'], help="Migrate the flat table or drop expired partitions")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--user', default='postgres')
+    parser.add_argument('--password', default='postgres')
+    parser.add_argument('--database', default='postgres')
+    parser.add_argument('--keep-legacy', action='store_true', help="Keep the flat table after migrating")
+    parser.add_argument('--retention', type=parse_retention, action='append', default=[], metavar='INTERVAL=PERIOD',
+                        help="History kept for an interval instead of the refresh period, e.g. 1m=365d (repeatable)")
+    args = parser.parse_args()
+
+    conn = connect_db(args.host, args.user, args.password, args.database)
+    if args.operation == 'migrate':
+        migrate_to_partitioned(conn, keep_legacy=args.keep_legacy)
+    elif args.operation == 'retention':
+        dropped = run_retention(conn, retention=dict(args.retention))
+        logging.info(f"Dropped {len(dropped)} expired partitions")
+    conn.close()
+
+if __name__ == "__main__":
+    main()
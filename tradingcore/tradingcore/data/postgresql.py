@@ -1,28 +1,227 @@
 import psycopg2
+import psycopg2.extensions
 from psycopg2 import sql
+import io
+import os
+import re
+import time
 import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+from tradingcore.data.partitions import is_partitioned, ensure_partitions, create_partitioned_table, forget_partitions
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def connect_db(host="localhost", user="postgres", password="postgres", database="postgres"):
+class PreparedConnection(psycopg2.extensions.connection):
+    """psycopg2 connection that remembers the statements prepared in its session."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+        self.last_used = time.monotonic()
+
+
+def connect_db(host="localhost", user="postgres", password="postgres", database="postgres",
+               retries: int = 3, backoff: float = 1.0):
     """
     Función para conectar a la base de datos PostgreSQL.
-    Retorna un objeto de conexión.
+    Retorna un objeto de conexión. Reintenta con espera exponencial y lanza
+    psycopg2.OperationalError si la base de datos sigue sin responder.
     """
-    try:
-        conn = psycopg2.connect(
-            host=host,
-            user=user,
-            password=password,
-            database=database
-        )
-        return conn
-    except Exception as error:
-        logging.error("Failed to connect to PostgreSQL database:", error)
-        exit(1)
+    for attempt in range(retries + 1):
+        try:
+            return psycopg2.connect(
+                host=host,
+                user=user,
+                password=password,
+                database=database,
+                connection_factory=PreparedConnection
+            )
+        except psycopg2.OperationalError as error:
+            if attempt == retries:
+                logging.error(f"Failed to connect to PostgreSQL database: {error}")
+                raise
+            delay = backoff * 2 ** attempt
+            logging.warning(f"Retrying PostgreSQL connection in {delay:.1f}s after: {error}")
+            time.sleep(delay)
+
+
+class PoolTimeout(Exception):
+    """No pooled connection became available in time."""
+
+
+# Connections a forked child inherited from its parent. They share the parent's sockets,
+# so the child keeps them referenced instead of letting them close the parent's sessions
+_inherited = []
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of connect_db connections.
+
+    Between min_size and max_size connections are kept open. A connection idle for more
+    than check_after seconds is checked with SELECT 1 before it is handed out and is
+    replaced when broken. run() retries once on a new connection when the connection is
+    lost during the call. After a fork, or when the pool is pickled into a process
+    worker, the new process opens its own connections.
+    """
+
+    def __init__(self, host="localhost", user="postgres", password="postgres", database="postgres",
+                 min_size: int = 1, max_size: int = 10, check_after: float = 30.0, timeout: float = 30.0):
+        if max_size < 1 or not 0 <= min_size <= max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1")
+        self.host = host
+        self.user = user
+        self.password = password
+        self.database = database
+        self.min_size = min_size
+        self.max_size = max_size
+        self.check_after = check_after
+        self.timeout = timeout
+        self._reset()
+        for _ in range(min_size):
+            self._size += 1
+            self.putconn(self._connect())
+
+    def __getstate__(self):
+        # Only the settings cross process boundaries, never the connections
+        return {key: value for key, value in self.__dict__.items() if not key.startswith('_')}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = []
+        self._size = 0
+        self._cond = threading.Condition()
+
+    def _connect(self):
+        return connect_db(self.host, self.user, self.password, self.database)
+
+    def _check_pid(self):
+        if self._pid != os.getpid():
+            _inherited.extend(self._idle)
+            self._reset()
+
+    def _healthy(self, conn) -> bool:
+        if conn.closed:
+            return False
+        if time.monotonic() - getattr(conn, 'last_used', 0) < self.check_after:
+            return True
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self, timeout: float = None):
+        """Borrow a connection, waiting up to timeout seconds when max_size are in use."""
+        self._check_pid()
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        with self._cond:
+            while not self._idle and self._size >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(f"No PostgreSQL connection available after {self.timeout}s")
+                self._cond.wait(remaining)
+            conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                self._size += 1
+
+        if conn is not None and self._healthy(conn):
+            return conn
+        if conn is not None:
+            logging.warning("Replacing a broken PostgreSQL connection")
+            self._close(conn)
+        try:
+            return self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
 
+    def putconn(self, conn, discard: bool = False):
+        """Return a borrowed connection, closing it when discard is set or it is broken."""
+        if not discard and not conn.closed:
+            try:
+                if conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                discard = True
+        if discard or conn.closed:
+            self._close(conn)
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            return
+        conn.last_used = time.monotonic()
+        with self._cond:
+            self._idle.append(conn)
+            self._cond.notify()
 
-def init_database(host="localhost", user="postgres", password="postgres", database="postgres"):
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    @contextmanager
+    def connection(self, timeout: float = None):
+        conn = self.getconn(timeout)
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def run(self, func, *args, **kwargs):
+        """
+        Call func(conn, *args, **kwargs) with a pooled connection. When the connection
+        is lost during the call it is retried once on a new connection, so func must be
+        safe to repeat (the bar and ticker_state writes of this module are).
+        """
+        for attempt in range(2):
+            with self.connection() as conn:
+                try:
+                    return func(conn, *args, **kwargs)
+                except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                    if attempt or not conn.closed:
+                        raise
+                    logging.warning("Lost the PostgreSQL connection, retrying on a new one")
+                    # The server most likely restarted, so the idle connections lost their sessions too
+                    self.close()
+
+    def close(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for conn in idle:
+            self._close(conn)
+
+
+def run_with(db, func, *args, **kwargs):
+    # db is either a single connection or a ConnectionPool
+    if isinstance(db, ConnectionPool):
+        return db.run(func, *args, **kwargs)
+    return func(db, *args, **kwargs)
+
+
+def init_database(host="localhost", user="postgres", password="postgres", database="postgres", partitioned=False):
+    """
+    Crea la base de datos y las tablas si no existen.
+    Con partitioned=True, DataTimeSeries se crea particionada por intervalo y mes
+    (ver tradingcore.data.partitions para migrar una tabla existente).
+    """
 
     try:
         # Usar connect_db para obtener la conexión a la base de datos 'postgres'
@@ -46,6 +245,13 @@ def init_database(host="localhost", user="postgres", password="postgres", databa
         cursor = conn.cursor()
 
         # Crear la tabla DataTimeSeries si no existe
+        cursor.execute("""SELECT relkind FROM pg_class WHERE oid = to_regclass('public.datatimeseries');""")
+        existing = cursor.fetchone()
+        if partitioned and existing is None:
+            create_partitioned_table(cursor)
+            logging.info("Created partitioned table DataTimeSeries")
+        elif partitioned and existing[0] != 'p':
+            logging.warning("DataTimeSeries exists and is not partitioned, run 'python -m tradingcore.data.partitions migrate'")
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS DataTimeSeries (
                 date TIMESTAMPTZ NOT NULL,
@@ -63,6 +269,31 @@ def init_database(host="localhost", user="postgres", password="postgres", databa
         """)
         conn.commit()  # Asegúrate de hacer commit
 
+        # Crear la tabla ticker_state y poblarla a partir de los datos existentes
+        cursor.execute("""SELECT to_regclass('public.ticker_state');""")
+        state_exists = cursor.fetchone()[0] is not None
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS ticker_state (
+                ticker TEXT NOT NULL,
+                interval TEXT NOT NULL,
+                first_bar TIMESTAMPTZ,
+                last_bar TIMESTAMPTZ,
+                row_count BIGINT NOT NULL DEFAULT 0,
+                last_fetch_at TIMESTAMPTZ,
+                PRIMARY KEY (ticker, interval)
+            )
+        """)
+        if not state_exists:
+            cursor.execute("""
+                INSERT INTO ticker_state (ticker, interval, first_bar, last_bar, row_count)
+                SELECT ticker, interval, min(date), max(date), count(*)
+                FROM DataTimeSeries
+                GROUP BY ticker, interval
+                ON CONFLICT (ticker, interval) DO NOTHING
+            """)
+            logging.info(f"Initialized ticker_state with {cursor.rowcount} series")
+        conn.commit()
+
         # Verifica si la tabla fue creada correctamente
         cursor.execute("""SELECT to_regclass('public.DataTimeSeries');""")
         result = cursor.fetchone()
@@ -77,6 +308,306 @@ def init_database(host="localhost", user="postgres", password="postgres", databa
         return True
 
     except Exception as error:
-        logging.error("Failed to initialize PostgreSQL database or create table:", error)
+        logging.error(f"Failed to initialize PostgreSQL database or create table: {error}")
         logging.info("Username: %s", user)
-        exit(1)
+        raise
+
+
+# PostgreSQL binary COPY layout of one (date, open, high, low, close, volume) tuple:
+# int16 field count followed by an int32 length and the big-endian value of every field
+BAR_COPY_FIELDS = [
+    ('date', '>i8'), ('open', '>f8'), ('high', '>f8'), ('low', '>f8'), ('close', '>f8'), ('volume', '>i8'),
+]
+BAR_COPY_DTYPE = np.dtype([('fields', '>i2')] + [
+    item for name, fmt in BAR_COPY_FIELDS for item in ((f'{name}_len', '>i4'), (name, fmt))
+])
+# Multi-ticker reads prepend the int4 position of the ticker in the requested list
+PANEL_COPY_DTYPE = np.dtype([('fields', '>i2'), ('ticker_len', '>i4'), ('ticker', '>i4')] + [
+    item for name, fmt in BAR_COPY_FIELDS for item in ((f'{name}_len', '>i4'), (name, fmt))
+])
+COPY_SIGNATURE = b'PGCOPY\n\xff\r\n\x00'
+# Binary timestamps are microseconds since 2000-01-01 UTC
+PG_EPOCH_US = 946_684_800_000_000
+
+
+def decode_bar_copy(payload: bytes, dtype: np.dtype = BAR_COPY_DTYPE) -> dict:
+    """
+    Decode the output of a binary COPY of (date, open, high, low, close, volume) rows
+    into contiguous NumPy columns without creating Python objects per cell.
+    """
+    if payload[:11] != COPY_SIGNATURE:
+        raise ValueError("Payload is not in PostgreSQL binary COPY format")
+    extension = int.from_bytes(payload[15:19], 'big')
+    offset = 19 + extension
+    # Rows are followed by a 2 byte trailer (-1)
+    rows, remainder = divmod(len(payload) - offset - 2, dtype.itemsize)
+    if remainder:
+        raise ValueError("Unexpected row layout in binary COPY payload")
+
+    records = np.frombuffer(payload, dtype=dtype, count=rows, offset=offset)
+    if rows and ((records['fields'] != (len(dtype.names) - 1) // 2).any() or (records['date_len'] != 8).any()):
+        raise ValueError("Unexpected row layout in binary COPY payload")
+
+    bars = {
+        'date': (records['date'].astype(np.int64) + PG_EPOCH_US).view('datetime64[us]'),
+        'open': records['open'].astype(np.float64),
+        'high': records['high'].astype(np.float64),
+        'low': records['low'].astype(np.float64),
+        'close': records['close'].astype(np.float64),
+        'volume': records['volume'].astype(np.int64),
+    }
+    if 'ticker' in dtype.names:
+        bars['ticker'] = records['ticker'].astype(np.int32)
+    return bars
+
+
+def copy_query(conn, query: str, params, dtype: np.dtype = BAR_COPY_DTYPE) -> dict:
+    # COPY does not take bind parameters, so the query is rendered client side
+    cursor = conn.cursor()
+    buffer = io.BytesIO()
+    try:
+        cursor.copy_expert(
+            f"COPY ({cursor.mogrify(query, params).decode()}) TO STDOUT WITH (FORMAT binary)", buffer)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return decode_bar_copy(buffer.getbuffer(), dtype)
+
+
+def date_bounds(query: str, params: list, start=None, end=None):
+    # Append the optional inclusive date range to a DataTimeSeries query
+    if start is not None:
+        query += " AND date >= %s"
+        params.append(start)
+    if end is not None:
+        query += " AND date <= %s"
+        params.append(end)
+    return query, params
+
+
+def read_bars(conn, ticker: str, interval: str, start=None, end=None) -> dict:
+    """
+    Read the OHLCV bars of ticker/interval ordered by date with a binary COPY.
+    start and end optionally bound the date range (inclusive).
+    Returns a dict of NumPy arrays keyed by date, open, high, low, close and volume.
+    """
+    query, params = date_bounds("""
+        SELECT date, open, high, low, close, volume
+        FROM DataTimeSeries
+        WHERE ticker = %s AND interval = %s
+    """, [ticker, interval], start, end)
+    return copy_query(conn, query + " ORDER BY date ASC", params)
+
+
+def read_bars_many(conn, tickers: list, interval: str, start=None, end=None) -> dict:
+    """
+    Read the OHLCV bars of several tickers in a single binary COPY.
+    Same as read_bars plus a 'ticker' array holding the position of each row's
+    ticker in the tickers list.
+    """
+    query, params = date_bounds("""
+        SELECT (array_position(%s::text[], ticker) - 1)::int4, date, open, high, low, close, volume
+        FROM DataTimeSeries
+        WHERE ticker = ANY(%s) AND interval = %s
+    """, [list(tickers), list(tickers), interval], start, end)
+    return copy_query(conn, query + " ORDER BY date ASC", params, PANEL_COPY_DTYPE)
+
+
+# Hot statements, prepared once per session of a connect_db connection ($n placeholders)
+STATEMENTS = {
+    'get_ticker_state': """
+        SELECT ticker, interval, first_bar, last_bar, row_count, last_fetch_at
+        FROM ticker_state
+        WHERE ticker = $1::text AND interval = $2::text
+    """,
+    'record_fetch': """
+        INSERT INTO ticker_state (ticker, interval, last_fetch_at)
+        VALUES ($1::text, $2::text, now())
+        ON CONFLICT (ticker, interval) DO UPDATE SET last_fetch_at = EXCLUDED.last_fetch_at
+    """,
+    'delete_bars_before': """
+        DELETE FROM DataTimeSeries
+        WHERE date < $1::timestamptz AND ticker = $2::text AND interval = $3::text
+    """,
+    'deleted_ticker_state': """
+        UPDATE ticker_state SET
+            row_count = GREATEST(row_count - $1::bigint, 0),
+            first_bar = (SELECT min(date) FROM DataTimeSeries WHERE ticker = $2::text AND interval = $3::text),
+            last_bar = CASE WHEN row_count - $1::bigint > 0 THEN last_bar END
+        WHERE ticker = $2::text AND interval = $3::text
+    """,
+    'merge_staged_bars': """
+        INSERT INTO DataTimeSeries (date, ticker, interval, open, high, low, close, volume)
+        SELECT date, $1::text, $2::text, open, high, low, close, volume::BIGINT
+        FROM DataTimeSeries_staging
+        ON CONFLICT (date, ticker, interval) DO NOTHING
+    """,
+    'merged_ticker_state': """
+        INSERT INTO ticker_state (ticker, interval, first_bar, last_bar, row_count)
+        SELECT $1::text, $2::text, min(date), max(date), $3::bigint
+        FROM DataTimeSeries_staging
+        ON CONFLICT (ticker, interval) DO UPDATE SET
+            first_bar = LEAST(ticker_state.first_bar, EXCLUDED.first_bar),
+            last_bar = GREATEST(ticker_state.last_bar, EXCLUDED.last_bar),
+            row_count = ticker_state.row_count + EXCLUDED.row_count
+    """,
+}
+PLACEHOLDER = re.compile(r'\$(\d+)')
+
+# Session-local table the bars are COPYed into before merge_staged_bars. Volume is staged
+# as FLOAT so frames with float volumes (e.g. after a concat) load without errors
+CREATE_STAGING_TABLE = """
+    CREATE TEMP TABLE IF NOT EXISTS DataTimeSeries_staging (
+        date TIMESTAMPTZ NOT NULL,
+        open FLOAT NOT NULL,
+        high FLOAT NOT NULL,
+        low FLOAT NOT NULL,
+        close FLOAT NOT NULL,
+        volume FLOAT NOT NULL
+    ) ON COMMIT DELETE ROWS
+"""
+
+
+def execute_prepared(cursor, name: str, params):
+    """
+    Execute STATEMENTS[name], preparing it on first use in the connection's session.
+    Connections not made by connect_db run it as a plain query.
+    """
+    prepared = getattr(cursor.connection, 'prepared', None)
+    if prepared is None:
+        cursor.execute(PLACEHOLDER.sub(r'%(\1)s', STATEMENTS[name]),
+                       {str(position): value for position, value in enumerate(params, 1)})
+        return
+    if name not in prepared:
+        # Prepared statements are session state and survive rollbacks
+        cursor.execute(f"PREPARE {name} AS {STATEMENTS[name]}")
+        prepared.add(name)
+    cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+
+
+class TickerState(NamedTuple):
+    ticker: str
+    interval: str
+    first_bar: datetime
+    last_bar: datetime
+    row_count: int
+    last_fetch_at: datetime
+
+
+def get_ticker_state(conn, ticker: str, interval: str):
+    """
+    Return the TickerState of ticker/interval, or None when the series is unknown.
+    A single primary key lookup, no scan of DataTimeSeries.
+    """
+    cursor = conn.cursor()
+    try:
+        execute_prepared(cursor, 'get_ticker_state', (ticker, interval))
+        result = cursor.fetchone()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return TickerState(*result) if result is not None else None
+
+
+def get_last_date(conn, ticker: str, interval: str):
+    """
+    Return the timestamp of the newest bar stored for ticker/interval, or None
+    when nothing is stored yet.
+    """
+    state = get_ticker_state(conn, ticker, interval)
+    return state.last_bar if state is not None else None
+
+
+def record_fetch(conn, ticker: str, interval: str):
+    # Remember when the series was last fetched from the data provider
+    cursor = conn.cursor()
+    try:
+        execute_prepared(cursor, 'record_fetch', (ticker, interval))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def delete_bars_before(conn, ticker: str, interval: str, cutoff_date) -> int:
+    """
+    Delete the bars of ticker/interval older than cutoff_date and keep ticker_state
+    in sync in the same transaction. Returns the number of deleted rows.
+    """
+    # Partitioned tables are trimmed by dropping whole partitions (partitions.run_retention)
+    if is_partitioned(conn):
+        return 0
+    state = get_ticker_state(conn, ticker, interval)
+    # Nothing to delete when the oldest stored bar is already within the retention window
+    if state is None or state.first_bar is None or state.first_bar >= cutoff_date:
+        return 0
+
+    cursor = conn.cursor()
+    try:
+        execute_prepared(cursor, 'delete_bars_before', (cutoff_date, ticker, interval))
+        deleted = cursor.rowcount
+        execute_prepared(cursor, 'deleted_ticker_state', (deleted, ticker, interval))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return deleted
+
+
+def copy_bars(conn, ticker: str, interval: str, data: pd.DataFrame) -> int:
+    """
+    Bulk load OHLCV bars into DataTimeSeries.
+
+    The bars are streamed with COPY into a session-local staging table and merged
+    with a single INSERT ... ON CONFLICT DO NOTHING, so the cost is one round-trip
+    per call instead of one per bar. Returns the number of rows inserted.
+    """
+    bars = data[['Open', 'High', 'Low', 'Close', 'Volume']].dropna()
+    if bars.empty:
+        return 0
+    bars.index = pd.to_datetime(bars.index, utc=True)
+    buffer = io.StringIO()
+    bars.to_csv(buffer, header=False, date_format='%Y-%m-%d %H:%M:%S+00')
+    if is_partitioned(conn):
+        ensure_partitions(conn, interval, bars.index.min(), bars.index.max())
+    try:
+        return merge_bars(conn, ticker, interval, buffer)
+    except psycopg2.errors.CheckViolation:
+        # No partition for some bars, another process dropped one that was remembered as created
+        logging.warning(f"Missing partition for {ticker} with interval {interval}, creating it again")
+        forget_partitions(conn.dsn)
+        if not is_partitioned(conn):
+            raise
+        ensure_partitions(conn, interval, bars.index.min(), bars.index.max())
+        return merge_bars(conn, ticker, interval, buffer)
+
+
+def merge_bars(conn, ticker: str, interval: str, buffer: io.StringIO) -> int:
+    # COPY the CSV bars of buffer into the staging table and merge them in one transaction
+    buffer.seek(0)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(CREATE_STAGING_TABLE)
+        cursor.copy_expert("""
+            COPY DataTimeSeries_staging (date, open, high, low, close, volume)
+            FROM STDIN WITH (FORMAT csv)
+        """, buffer)
+        execute_prepared(cursor, 'merge_staged_bars', (ticker, interval))
+        inserted = cursor.rowcount
+        # Keep ticker_state in the same transaction as the bars it describes
+        execute_prepared(cursor, 'merged_ticker_state', (ticker, interval, inserted))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return inserted
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+from tradingcore.data.calendar import INTERVAL_MINUTES, TradingCalendar
+
+def can_resample(base_interval: str, interval: str) -> bool:
+    # A bar of interval must be made of whole base bars, and daily bars are never split
+    if base_interval == '1d':
+        return interval == '1d'
+    if interval == '1d':
+        return True
+    return INTERVAL_MINUTES[interval] % INTERVAL_MINUTES[base_interval] == 0
+
+class Resampler:
+    """
+    Build interval OHLCV bars from the bars of a finer base interval.
+
+    Intraday buckets are anchored to the session open of the ticker's calendar in the
+    exchange timezone (a 60m bar of NYSE covers 9:30-10:30, as Yahoo Finance labels it)
+    and daily bars are labelled with local midnight. Without a calendar buckets are
+    anchored to UTC midnight. update() only re-aggregates the newest, possibly partial,
+    bucket and the bars after it.
+    """
+
+    def __init__(self, interval: str, base_interval: str, calendar: TradingCalendar = None):
+        if not can_resample(base_interval, interval):
+            raise ValueError(f"Interval '{interval}' can not be built from '{base_interval}' bars")
+        self.interval = interval
+        self.base_interval = base_interval
+        self.calendar = calendar
+        self.result = None
+        self._open = None  # Base bars of the newest bucket, re-aggregated on every update
+
+    def labels(self, index: pd.DatetimeIndex) -> pd.DatetimeIndex:
+        """UTC start time of the bucket of every base bar."""
+        tz = self.calendar.tz if self.calendar is not None else 'UTC'
+        # Bucket in local wall time so sessions keep their open across DST changes
+        local = pd.DatetimeIndex(index).tz_convert(tz).tz_localize(None)
+        day = local.floor('D')
+        if self.interval == '1d':
+            labels = day
+        else:
+            width = pd.Timedelta(minutes=INTERVAL_MINUTES[self.interval]).value
+            anchor = 0
+            if self.calendar is not None:
+                anchor = pd.Timedelta(hours=self.calendar.open_time.hour, minutes=self.calendar.open_time.minute).value
+            offset = (local - day).asi8 - anchor
+            labels = day + pd.to_timedelta(offset // width * width + anchor)
+        return labels.tz_localize(tz).tz_convert('UTC')
+
+    def resample(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Aggregate data, sorted by date, into bars of interval."""
+        columns = ['Open', 'High', 'Low', 'Close', 'Volume']
+        if data.empty:
+            return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], tz='UTC', name=data.index.name))
+        labels = self.labels(data.index)
+        starts = np.flatnonzero(np.r_[True, labels.asi8[1:] != labels.asi8[:-1]])
+        ends = np.r_[starts[1:], len(labels)] - 1
+        return pd.DataFrame({
+            'Open': data['Open'].to_numpy()[starts],
+            'High': np.maximum.reduceat(data['High'].to_numpy(), starts),
+            'Low': np.minimum.reduceat(data['Low'].to_numpy(), starts),
+            'Close': data['Close'].to_numpy()[ends],
+            'Volume': np.add.reduceat(data['Volume'].to_numpy(), starts),
+        }, index=labels[starts].rename(data.index.name))
+
+    def update(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Return the resampled bars of data. Only the base bars newer than the ones seen
+        by the previous call are aggregated, together with the newest bucket they may extend.
+        """
+        index = pd.to_datetime(data.index, utc=True)
+        first = 0
+        if self.result is not None and self._open is not None:
+            first = index.searchsorted(self._open.index[-1], 'right')
+        new = data.iloc[first:][['Open', 'High', 'Low', 'Close', 'Volume']]
+        new.index = index[first:]
+        if first:
+            new = pd.concat([self._open, new])
+        else:
+            self.result = None
+
+        bars = self.resample(new)
+        if self.result is not None and not bars.empty:
+            bars = pd.concat([self.result[self.result.index < bars.index[0]], bars])
+        elif self.result is not None:
+            bars = self.result
+        self.result = bars
+
+        if not new.empty:
+            last_label = self.labels(new.index[-1:])[0]
+            self._open = new[new.index >= last_label]
+        return bars
@@ -0,0 +1,238 @@
+import time
+import random
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import pandas as pd
+import requests
+import yfinance as yf
+from tradingcore.utils.yahoo_finance import fetch_yahoo_finance_data
+from tradingcore.utils.rate_limit import TokenBucket
+
+try:
+    import aiohttp
+except ImportError:  # Optional, ThreadedSource covers async callers without it
+    aiohttp = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+OHLCV = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+class FetchError(Exception):
+    """A provider request that failed and can be retried (throttling, server errors)."""
+
+# yfinance reports throttling with its own exception in recent versions
+RETRYABLE_ERRORS = (FetchError, requests.RequestException) + tuple(
+    error for error in [getattr(getattr(yf, 'exceptions', None), 'YFRateLimitError', None)] if error is not None)
+
+class DataSource:
+    """
+    Provider of OHLCV bars used by TimeSeriesData. Either period or start (with an
+    optional end) is given, as in fetch_yahoo_finance_data. fetch_batch returns a dict
+    of ticker -> frame and may leave out unknown tickers; max_batch_size is how many
+    tickers one provider call can carry.
+    """
+    max_batch_size = 1
+
+    def fetch(self, ticker: str, interval: str, period: str = None, start=None, end=None) -> pd.DataFrame:
+        raise NotImplementedError("Should implement fetch()")
+
+    def fetch_batch(self, tickers: list, interval: str, period: str = None, start=None, end=None) -> dict:
+        return {ticker: self.fetch(ticker, interval, period, start, end) for ticker in tickers}
+
+class YahooFinanceSource(DataSource):
+    """yfinance: one Ticker.history() per ticker, or one yf.download() per batch."""
+    max_batch_size = 50
+
+    def fetch(self, ticker: str, interval: str, period: str = None, start=None, end=None) -> pd.DataFrame:
+        return fetch_yahoo_finance_data(ticker, interval, period=period, start=start, end=end)
+
+    def fetch_batch(self, tickers: list, interval: str, period: str = None, start=None, end=None) -> dict:
+        if len(tickers) == 1:
+            return {tickers[0]: self.fetch(tickers[0], interval, period, start, end)}
+        # Concurrency and throttling are handled by BatchedFetcher, not by yfinance threads
+        data = yf.download(tickers, interval=interval, period=period, start=start, end=end, group_by='ticker',
+                           auto_adjust=True, actions=False, threads=False, progress=False)
+        if data is None or data.empty:
+            return {}
+        return {ticker: data[ticker].dropna(how='all') for ticker in tickers
+                if ticker in data.columns.get_level_values(0)}
+
+class ChartAPISource(DataSource):
+    """
+    Yahoo Finance v8 chart endpoint over plain HTTP. base_url can point to a local
+    stand-in server in tests. Throttling (429) and server errors raise FetchError.
+    """
+
+    def __init__(self, base_url: str = "https://query1.finance.yahoo.com", timeout: float = 10.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self._local = threading.local()  # requests.Session is not thread-safe, keep one per thread
+
+    @property
+    def session(self) -> requests.Session:
+        if not hasattr(self._local, 'session'):
+            self._local.session = requests.Session()
+            self._local.session.headers['User-Agent'] = 'Mozilla/5.0'
+        return self._local.session
+
+    def fetch(self, ticker: str, interval: str, period: str = None, start=None, end=None) -> pd.DataFrame:
+        params = {'interval': interval}
+        if period:
+            params['range'] = period
+        elif start is not None:
+            params['period1'] = int(pd.Timestamp(start).timestamp())
+            params['period2'] = int(pd.Timestamp(end).timestamp()) if end is not None else int(time.time())
+        else:
+            raise ValueError("You must provide either period or start with optional end dates.")
+
+        response = self.session.get(f"{self.base_url}/v8/finance/chart/{ticker}", params=params, timeout=self.timeout)
+        if response.status_code == 429 or response.status_code >= 500:
+            raise FetchError(f"{response.status_code} fetching {ticker}")
+        if response.status_code == 404:
+            return pd.DataFrame(columns=OHLCV)
+        response.raise_for_status()
+        return self.parse_chart(response.json())
+
+    @staticmethod
+    def parse_chart(payload: dict) -> pd.DataFrame:
+        # Same shape as Ticker.history(): OHLCV columns indexed by exchange-local timestamps
+        result = (payload.get('chart', {}).get('result') or [None])[0]
+        if not result or not result.get('timestamp'):
+            return pd.DataFrame(columns=OHLCV)
+        quote = result['indicators']['quote'][0]
+        index = pd.to_datetime(result['timestamp'], unit='s', utc=True)
+        timezone = result.get('meta', {}).get('exchangeTimezoneName')
+        if timezone:
+            index = index.tz_convert(timezone)
+        data = pd.DataFrame({field: pd.to_numeric(pd.Series(quote[field.lower()], dtype=object), errors='coerce').to_numpy()
+                             for field in OHLCV}, index=index.rename('Datetime'))
+        return data.dropna(subset=['Open', 'High', 'Low', 'Close'], how='all')
+
+class BatchedFetcher(DataSource):
+    """
+    Fetch many tickers through a DataSource: tickers are grouped in batches of at most
+    batch_size (and the source's max_batch_size), up to max_workers batches run
+    concurrently, every provider call takes a token from a rate-per-second bucket, and
+    failed calls are retried with exponential backoff and jitter. It is itself a
+    DataSource, so TimeSeriesData can fetch through the same limits.
+    """
+
+    def __init__(self, source: DataSource = None, batch_size: int = 50, max_workers: int = 4, rate: float = 2.0,
+                 burst: float = None, retries: int = 3, backoff: float = 1.0, sleep=time.sleep):
+        self.source = source or YahooFinanceSource()
+        self.batch_size = max(1, min(batch_size, self.source.max_batch_size))
+        self.max_workers = max_workers
+        self.bucket = TokenBucket(rate, burst, sleep=sleep)
+        self.retries = retries
+        self.backoff = backoff
+        self.sleep = sleep
+
+    def fetch(self, ticker: str, interval: str, period: str = None, start=None, end=None) -> pd.DataFrame:
+        # Single ticker through the same rate limit and retries, raises once retries are exhausted
+        return self._call([ticker], interval, period, start, end).get(ticker, pd.DataFrame(columns=OHLCV))
+
+    def fetch_many(self, tickers: list, interval: str, period: str = None, start=None, end=None) -> dict:
+        """
+        Return ticker -> frame for every ticker that could be fetched. Batches still
+        failing after the retries are logged and left out.
+        """
+        tickers = list(dict.fromkeys(tickers))
+        batches = [tickers[i:i + self.batch_size] for i in range(0, len(tickers), self.batch_size)]
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self._call, batch, interval, period, start, end): batch for batch in batches}
+            for future in as_completed(futures):
+                try:
+                    results.update(future.result())
+                except Exception as error:
+                    logging.error(f"Failed to fetch {len(futures[future])} tickers ({futures[future][0]}...): {error}")
+        logging.info(f"Fetched {len(results)} of {len(tickers)} tickers with interval {interval} in {len(batches)} batches")
+        return results
+
+    def fetch_batch(self, tickers: list, interval: str, period: str = None, start=None, end=None) -> dict:
+        return self.fetch_many(tickers, interval, period, start, end)
+
+    def _call(self, batch: list, interval: str, period: str, start, end) -> dict:
+        for attempt in range(self.retries + 1):
+            self.bucket.acquire()
+            try:
+                return self.source.fetch_batch(batch, interval, period=period, start=start, end=end)
+            except RETRYABLE_ERRORS as error:
+                if attempt == self.retries:
+                    raise
+                delay = self.backoff * 2 ** attempt * (1 + random.random() / 2)
+                logging.warning(f"Retrying {batch[0]} batch in {delay:.1f}s after: {error}")
+                self.sleep(delay)
+
+class AsyncDataSource:
+    """Asyncio counterpart of DataSource, used by AsyncTimeSeriesData."""
+
+    async def fetch(self, ticker: str, interval: str, period: str = None, start=None, end=None) -> pd.DataFrame:
+        raise NotImplementedError("Should implement fetch()")
+
+class ThreadedSource(AsyncDataSource):
+    """Run a blocking DataSource (yfinance by default) in the default executor."""
+
+    def __init__(self, source: DataSource = None):
+        self.source = source or YahooFinanceSource()
+
+    async def fetch(self, ticker: str, interval: str, period: str = None, start=None, end=None) -> pd.DataFrame:
+        return await asyncio.to_thread(self.source.fetch, ticker, interval, period, start, end)
+
+class AsyncChartAPISource(AsyncDataSource):
+    """
+    ChartAPISource over aiohttp: at most max_concurrency requests in flight, rate
+    requests per second, and throttled or failed requests retried with backoff.
+    """
+
+    def __init__(self, base_url: str = "https://query1.finance.yahoo.com", timeout: float = 10.0,
+                 max_concurrency: int = 16, rate: float = 2.0, retries: int = 3, backoff: float = 1.0):
+        if aiohttp is None:
+            raise ImportError("AsyncChartAPISource requires aiohttp, use ThreadedSource(ChartAPISource()) instead")
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.bucket = TokenBucket(rate)
+        self.retries = retries
+        self.backoff = backoff
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._session = None
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def fetch(self, ticker: str, interval: str, period: str = None, start=None, end=None) -> pd.DataFrame:
+        params = {'interval': interval}
+        if period:
+            params['range'] = period
+        elif start is not None:
+            params['period1'] = int(pd.Timestamp(start).timestamp())
+            params['period2'] = int(pd.Timestamp(end).timestamp()) if end is not None else int(time.time())
+        else:
+            raise ValueError("You must provide either period or start with optional end dates.")
+
+        if self._session is None:
+            self._session = aiohttp.ClientSession(headers={'User-Agent': 'Mozilla/5.0'},
+                                                  timeout=aiohttp.ClientTimeout(total=self.timeout))
+        for attempt in range(self.retries + 1):
+            await self.bucket.acquire_async()
+            try:
+                async with self._semaphore:
+                    async with self._session.get(f"{self.base_url}/v8/finance/chart/{ticker}", params=params) as response:
+                        if response.status == 429 or response.status >= 500:
+                            raise FetchError(f"{response.status} fetching {ticker}")
+                        if response.status == 404:
+                            return pd.DataFrame(columns=OHLCV)
+                        response.raise_for_status()
+                        payload = await response.json()
+                return ChartAPISource.parse_chart(payload)
+            except (FetchError, aiohttp.ClientConnectionError, asyncio.TimeoutError) as error:
+                if attempt == self.retries:
+                    raise
+                delay = self.backoff * 2 ** attempt * (1 + random.random() / 2)
+                logging.warning(f"Retrying {ticker} in {delay:.1f}s after: {error}")
+                await asyncio.sleep(delay)
@@ -0,0 +1,71 @@
+import pandas as pd
+from tradingcore.data.postgresql import (copy_bars, read_bars, read_bars_many, get_ticker_state, record_fetch,
+                                         delete_bars_before, run_with)
+
+def to_epoch_us(moment) -> int:
+    # Naive datetimes are taken as UTC, like the stored bars
+    moment = pd.Timestamp(moment)
+    moment = moment.tz_localize('UTC') if moment.tzinfo is None else moment.tz_convert('UTC')
+    return moment.value // 1000
+
+class BarStore:
+    """
+    Storage backend of TimeSeriesData.
+
+    read_bars returns a dict of NumPy arrays keyed by date (datetime64[us], UTC), open,
+    high, low, close and volume ordered by date. read_bars_many adds a 'ticker' array
+    with the position of each bar's ticker in the requested list. get_ticker_state
+    returns a postgresql.TickerState or None when the series is unknown.
+    append_only stores ignore bars older than the newest stored one.
+    """
+    append_only = False
+
+    def read_bars(self, ticker: str, interval: str, start=None, end=None) -> dict:
+        raise NotImplementedError("Should implement read_bars()")
+
+    def read_bars_many(self, tickers: list, interval: str, start=None, end=None) -> dict:
+        raise NotImplementedError("Should implement read_bars_many()")
+
+    def write_bars(self, ticker: str, interval: str, data: pd.DataFrame) -> int:
+        raise NotImplementedError("Should implement write_bars()")
+
+    def get_ticker_state(self, ticker: str, interval: str):
+        raise NotImplementedError("Should implement get_ticker_state()")
+
+    def record_fetch(self, ticker: str, interval: str):
+        raise NotImplementedError("Should implement record_fetch()")
+
+    def delete_bars_before(self, ticker: str, interval: str, cutoff_date) -> int:
+        raise NotImplementedError("Should implement delete_bars_before()")
+
+    def get_last_date(self, ticker: str, interval: str):
+        # Newest stored bar, or None when nothing is stored yet
+        state = self.get_ticker_state(ticker, interval)
+        return state.last_bar if state is not None else None
+
+class PostgresBarStore(BarStore):
+    """
+    One row per bar in the DataTimeSeries table (flat or partitioned). conn is a
+    connection or a ConnectionPool, which reconnects transparently.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def read_bars(self, ticker: str, interval: str, start=None, end=None) -> dict:
+        return run_with(self.conn, read_bars, ticker, interval, start, end)
+
+    def read_bars_many(self, tickers: list, interval: str, start=None, end=None) -> dict:
+        return run_with(self.conn, read_bars_many, tickers, interval, start, end)
+
+    def write_bars(self, ticker: str, interval: str, data: pd.DataFrame) -> int:
+        return run_with(self.conn, copy_bars, ticker, interval, data)
+
+    def get_ticker_state(self, ticker: str, interval: str):
+        return run_with(self.conn, get_ticker_state, ticker, interval)
+
+    def record_fetch(self, ticker: str, interval: str):
+        run_with(self.conn, record_fetch, ticker, interval)
+
+    def delete_bars_before(self, ticker: str, interval: str, cutoff_date) -> int:
+        return run_with(self.conn, delete_bars_before, ticker, interval, cutoff_date)
@@ -1,117 +1,256 @@
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta, timezone
 import logging
-from tradingcore.utils.yahoo_finance import fetch_yahoo_finance_data
+from tradingcore.data.cache import BarCache
+from tradingcore.data.freshness import RefreshController, default_refresh_controller
+from tradingcore.data.storage import BarStore, PostgresBarStore
+from tradingcore.data.resample import Resampler
+from tradingcore.data.calendar import calendar_for
+from tradingcore.data.sources import DataSource, YahooFinanceSource, BatchedFetcher
+from tradingcore.utils.data_version import DataVersion, fingerprint, stamp
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+def calc_period(interval: str) -> str:
+    # Calculate the period based on interval
+    if interval == '1m':
+        return '7d'
+    elif interval in ['60m', '1h', '1d']:
+        return '1y'
+    else:
+        return '1mo'
+
+def calculate_cutoff_date(period: str, now: datetime = None) -> datetime:
+    # Calculate the cutoff date based on the period
+    now = now or datetime.now(timezone.utc)
+    if period == '7d':
+        return now - timedelta(days=7)
+    elif period == '1y':
+        return now - timedelta(days=365)
+    else:  # Default to '1mo'
+        return now - timedelta(days=30)
+
+def bars_to_frame(bars: dict) -> pd.DataFrame:
+    # Build the OHLCV frame from the NumPy columns returned by read_bars
+    index = pd.DatetimeIndex(bars['date'].astype('datetime64[ns]'), name='date').tz_localize('UTC')
+    return pd.DataFrame({'Open': bars['open'], 'High': bars['high'], 'Low': bars['low'],
+                         'Close': bars['close'], 'Volume': bars['volume']}, index=index, copy=False)
+
 class TimeSeriesData:
     ALLOWED_INTERVALS = {'1m', '2m', '5m', '15m', '30m', '60m', '90m', '1h', '1d'}
 
-    def __init__(self, ticker: str, interval: str, db_connection):
-
+    def __init__(self, ticker: str, interval: str, db_connection, start: datetime = None, end: datetime = None,
+                 cache: BarCache = None, refresh: RefreshController = None, storage: BarStore = None,
+                 base_interval: str = None, source: DataSource = None, retention: timedelta = None):
+        # start/end optionally bound the stored history that is loaded, e.g. a backtest window
+        # cache lets repeated instances for the same ticker/interval reuse the loaded bars
+        # refresh decides when update_data hits Yahoo Finance, shared process-wide by default
+        # db_connection is a psycopg2 connection or a ConnectionPool
+        # storage is where bars are kept, the DataTimeSeries table of db_connection by default
+        # base_interval builds the bars by resampling that finer interval, the only one fetched and stored
+        # source is the bar provider, Yahoo Finance by default (e.g. a BatchedFetcher or a test stand-in)
+        # retention is how much history update_data keeps, the refresh period by default (see data.backfill)
 
         self.ticker = ticker
         if interval not in self.ALLOWED_INTERVALS:
             raise ValueError(f"Interval '{interval}' is not allowed. Allowed values are: {', '.join(self.ALLOWED_INTERVALS)}")
         self.interval = interval
         self.period = self.calc_period()
+        self.retention = retention
         self.conn = db_connection
-        self.data = self.load_data().drop_duplicates(subset=['Open'], keep='first')
-        
+        self.storage = storage or PostgresBarStore(db_connection)
+        self.source = source or YahooFinanceSource()
+        self.start = start
+        self.end = end
+        self.refresh = refresh or default_refresh_controller
+        # Bounded loads are partial views of the series and are never cached
+        self.cache = cache if start is None and end is None else None
+        self.base = None
+        if base_interval is not None:
+            self.base = TimeSeriesData(ticker, base_interval, db_connection, start, end, cache, refresh, storage,
+                                       source=self.source, retention=retention)
+            self.resampler = Resampler(interval, base_interval, calendar_for(ticker))
+            self.data = self.resampler.update(self.base.data)
+            return
+        data = self.cache.get(ticker, interval) if self.cache is not None else None
+        if data is None:
+            data = self.load_data(start, end)
+            # Only filter when needed, so bars mapped by the storage are not copied
+            duplicated = data.duplicated(subset=['Open'], keep='first')
+            if duplicated.any():
+                data = data[~duplicated]
+            if self.cache is not None:
+                self.cache.put(ticker, interval, data)
+        self.data = data
 
-    def load_data(self):
+    @property
+    def data(self) -> pd.DataFrame:
+        return self._data
+
+    @data.setter
+    def data(self, data: pd.DataFrame):
+        # Every new frame gets a new revision, a frame shared through the cache keeps its own
+        if data is not None:
+            stamp(data)
+        self._data = data
+
+    @property
+    def version(self) -> DataVersion:
+        """Cheap fingerprint of the current bars, indicators use it to reuse their results."""
+        return fingerprint(self.data)
+
+    def load_data(self, start: datetime = None, end: datetime = None):
 
-        query = """
-        SELECT date, open, high, low, close, volume
-        FROM DataTimeSeries
-        WHERE ticker = %s AND interval = %s
-        ORDER BY date ASC
-        """
         try:
-            data = pd.read_sql_query(query, self.conn, index_col='date', params=(self.ticker, self.interval))
-            if not data.empty:
-                logging.info(f"Loaded data from PostgreSQL for {self.ticker} with interval {self.interval}")        
+            # ticker_state tells whether the series is known without touching DataTimeSeries
+            state = self.storage.get_ticker_state(self.ticker, self.interval)
+            bars = self.storage.read_bars(self.ticker, self.interval, start, end) if state and state.row_count else None
+            if bars is not None and len(bars['date']) > 0:
+                logging.info(f"Loaded data from storage for {self.ticker} with interval {self.interval}")        
    
-                data = data.rename(columns={'open': 'Open', 'close': 'Close', 'high': 'High', 'low': 'Low', 'volume': 'Volume'})
-                return data
+                return bars_to_frame(bars)
             else:
-                logging.info(f"No data found in PostgreSQL for {self.ticker} with interval {self.interval}")
+                logging.info(f"No data found in storage for {self.ticker} with interval {self.interval}")
                 new_data = self.fetch_new_data()
                 return new_data
         except Exception as e:
-            logging.error(f"Error loading data from PostgreSQL: {e}")
+            logging.error(f"Error loading data from storage: {e}")
             new_data = self.fetch_new_data()
             return new_data
 
+    @classmethod
+    def load_many(cls, tickers: list, interval: str, db_connection, start: datetime = None, end: datetime = None,
+                  storage: BarStore = None) -> pd.DataFrame:
+        """
+        Load the stored bars of many tickers with a single query.
+
+        Returns a wide DataFrame indexed by the union of all dates with (field, ticker)
+        MultiIndex columns, e.g. panel['Close'] is a dates x tickers frame. Bars missing
+        for a ticker are NaN. Unlike the constructor, nothing is fetched from Yahoo Finance.
+        """
+        if interval not in cls.ALLOWED_INTERVALS:
+            raise ValueError(f"Interval '{interval}' is not allowed. Allowed values are: {', '.join(cls.ALLOWED_INTERVALS)}")
+        tickers = list(dict.fromkeys(tickers))
+        bars = (storage or PostgresBarStore(db_connection)).read_bars_many(tickers, interval, start, end)
+        logging.info(f"Loaded {len(bars['date'])} bars from storage for {len(tickers)} tickers with interval {interval}")
+
+        # Align every ticker on the union of dates
+        dates, row = np.unique(bars['date'], return_inverse=True)
+        fields = ['Open', 'High', 'Low', 'Close', 'Volume']
+        values = np.full((len(dates), len(fields) * len(tickers)), np.nan)
+        for i, field in enumerate(fields):
+            values[row, i * len(tickers) + bars['ticker']] = bars[field.lower()]
+
+        index = pd.DatetimeIndex(dates.astype('datetime64[ns]'), name='date').tz_localize('UTC')
+        columns = pd.MultiIndex.from_product([fields, tickers], names=['field', 'ticker'])
+        return pd.DataFrame(values, index=index, columns=columns, copy=False)
+
+    @classmethod
+    def fetch_many(cls, tickers: list, interval: str, db_connection, fetcher: BatchedFetcher = None,
+                   storage: BarStore = None, refresh: RefreshController = None) -> dict:
+        """
+        Fetch and store the bars of many tickers with batched, rate limited provider calls,
+        e.g. to refresh a whole universe before building TimeSeriesData instances.
+        Unknown or expired series get the full period, the others the bars since the
+        oldest of their last stored bars. Returns ticker -> number of stored bars.
+        """
+        storage = storage or PostgresBarStore(db_connection)
+        fetcher = fetcher or BatchedFetcher()
+        refresh = refresh or default_refresh_controller
+        cutoff_date = calculate_cutoff_date(calc_period(interval))
+        states = {ticker: storage.get_ticker_state(ticker, interval) for ticker in dict.fromkeys(tickers)}
+        full = [ticker for ticker, state in states.items()
+                if state is None or state.last_bar is None or state.last_bar < cutoff_date]
+        incremental = [ticker for ticker in states if ticker not in full]
+
+        fetched = fetcher.fetch_many(full, interval, period=calc_period(interval)) if full else {}
+        if incremental:
+            start = min(states[ticker].last_bar for ticker in incremental)
+            fetched.update(fetcher.fetch_many(incremental, interval, start=start))
+
+        written = {}
+        for ticker, data in fetched.items():
+            written[ticker] = storage.write_bars(ticker, interval, data)
+            storage.record_fetch(ticker, interval)
+            refresh.mark_refreshed(ticker, interval)
+        logging.info(f"Stored {sum(written.values())} bars for {len(written)} tickers with interval {interval}")
+        return written
+
     def fetch_new_data(self):
         # Fetch new data from Yahoo Finance
         logging.info(f"Fetching new data for {self.ticker} with interval {self.interval} and period {self.period}")
-        data = fetch_yahoo_finance_data(self.ticker, self.interval, self.period)
+        data = self.source.fetch(self.ticker, self.interval, period=self.period)
         self.cache_data(data)
+        self.storage.record_fetch(self.ticker, self.interval)
+        self.refresh.mark_refreshed(self.ticker, self.interval)
         return data
 
     def cache_data(self, data):
+        # Only bars newer than the last stored one are written, the rest already exist
+        last_stored = self.storage.get_last_date(self.ticker, self.interval)
+        if last_stored is not None:
+            data = data[pd.to_datetime(data.index, utc=True) > pd.Timestamp(last_stored)]
 
-        cursor = self.conn.cursor()
-
-        # Insert the data into PostgreSQL table
-        for index, row in data.iterrows():
-            cursor.execute("""
-            INSERT INTO DataTimeSeries (date, ticker, interval, open, high, low, close, volume)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT (date, ticker, interval) DO NOTHING
-            """, (index, self.ticker, self.interval, row['Open'], row['High'], row['Low'], row['Close'],
-                  row['Volume']))
-        self.conn.commit()
-        cursor.close()
-        logging.info(f"Cached data to PostgreSQL for {self.ticker} with interval {self.interval}")
+        # Bulk insert the data into the storage
+        inserted = self.storage.write_bars(self.ticker, self.interval, data)
+        logging.info(f"Cached {inserted} rows to storage for {self.ticker} with interval {self.interval}")
 
     
     def delete_old_data(self, cutoff_date):
-        # Delete data older than cutoff_date
+        # Delete data older than cutoff_date, skipped when ticker_state shows there is none
         logging.debug(f"Deleting data older than {cutoff_date}")
-        cursor = self.conn.cursor()
-        cursor.execute("""
-        DELETE FROM DataTimeSeries
-        WHERE date < %s AND ticker = %s AND interval = %s
-        """, (cutoff_date, self.ticker, self.interval))
-        self.conn.commit()
-        cursor.close()
-
-    def update_data(self):
+        deleted = self.storage.delete_bars_before(self.ticker, self.interval, cutoff_date)
+        if deleted:
+            logging.debug(f"Deleted {deleted} rows for {self.ticker} with interval {self.interval}")
+
+    def update_data(self, force: bool = False):
+        # Resampled series refresh their base bars and only re-aggregate the newest bucket onwards
+        if self.base is not None:
+            self.base.update_data(force)
+            self.data = self.resampler.update(self.base.data)
+            return
+
+        # Skip the refresh while the data is still fresh or no new bar can exist yet, unless forced.
+        # ticker_state holds the last stored bar and the last fetch of any process in one row
+        if not force:
+            state = self.storage.get_ticker_state(self.ticker, self.interval)
+            last_bar = state.last_bar if state and state.last_bar else self.data.index[-1]
+            refreshed_at = state.last_fetch_at if state else None
+            if self.refresh.is_fresh(self.ticker, self.interval, last_bar=last_bar, refreshed_at=refreshed_at):
+                logging.debug(f"Data for {self.ticker} with interval {self.interval} is fresh, skipping update")
+                return
+        # Concurrent callers for the same ticker/interval share a single refresh
+        self.data = self.refresh.run(self.ticker, self.interval, self._refresh_data)
+
+        if self.cache is not None:
+            self.cache.put(self.ticker, self.interval, self.data)
+
+    def _refresh_data(self):
         # Update data by fetching new data if needed
-        last_date = pd.to_datetime(self.data.index[-1])
+        data = self.data
+        last_date = pd.to_datetime(data.index[-1])
         cutoff_date = self.calculate_cutoff_date()
         self.delete_old_data(cutoff_date)
 
         if last_date < cutoff_date:
             logging.debug("Last data point is before cutoff date. Fetching new data for the entire period.")
-            self.data = self.fetch_new_data().drop_duplicates(subset=['Open'], keep='first')
+            data = self.fetch_new_data().drop_duplicates(subset=['Open'], keep='first')
         else:
-            new_data = fetch_yahoo_finance_data(ticker=self.ticker, start=last_date, interval=self.interval)
+            new_data = self.source.fetch(self.ticker, self.interval, start=last_date)
+            self.storage.record_fetch(self.ticker, self.interval)
             if (new_data.index[-1] - last_date) >= timedelta(hours=1) :
                 logging.debug("Last data point is after cutoff date. Fetching incremental data.")                
-                self.data = pd.concat([self.data, new_data]).drop_duplicates(subset=['Open'], keep='first')
-                self.data.index = pd.to_datetime(self.data.index, utc=True)
-            
-        self.cache_data(self.data)
+                data = pd.concat([data, new_data]).drop_duplicates(subset=['Open'], keep='first')
+                data.index = pd.to_datetime(data.index, utc=True)
+                self.cache_data(new_data)
+        return data
 
     def calc_period(self):
-        # Calculate the period based on interval
-        if self.interval == '1m':
-            return '7d'
-        elif self.interval in ['60m', '1h', '1d']:
-            return '1y'
-        else:
-            return '1mo'
+        return calc_period(self.interval)
     
     def calculate_cutoff_date(self) -> datetime:
-        # Calculate the cutoff date based on the period
-        if self.period == '7d':
-            return datetime.now(timezone.utc) - timedelta(days=7)
-        elif self.period == '1y':
-            return datetime.now(timezone.utc) - timedelta(days=365)
-        else:  # Default to '1mo'
-            return datetime.now(timezone.utc) - timedelta(days=30)
+        if self.retention is not None:
+            return datetime.now(timezone.utc) - self.retention
+        return calculate_cutoff_date(self.period)
@@ -3,12 +3,15 @@
 from .ao import AwesomeOscillator
 from .base import BaseIndicator
 from .bollinger import BollingerBands
+from .features import FeatureStore, default_feature_store
 from .ichimoku import IchimokuCloud
 from .keltner import KeltnerChannel
 from .ma import MovingAverage
 from .macd import MACD
+from .panel import Panel
 from .psar import PSAR
 from .rsi import RSI
+from .rules import RuleSet
 from .stochastic import StochasticOscillator
 from .volume import VolumeIndicator
 from .hold import Hold
@@ -17,12 +20,16 @@ __all__ = [
     "AwesomeOscillator",
     "BaseIndicator",
     "BollingerBands",
+    "FeatureStore",
+    "default_feature_store",
     "IchimokuCloud",
     "KeltnerChannel",
     "MovingAverage",
     "MACD",
+    "Panel",
     "PSAR",
     "RSI",
+    "RuleSet",
     "StochasticOscillator",
     "VolumeIndicator",
     "Hold"
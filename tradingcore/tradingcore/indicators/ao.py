@@ -2,33 +2,36 @@ import pandas as pd
 import pandas_ta as ta
 import numpy as np
 from .base import BaseIndicator
-import hashlib
+from .features import FeatureStore, default_feature_store, feature_name
+from tradingcore.utils.data_version import fingerprint
 
-class AwesomeOscillator:
+class AwesomeOscillator(BaseIndicator):
     POSSIBLE_STRATEGIES = [None,'SMA_Crossover']
 
-    def __init__(self, strategy: str = None):
+    def __init__(self, strategy: str = None, features: FeatureStore = None):
         self.strategy = strategy
         self.components = pd.DataFrame(columns=['AO', 'AO_Signal'])
-        self.data_hash = None
+        self.data_version = None
+        self.features = features or default_feature_store
 
-    def _hash_data(self, data):
-        return hashlib.sha256(pd.util.hash_pandas_object(data).values).hexdigest()
-    
     def setStrategy(self, strategy: str = None):
         if strategy not in self.POSSIBLE_STRATEGIES:
             raise ValueError(f"Strategy {strategy} is not allowed. Possible strategies: {self.POSSIBLE_STRATEGIES}")
         self.strategy = strategy
 
+    def lookback(self):
+        return 34 - 1
+
     def calculate(self, data: pd.DataFrame):
-        data_hash = self._hash_data(data)
+        data_version = fingerprint(data)
 
         # Check if the data has changed
-        if self.data_hash != data_hash:
-            self.data_hash = data_hash
+        if self.data_version != data_version:
+            self.data_version = data_version
             # Calculate short and long SMA
-            short_sma = ta.sma(data['Close'], length=5)
-            long_sma = ta.sma(data['Close'], length=34)
+            # Shared with MovingAverage('sma') of the same lengths
+            short_sma = self.features.get(data, feature_name('sma', 5), lambda: ta.sma(data['Close'], length=5))
+            long_sma = self.features.get(data, feature_name('sma', 34), lambda: ta.sma(data['Close'], length=34))
 
             # Calculate Awesome Oscillator (AO)
             ao = short_sma - long_sma
@@ -46,6 +49,8 @@ class AwesomeOscillator:
         
         if self.strategy == 'SMA_Crossover':
             # Additional logic for SMA crossover strategy
-            self.components['AO_Signal'] = self.components['AO'].apply(lambda x: 1 if x > 0 else (-1 if x < 0 else 0))
+            ao = self.components['AO'].to_numpy()
+            # 1 above zero, -1 below, 0 at zero and where AO is not defined yet
+            self.components['AO_Signal'] = np.where(ao > 0, 1, np.where(ao < 0, -1, 0))
 
         return self.components['AO_Signal']
\ No newline at end of file
@@ -1,6 +1,202 @@
+import copy
+import itertools
+import math
 import pandas as pd
 import pandas_ta as ta
 import numpy as np
+from .panel import Panel
+
+OHLCV = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# EMA/RMA smoothing never forgets the first bars, tails start early enough for their weight
+# to fall below this so that the values agree with the whole history to rounding
+CONVERGENCE = 1e-12
+
+def smoothing_lookback(alpha: float) -> int:
+    """Bars until the weight of the start of an EMA/RMA with alpha is below CONVERGENCE."""
+    return math.ceil(math.log(CONVERGENCE) / math.log(1.0 - alpha))
+
+def ema_lookback(length: int) -> int:
+    # ta.ema is seeded with the SMA of the first length values
+    return length - 1 + smoothing_lookback(2.0 / (length + 1))
+
+def ta_column(result: pd.DataFrame, prefix: str) -> pd.Series:
+    """Column of a pandas_ta result by prefix (e.g. 'ITS_'), the suffixes vary with the parameters and version."""
+    return result[next(column for column in result.columns if column.startswith(prefix))]
+
+def grid_frame(values, combinations: list, names: list, index: pd.Index) -> pd.DataFrame:
+    """Parameter combinations x bars."""
+    return pd.DataFrame(values, index=pd.MultiIndex.from_tuples(combinations, names=names), columns=index)
+
+class Columns(dict):
+    """Columns of data as read-only float arrays, each converted when first used."""
+
+    def __init__(self, data: pd.DataFrame):
+        super().__init__()
+        self.data = data
+
+    def __missing__(self, column):
+        values = self[column] = self.data[column].to_numpy(dtype=float)
+        values.flags.writeable = False
+        return values
+
+def lean(result, dtype):
+    """Signals as they are (int8), components (name -> values) as dtype, one array or a tuple like calculate()."""
+    if not isinstance(result, dict):
+        return result
+    arrays = tuple(values.astype(dtype, copy=False) for values in result.values())
+    return arrays[0] if len(arrays) == 1 else arrays
 
 class BaseIndicator:
     def calculate(self, data: pd.DataFrame):        raise NotImplementedError("Should implement calculate()")
+
+    def lookback(self):
+        """
+        Bars before a bar that its signal depends on, None when it depends on the whole
+        history. calculate_tail() evaluates only that many bars before the ones it returns.
+        """
+        return None
+
+    def calculate_tail(self, data: pd.DataFrame, bars: int = 1):
+        """calculate() for the last bars of data, evaluated over them and their lookback()."""
+        lookback = self.lookback()
+        if lookback is None:
+            result = self.calculate(data)
+        else:
+            evaluator = copy.copy(self)
+            # calculate() keeps the index of the first data it sees in components
+            evaluator.components = pd.DataFrame(columns=self.components.columns)
+            evaluator.data_version = None
+            result = evaluator.calculate(data.iloc[-(bars + lookback):])
+        if isinstance(result, tuple):
+            return tuple(series.iloc[-bars:] for series in result)
+        return result.iloc[-bars:]
+
+    def latest_signal(self, data: pd.DataFrame, bars: int = 64):
+        """
+        Last signal of data and the position of the first bar of its run, None when the run
+        goes back to the first bar. Tails of bars, doubled until they contain the change, are
+        evaluated instead of the whole history.
+        """
+        while True:
+            bars = min(bars, len(data))
+            signals = self.calculate_tail(data, bars).to_numpy()
+            changes = np.flatnonzero(signals != signals[-1])
+            if len(changes):
+                return signals[-1], len(data) - bars + changes[-1] + 1
+            if bars == len(data):
+                return signals[-1], None
+            bars *= 2
+
+    def calculate_arrays(self, data: pd.DataFrame, dtype=np.float64):
+        """
+        Read-only calculation mode: what calculate() returns as arrays aligned with the rows
+        of data, int8 signals or components as dtype (e.g. np.float32), data is not written.
+        This converts calculate(), indicators with an array implementation (shared with
+        panel()) override it and leave components and the feature store untouched.
+        """
+        result = self.calculate(data)
+        if self.strategy is not None:
+            return np.nan_to_num(result.to_numpy(dtype=float)).astype(np.int8)
+        return lean({i: series.to_numpy(dtype=float) for i, series in enumerate(result if isinstance(result, tuple) else (result,))},
+                    dtype)
+
+    @classmethod
+    def batch(cls, data: pd.DataFrame, strategy: str = None, **grid):
+        """
+        Evaluate every combination of the parameter values in grid (e.g. length=[10, 20]):
+        the signals of strategy as a frame of parameter combinations x bars or, without
+        strategy, such a frame per component. This runs one calculate() per combination,
+        indicators that share work between parameter values override it.
+        """
+        names = list(grid)
+        combinations = list(itertools.product(*grid.values()))
+        results = []
+        for combination in combinations:
+            result = cls(strategy, **dict(zip(names, combination))).calculate(data)
+            results.append(result if isinstance(result, tuple) else (result,))
+        if strategy is not None:
+            return grid_frame([result[0].to_numpy() for result in results], combinations, names, data.index)
+        return {series.name: grid_frame([result[i].to_numpy() for result in results], combinations, names, data.index)
+                for i, series in enumerate(results[0])}
+
+    @classmethod
+    def batch_arrays(cls, data: pd.DataFrame, strategy: str, grid: dict, per_call=(), **params):
+        """
+        batch() from the _arrays() that panel() uses: the parameters of grid are passed as
+        columns of values, one row per combination, over the bars of data. Those in per_call
+        (e.g. a type) get an _arrays() call per value instead, params are passed as they are.
+        """
+        names = list(grid)
+        combinations = list(itertools.product(*grid.values()))
+        groups = {}
+        for row, combination in enumerate(combinations):
+            values = dict(zip(names, combination))
+            groups.setdefault(tuple(values[name] for name in per_call), []).append(row)
+
+        fields, parts = Columns(data), []
+        for values, rows in groups.items():
+            columns = {name: np.array([combinations[row][i] for row in rows])[:, None]
+                       for i, name in enumerate(names) if name not in per_call}
+            parts.append((rows, cls._arrays(fields, strategy, **columns, **dict(zip(per_call, values)), **params)))
+
+        def stack(arrays):
+            # Rows of every call in the order of the combinations, values that do not depend on
+            # the parameters are one row shared by every combination
+            shape = (len(combinations), len(data))
+            if len(arrays) == 1 and arrays[0].shape == shape:
+                return arrays[0]
+            result = np.empty(shape, dtype=arrays[0].dtype)
+            for (rows, _), values in zip(parts, arrays):
+                result[rows] = values
+            return result
+
+        first = parts[0][1]
+        if isinstance(first, dict):
+            return {name: grid_frame(stack([arrays[name] for _, arrays in parts]), combinations, names, data.index)
+                    for name in first}
+        return grid_frame(stack([arrays for _, arrays in parts]), combinations, names, data.index)
+
+    @classmethod
+    def panel(cls, bars, strategy: str = None, **params):
+        """
+        Evaluate the indicator with the same parameters for every ticker of bars (ticker ->
+        frame, or a Panel of them): the signals of strategy as a frame of tickers x bars, 0
+        where a ticker has no bar, or without strategy such a frame per component, NaN there.
+        This runs one calculate() per ticker, indicators that compute every ticker in the same
+        array operations override it.
+        """
+        panel = Panel.of(bars)
+        results = []
+        for data in panel.bars.values():
+            result = cls(strategy, **params).calculate(data)
+            results.append(result if isinstance(result, tuple) else (result,))
+
+        def stack(i):
+            return panel.pack([result[i].to_numpy(dtype=float) for result in results])
+
+        if strategy is not None:
+            return panel.frame(np.nan_to_num(stack(0)).astype(np.int8))
+        return {series.name: panel.frame(stack(i)) for i, series in enumerate(results[0])}
+
+    def update(self, bar):
+        """
+        Advance the indicator by one bar (a mapping with the OHLCV keys, e.g. a row of the
+        data frame) and return what calculate() returns for that bar: the signal, or the
+        components when there is no strategy.
+        """
+        raise NotImplementedError("Should implement update()")
+
+    def snapshot(self):
+        """Copy of the streaming state of update(), see restore()."""
+        return copy.deepcopy(getattr(self, 'state', None))
+
+    def restore(self, snapshot):
+        """Go back to a snapshot(), e.g. to apply a revised version of the last bar."""
+        self.state = copy.deepcopy(snapshot)
+
+    def replay(self, data: pd.DataFrame) -> list:
+        """Reset the streaming state and update() with every bar of data."""
+        self.state = None
+        columns = [column for column in OHLCV if column in data.columns]
+        return [self.update(bar) for bar in data[columns].to_dict('records')]
@@ -1,18 +1,24 @@
+import math
 import pandas as pd
 import pandas_ta as ta
 import numpy as np
-from .base import BaseIndicator
-import hashlib
+from .base import BaseIndicator, Columns, lean, ta_column
+from .features import FeatureStore, default_feature_store, feature_name
+from .grid import rolling, signals
+from .panel import Panel
+from .streaming import RollingVar, Sma
+from tradingcore.utils.data_version import fingerprint
 
 class BollingerBands(BaseIndicator):
     POSSIBLE_STRATEGIES=[None,'Bollinger']
-    def __init__(self, strategy: str = None ):
+    def __init__(self, strategy: str = None, length: int = 20, std: float = 2.0, features: FeatureStore = None):
         self.strategy = strategy
+        self.length = length
+        self.std = std
         self.components = pd.DataFrame(columns=['Bollinger_Upper', 'Bollinger_Middle', 'Bollinger_Lower', 'Bollinger_width', 'Bollinger_std', 'Bollinger_Signal'])
-        self.data_hash = None
-
-    def _hash_data(self, data):
-        return hashlib.sha256(pd.util.hash_pandas_object(data).values).hexdigest()
+        self.data_version = None
+        self.features = features or default_feature_store
+        self.state = None  # Streaming state of update()
 
     def _compare(self, key, series1, series2, op):
         if key not in self.cache:
@@ -24,25 +30,30 @@ class BollingerBands(BaseIndicator):
             raise ValueError(f"Strategy {strategy} is not allowed. Possible strategies: {self.POSSIBLE_STRATEGIES}")
         self.strategy = strategy
 
+    def lookback(self):
+        return self.length - 1
+
     def calculate(self, data: pd.DataFrame):
-        data_hash = self._hash_data(data)
+        data_version = fingerprint(data)
         # Check if the data has changed
-        if self.data_hash != data_hash:
-            # print(f"Data has changed, old hash {self.data_hash} vs new hash {data_hash}. Recalculating Bollinger parameters.")
-            # Update the hash
-            self.data_hash = data_hash
+        if self.data_version != data_version:
+            # print(f"Data has changed, old version {self.data_version} vs new version {data_version}. Recalculating Bollinger parameters.")
+            # Update the version
+            self.data_version = data_version
 
             # Calcular Bandas de Bollinger
-            bbands_result = ta.bbands(data['Close'], length=20, std=2.0)
+            bbands_result = self.features.get(data, feature_name('bbands', self.length, self.std),
+                                              lambda: ta.bbands(data['Close'], length=self.length, std=self.std,
+                                                                lower_std=self.std, upper_std=self.std))
 
             # Asignar las columnas al DataFrame 'data' según sea necesario
-            self.components['Bollinger_Upper'] = bbands_result['BBU_20_2.0']
-            self.components['Bollinger_Middle'] = bbands_result['BBM_20_2.0']
-            self.components['Bollinger_Lower'] = bbands_result['BBL_20_2.0']
+            self.components['Bollinger_Upper'] = ta_column(bbands_result, 'BBU_')
+            self.components['Bollinger_Middle'] = ta_column(bbands_result, 'BBM_')
+            self.components['Bollinger_Lower'] = ta_column(bbands_result, 'BBL_')
 
             # Opcionalmente, si necesitas otras columnas como el ancho y la desviación estándar
-            self.components['Bollinger_width'] = bbands_result['BBB_20_2.0']
-            self.components['Bollinger_std'] = bbands_result['BBP_20_2.0']
+            self.components['Bollinger_width'] = ta_column(bbands_result, 'BBB_')
+            self.components['Bollinger_std'] = ta_column(bbands_result, 'BBP_')
         
         self.components['Bollinger_Signal'] = 0
          
@@ -56,3 +67,42 @@ class BollingerBands(BaseIndicator):
             self.components['Bollinger_Signal'] = np.where(data['Close'] > self.components['Bollinger_Upper'], -1, self.components['Bollinger_Signal'])  # Señal de venta
         
         return self.components['Bollinger_Signal']
+
+    @classmethod
+    def batch(cls, data: pd.DataFrame, strategy: str = None, length=(20,), std=(2.0,)):
+        return cls.batch_arrays(data, strategy, {'length': length, 'std': std})
+
+    @classmethod
+    def panel(cls, bars, strategy: str = None, length: int = 20, std: float = 2.0):
+        panel = Panel.of(bars)
+        return panel.frames(cls._arrays(panel, strategy, length, std))
+
+    def calculate_arrays(self, data: pd.DataFrame, dtype=np.float64):
+        return lean(self._arrays(Columns(data), self.strategy, self.length, self.std), dtype)
+
+    @staticmethod
+    def _arrays(fields, strategy, length, std):
+        close = fields['Close']
+        middle = rolling(close, length, 'mean')
+        deviation = std * np.sqrt(rolling(close, length, 'var'))
+        upper, lower = middle + deviation, middle - deviation
+
+        if strategy is None:
+            return {'Bollinger_Upper': upper, 'Bollinger_Middle': middle, 'Bollinger_Lower': lower}
+        if strategy == 'Bollinger':
+            return signals(close < lower, close > upper)
+        return np.zeros(middle.shape, dtype=np.int8)
+
+    def update(self, bar):
+        if self.state is None:
+            self.state = {'middle': Sma(self.length), 'var': RollingVar(self.length, ddof=1)}
+        close = bar['Close']
+        middle = self.state['middle'].push(close)
+        deviation = self.std * math.sqrt(self.state['var'].push(close))
+        upper, lower = middle + deviation, middle - deviation
+
+        if self.strategy is None:
+            return upper, middle, lower
+        if self.strategy == 'Bollinger':
+            return -1 if close > upper else (1 if close < lower else 0)
+        return 0
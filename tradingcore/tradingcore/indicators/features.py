@@ -0,0 +1,54 @@
+import threading
+from collections import OrderedDict
+import pandas as pd
+from tradingcore.utils.data_version import fingerprint
+
+class FeatureStore:
+    """
+    Named components computed from a set of bars (e.g. "ichimoku(9,26,52)", "psar(0.02,0.02,0.2)",
+    "rsi(14)"), memoised per data version so that every indicator and strategy evaluated
+    against the same bars computes each component once. The components of the last
+    max_versions versions are kept. Stored values are shared, callers must not modify them.
+    """
+
+    def __init__(self, max_versions: int = 16):
+        self.max_versions = max_versions
+        self._features = OrderedDict()  # DataVersion -> {name: value}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, data: pd.DataFrame, name: str, compute):
+        """Return the component name of data, calling compute() only the first time."""
+        version = fingerprint(data)
+        with self._lock:
+            features = self._features.get(version)
+            if features is None:
+                features = self._features[version] = {}
+                while len(self._features) > self.max_versions:
+                    self._features.popitem(last=False)
+            else:
+                self._features.move_to_end(version)
+            if name in features:
+                self.hits += 1
+                return features[name]
+            self.misses += 1
+        # Computed outside the lock, concurrent first requests may compute it twice
+        value = compute()
+        with self._lock:
+            return features.setdefault(name, value)
+
+    def clear(self):
+        with self._lock:
+            self._features.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'versions': len(self._features), 'features': sum(map(len, self._features.values())),
+                    'hits': self.hits, 'misses': self.misses}
+
+def feature_name(kind: str, *params) -> str:
+    return f"{kind}({','.join(str(param) for param in params)})"
+
+# Shared by every indicator of the process unless another store is given
+default_feature_store = FeatureStore()
@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+from . import kernels
+from .streaming import EPSILON
+
+# Building blocks of the batch() parameter grids and panel() ticker panels, rows of values
+# over bars. A parameter is a scalar, or a column of values with one row per parameter
+# combination as batch() passes them; work that does not depend on the parameters (prefix
+# sums, true range, rolling extremes of power-of-two windows) is then done once and shared
+# by every parameter value. Like streaming.py they follow the pandas implementations of
+# pandas_ta, not its TA-Lib ones.
+
+def per_row(function, values: np.ndarray, parameter) -> np.ndarray:
+    """
+    function(values, value) for a column of parameter values, once per distinct value over
+    the shared values (one row) or over the rows with that value.
+    """
+    values = np.asarray(values, dtype=float)
+    parameter = np.ravel(parameter)
+    if values.ndim == 1:
+        distinct, rows = np.unique(parameter, return_inverse=True)
+        computed = np.empty((len(distinct), values.shape[-1]))
+        for row, value in enumerate(distinct):
+            computed[row] = function(values, value.item())
+        # Gathered in the order of the parameter values, unless they are the distinct ones
+        return computed if np.array_equal(distinct, parameter) else computed[rows]
+    result = np.empty((len(parameter), values.shape[-1]))
+    for value in np.unique(parameter):
+        rows = parameter == value
+        result[rows] = function(values[rows], value.item())
+    return result
+
+def shift(values: np.ndarray, periods: int) -> np.ndarray:
+    """Series.shift(periods) along the last axis."""
+    if np.ndim(periods):
+        return per_row(shift, values, periods)
+    values = np.asarray(values, dtype=float)
+    n = values.shape[-1]
+    result = np.full(values.shape, np.nan)
+    if periods >= 0:
+        result[..., periods:] = values[..., :max(n - periods, 0)]
+    else:
+        result[..., :periods] = values[..., -periods:]
+    return result
+
+def first_valid(values: np.ndarray) -> np.ndarray:
+    """Position of the first non-NaN value along the last axis, its length when there is none."""
+    valid = ~np.isnan(values)
+    return np.where(valid.any(axis=-1), valid.argmax(axis=-1), values.shape[-1])
+
+def rolling(values: np.ndarray, length: int, method: str) -> np.ndarray:
+    """Series.rolling(length).<method>() of every row, the rows are the columns of one frame."""
+    values = np.asarray(values, dtype=float)
+    if np.ndim(length):
+        if values.ndim == 1 and method == 'mean' and not np.isnan(values).any():
+            # Every length from one prefix sum
+            lengths = np.unique(length)
+            means = dict(zip(lengths.tolist(), rolling_means(values, lengths)))
+            return per_row(lambda _, length: means[length], values, length)
+        if values.ndim == 1 and method in ('max', 'min'):
+            extremes = RollingExtremes(values, highest=method == 'max')
+            return per_row(lambda _, length: extremes.window(length), values, length)
+        return per_row(lambda values, length: rolling(values, length, method), values, length)
+    frame = pd.DataFrame(values.reshape(-1, values.shape[-1]).T)
+    return getattr(frame.rolling(length), method)().to_numpy().T.reshape(values.shape)
+
+def non_zero_range(high: np.ndarray, low: np.ndarray) -> np.ndarray:
+    """pandas_ta non_zero_range() of every row: epsilon is added to a whole row with a zero range."""
+    difference = high - low
+    return difference + EPSILON * (difference == 0).any(axis=-1, keepdims=True)
+
+def rolling_means(values: np.ndarray, lengths: list) -> np.ndarray:
+    """Rolling means for every length (rows) from one prefix sum of values."""
+    lengths = np.asarray(lengths)
+    # Sums relative to the first value keep the prefix sums small
+    base = values[0]
+    sums = np.concatenate([[0.0], np.cumsum(values - base)])
+    end = np.arange(1, len(values) + 1)
+    start = end[None, :] - lengths[:, None]
+    means = (sums[end][None, :] - sums[np.maximum(start, 0)]) / lengths[:, None] + base
+    means[start < 0] = np.nan
+    return means
+
+def ema(values: np.ndarray, length: int) -> np.ndarray:
+    """ta.ema(length) along the last axis, each row starting at its first valid value like ta.macd."""
+    if np.ndim(length):
+        return per_row(ema, values, length)
+    # Explicit copy, the array of a Series can be a read-only view under copy-on-write
+    values = np.asarray(values, dtype=float).copy()
+    rows = values.reshape(-1, values.shape[-1])
+    # Each row is seeded with the SMA of its first length values
+    start = first_valid(rows)
+    seed = start + length - 1
+    seeded = np.flatnonzero(seed < rows.shape[1])
+    means = rows[seeded[:, None], start[seeded, None] + np.arange(length)].mean(axis=1)
+    rows[np.arange(rows.shape[1]) < seed[:, None]] = np.nan
+    rows[seeded, seed[seeded]] = means
+    return kernels.ewm(rows, (length - 1) / 2.0).reshape(values.shape)
+
+def rma(values: np.ndarray, length: int) -> np.ndarray:
+    """ta.rma(length) along the last axis."""
+    if np.ndim(length):
+        return per_row(rma, values, length)
+    return kernels.rma(values, length)
+
+def rsi(values: np.ndarray, length: int) -> np.ndarray:
+    """ta.rsi(length) along the last axis, the price changes are shared by every length."""
+    return kernels.rsi(values, length, average=rma)
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """ta.true_range() along the last axis."""
+    previous_close = shift(close, 1)
+    ranges = np.abs(non_zero_range(high, low)), np.abs(high - previous_close), np.abs(previous_close - low)
+    # Maximum skipping NaN like DataFrame.max(axis=1)
+    return np.fmax(np.fmax(ranges[0], ranges[1]), ranges[2])
+
+def midprice(high: np.ndarray, low: np.ndarray, length: int) -> np.ndarray:
+    """Mean of the rolling highest high and lowest low along the last axis, as the Ichimoku lines."""
+    if np.ndim(length) and np.ndim(high) == 1:
+        # Each length once, from the same power-of-two windows
+        highest, lowest = RollingExtremes(high), RollingExtremes(low, highest=False)
+        return per_row(lambda _, length: 0.5 * (lowest.window(length) + highest.window(length)), high, length)
+    return 0.5 * (rolling(low, length, 'min') + rolling(high, length, 'max'))
+
+def psar(high: np.ndarray, low: np.ndarray, close: np.ndarray):
+    """kernels.psar() of every row over the bars it has, the others stay NaN."""
+    long, short = np.full(close.shape, np.nan), np.full(close.shape, np.nan)
+    rows = [values.reshape(-1, close.shape[-1]) for values in (high, low, close, long, short)]
+    for high_row, low_row, close_row, long_row, short_row in zip(*rows):
+        bars = ~np.isnan(close_row)
+        if bars.all():
+            long_row[:], short_row[:] = kernels.psar(high_row, low_row, close_row)
+        else:
+            long_row[bars], short_row[bars] = kernels.psar(high_row[bars], low_row[bars], close_row[bars])
+    return long, short
+
+class RollingExtremes:
+    """
+    Rolling max (or min) of values for any window length. Extremes of power-of-two windows
+    are computed once, the extreme of any window is that of two overlapping ones.
+    """
+
+    def __init__(self, values: np.ndarray, highest: bool = True):
+        self.op = np.maximum if highest else np.minimum
+        self.levels = [np.asarray(values, dtype=float)]
+
+    def window(self, length: int) -> np.ndarray:
+        level = length.bit_length() - 1
+        while len(self.levels) <= level:
+            previous, half = self.levels[-1], 1 << (len(self.levels) - 1)
+            self.levels.append(np.concatenate([np.full(min(half, len(previous)), np.nan),
+                                              self.op(previous[half:], previous[:-half])]))
+        values = self.levels[level]
+        overlap = length - (1 << level)
+        result = np.full(len(values), np.nan)
+        result[length - 1:] = self.op(values[length - 1:], values[length - 1 - overlap:len(values) - overlap])
+        return result
+
+def signals(buy, sell) -> np.ndarray:
+    """int8 signals, sell conditions are applied last in calculate() so they win over buy conditions."""
+    buy, sell = np.broadcast_arrays(buy, sell)
+    result = np.zeros(buy.shape, dtype=np.int8)
+    result[buy] = 1
+    result[sell] = -1
+    return result
@@ -2,7 +2,6 @@ import pandas as pd
 import pandas_ta as ta
 import numpy as np
 from .base import BaseIndicator
-import hashlib
 
 class Hold(BaseIndicator):
     POSSIBLE_STRATEGIES = [None, 'Hold']
@@ -10,7 +9,7 @@ class Hold(BaseIndicator):
     def __init__(self, strategy: str = None):
         self.strategy = strategy
         self.components = None
-        self.data_hash = None
+        self.data_version = None
         self.cache = {}
     
     def calculate(self, data: pd.DataFrame):
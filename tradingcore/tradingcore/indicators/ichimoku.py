@@ -1,27 +1,65 @@
+from collections import deque
+import functools
 import pandas as pd
 import pandas_ta as ta
 import numpy as np
-from .base import BaseIndicator
+from .base import BaseIndicator, Columns, lean, ta_column
+from . import grid
+from .grid import midprice, shift
+from .panel import Panel
 from .psar import PSAR
-import hashlib
+from .rules import RuleSet
+from .features import FeatureStore, default_feature_store, feature_name
+from .streaming import MidPrice, Psar, nan
+from tradingcore.utils.data_version import fingerprint
 
 
+# Buy and sell conditions of the strategies, see Readme.md. Chikou_26 and Close_26 are
+# Chikou and Close 26 bars back.
+RULES = RuleSet({
+    'Ichimoku': (['Tenkan > Kijun', 'Close > SenkouA', 'Close > SenkouB'],
+                 ['Tenkan < Kijun', 'Close < SenkouA', 'Close < SenkouB']),
+    'Kumo': (['Close > SenkouA', 'Close > SenkouB'],
+             ['Close < SenkouA', 'Close < SenkouB']),
+    'KumoChikou': (['Close > SenkouA', 'Close > SenkouB', 'Chikou_26 > Close_26'],
+                   ['Close < SenkouA', 'Close < SenkouB', 'Chikou_26 < Close_26']),
+    'Kijun': (['Kijun < Close'],
+              ['Kijun > Close']),
+    'KijunPSAR': (['Kijun < Close', 'Close > PSAR_Long'],
+                  ['Kijun > Close', 'Close < PSAR_Short']),
+    # Bad strat
+    'TenkanKijun': (['Kijun < Close', 'Tenkan > Kijun'],
+                    ['Kijun > Close', 'Tenkan < Kijun']),
+    'KumoTenkanKijun': (['Tenkan > Kijun', 'Close > SenkouA', 'Close > SenkouB'],
+                        ['Tenkan < Kijun', 'Close < SenkouA', 'Close < SenkouB']),
+    # Bad strat
+    'TenkanKijunPSAR': (['Kijun < Close', 'Tenkan > Kijun', 'Close > PSAR_Long'],
+                        ['Kijun > Close', 'Tenkan < Kijun', 'Close < PSAR_Short']),
+    'KumoTenkanKijunPSAR': (['Kijun < Close', 'Tenkan > Kijun', 'Close > SenkouA', 'Close > SenkouB', 'Close > PSAR_Long'],
+                            ['Kijun > Close', 'Tenkan < Kijun', 'Close < SenkouA', 'Close < SenkouB', 'Close < PSAR_Short']),
+    'KumoKiyunPSAR': (['Kijun < Close', 'Close > SenkouA', 'Close > SenkouB', 'Close > PSAR_Long'],
+                      ['Kijun > Close', 'Close < SenkouA', 'Close < SenkouB', 'Close < PSAR_Short']),
+    'KumoChikouPSAR': (['Close > SenkouA', 'Close > SenkouB', 'Chikou_26 > Close_26', 'Close > PSAR_Long'],
+                       ['Close < SenkouA', 'Close < SenkouB', 'Chikou_26 < Close_26', 'Close < PSAR_Short']),
+    'KumoKiyunChikouPSAR': (['Kijun < Close', 'Close > SenkouA', 'Close > SenkouB', 'Chikou_26 > Close_26', 'Close > PSAR_Long'],
+                            ['Kijun > Close', 'Close < SenkouA', 'Close < SenkouB', 'Chikou_26 < Close_26', 'Close < PSAR_Short']),
+})
+
 class IchimokuCloud(BaseIndicator):
     POSSIBLE_STRATEGIES=[None,'Ichimoku','Kumo','KumoChikou','Kijun','KijunPSAR','TenkanKijun','KumoTenkanKijun',
                         'TenkanKijunPSAR' ,'KumoTenkanKijunPSAR','KumoKiyunPSAR','KumoChikouPSAR','KumoKiyunChikouPSAR']
     # POSSIBLE_STRATEGIES+=['Ichimoku2', 'Kumo2', 'KumoChikou2', 'Kijun2', 'KijunPSAR2', 'TenkanKijun2', 'KumoTenkanKijun2', 'TenkanKijunPSAR2', 'KumoTenkanKijunPSAR2', 'KumoKiyunPSAR2', 'KumoChikouPSAR2', 'KumoKiyunChikouPSAR2']
     # POSSIBLE_STRATEGIES+=['KumoTenkanKijun2','KumoTenkanKijun3','KumoTenkanKijun4','KumoTenkanKijun5','KumoTenkanKijun6']
-    def __init__(self, strategy: str = None, tenkan=9, kijun=26, senkou=52, include_chikou=True):
+    def __init__(self, strategy: str = None, tenkan=9, kijun=26, senkou=52, include_chikou=True, features: FeatureStore = None):
         self.strategy = strategy
         self.tenkan = tenkan
         self.kijun = kijun
         self.senkou = senkou
         self.chikou = include_chikou
         self.components = pd.DataFrame(columns=['Ichimoku_Tenkan', 'Ichimoku_Kijun', 'Ichimoku_SenkouA', 'Ichimoku_SenkouB', 'Ichimoku_Chikou', 'Ichimoku_Signal'])
-        self.data_hash = None
-
-    def _hash_data(self, data):
-        return hashlib.sha256(pd.util.hash_pandas_object(data).values).hexdigest()
+        self.data_version = None
+        self.features = features or default_feature_store
+        self.state = None  # Streaming state of update()
 
     def _compare(self, key, series1, series2, op):
         if key not in self.cache:
@@ -33,23 +71,37 @@ class IchimokuCloud(BaseIndicator):
             raise ValueError(f"Strategy {strategy} is not allowed. Possible strategies: {self.POSSIBLE_STRATEGIES}")
         self.strategy = strategy
 
+    def lookback(self):
+        if self.strategy is not None and 'PSAR' in self.strategy:
+            return PSAR().lookback()
+        # Senkou spans are shifted kijun - 1 bars forward, Chikou strategies look 26 bars back
+        return max((self.senkou - 1) + (self.kijun - 1), 26)
+
+    def feature(self):
+        return feature_name('ichimoku', self.tenkan, self.kijun, self.senkou, self.chikou)
+
+    def ichimoku(self, data: pd.DataFrame):
+        return ta.ichimoku(data['High'], data['Low'], data['Close'],
+                           tenkan=self.tenkan, kijun=self.kijun, senkou=self.senkou, include_chikou=self.chikou)
+
     def calculate(self, data: pd.DataFrame):
-        data_hash = self._hash_data(data)
+        data_version = fingerprint(data)
         # Check if the data has changed
-        if self.data_hash != data_hash:
-            # print(f"Data has changed, old hash {self.data_hash} vs new hash {data_hash}. Recalculating Ichimoku parameters.")
-            # Update the hash
-            self.data_hash = data_hash
+        if self.data_version != data_version:
+            # print(f"Data has changed, old version {self.data_version} vs new version {data_version}. Recalculating Ichimoku parameters.")
+            # Update the version
+            self.data_version = data_version
             # Calculate Ichimoku components
-            ichimokudf, spandf = ta.ichimoku(data['High'], data['Low'], data['Close'],
-                                             tenkan=self.tenkan, kijun=self.kijun, senkou=self.senkou, include_chikou=self.chikou)
+            # Shared by every Ichimoku strategy evaluated on the same bars
+            ichimokudf, spandf = self.features.get(data, self.feature(), lambda: self.ichimoku(data))
 
             # Assign Ichimoku components to the DataFrame
-            self.components['Ichimoku_Tenkan'] = ichimokudf['ITS_9']
-            self.components['Ichimoku_Kijun'] = ichimokudf['IKS_26']
-            self.components['Ichimoku_SenkouA'] = ichimokudf['ISA_9']
-            self.components['Ichimoku_SenkouB'] = ichimokudf['ISB_26']
-            self.components['Ichimoku_Chikou'] = ichimokudf['ICS_26']
+            self.components['Ichimoku_Tenkan'] = ta_column(ichimokudf, 'ITS_')
+            self.components['Ichimoku_Kijun'] = ta_column(ichimokudf, 'IKS_')
+            self.components['Ichimoku_SenkouA'] = ta_column(ichimokudf, 'ISA_')
+            self.components['Ichimoku_SenkouB'] = ta_column(ichimokudf, 'ISB_')
+            if self.chikou:
+                self.components['Ichimoku_Chikou'] = ta_column(ichimokudf, 'ICS_')
 
         self.components['Ichimoku_Signal'] = 0
          
@@ -57,213 +109,102 @@ class IchimokuCloud(BaseIndicator):
         if self.strategy is None:            
             return self.components['Ichimoku_Tenkan'], self.components['Ichimoku_Kijun'], self.components['Ichimoku_SenkouA'], self.components['Ichimoku_SenkouB'], self.components['Ichimoku_Chikou']
 
-        # Apply different strategies based on the strategy parameter
-        if self.strategy == 'Ichimoku':
-            # Buy signal: Tenkan-sen > Kijun-sen and price > Senkou Span A and price > Senkou Span B
-            self.components['Ichimoku_Signal'] = np.where(
-                (self.components['Ichimoku_Tenkan'] > self.components['Ichimoku_Kijun']) & 
-                (data['Close'] > self.components['Ichimoku_SenkouA']) & 
-                (data['Close'] > self.components['Ichimoku_SenkouB']), 
-                1, self.components['Ichimoku_Signal'])
-            
-            # Sell signal: Tenkan-sen < Kijun-sen and price < Senkou Span A and price < Senkou Span B
-            self.components['Ichimoku_Signal'] = np.where(
-                (self.components['Ichimoku_Tenkan'] < self.components['Ichimoku_Kijun']) & 
-                (data['Close'] < self.components['Ichimoku_SenkouA']) & 
-                (data['Close'] < self.components['Ichimoku_SenkouB']), 
-                -1, self.components['Ichimoku_Signal'])
-        
-        elif self.strategy == 'Kumo':
-            # Buy signal: Price > Senkou Span A and price > Senkou Span B
-            self.components['Ichimoku_Signal'] = np.where(
-                (data['Close'] > self.components['Ichimoku_SenkouA']) & 
-                (data['Close'] > self.components['Ichimoku_SenkouB']), 
-                1, self.components['Ichimoku_Signal'])
-            
-            # Sell signal: Price < Senkou Span A and price > Senkou Span B
-            self.components['Ichimoku_Signal'] = np.where(
-                (data['Close'] < self.components['Ichimoku_SenkouA']) & 
-                (data['Close'] < self.components['Ichimoku_SenkouB']), 
-                -1, self.components['Ichimoku_Signal'])
-        
-        elif self.strategy == 'KumoChikou':
-            # Buy signal: Price > Senkou Span A, price > Senkou Span B, and Chikou Span > price 26 periods ago
-            self.components['Ichimoku_Signal'] = np.where(
-                (data['Close'] > self.components['Ichimoku_SenkouA']) &  
-                (data['Close'] > self.components['Ichimoku_SenkouB']) & 
-                (self.components['Ichimoku_Chikou'].shift(26) > data['Close'].shift(26)), 
-                1, self.components['Ichimoku_Signal'])
-            
-            # Sell signal: Price < Senkou Span A, price > Senkou Span B, and Chikou Span < price 26 periods ago
-            self.components['Ichimoku_Signal'] = np.where(
-                (data['Close'] < self.components['Ichimoku_SenkouA']) & 
-                (data['Close'] < self.components['Ichimoku_SenkouB']) &  
-                (self.components['Ichimoku_Chikou'].shift(26) < data['Close'].shift(26)), 
-                -1, self.components['Ichimoku_Signal'])
-        
-        elif self.strategy == 'Kijun':
-            # Buy signal: Price > Kijun
-            self.components['Ichimoku_Signal'] = np.where(
-                self.components['Ichimoku_Kijun'] < data['Close'], 
-                1, self.components['Ichimoku_Signal'])
-            
-            # Sell signal: Price < Kijun-sen
-            self.components['Ichimoku_Signal'] = np.where(
-                self.components['Ichimoku_Kijun'] > data['Close'], 
-                -1, self.components['Ichimoku_Signal'])
-        
-        elif self.strategy == 'KijunPSAR':
-            # Calculate PSAR indicator
-            self.components['PSAR_Long'], self.components['PSAR_Short'] = PSAR().calculate(data)
-            # Buy signal: Price > Kijun
-            self.components['Ichimoku_Signal'] = np.where(
-                (self.components['Ichimoku_Kijun'] < data['Close']) &
-                (data['Close'] > self.components['PSAR_Long']), 
-                1, self.components['Ichimoku_Signal'])
-            
-            # Sell signal: Price < Kijun-sen
-            self.components['Ichimoku_Signal'] = np.where(
-                (self.components['Ichimoku_Kijun'] > data['Close']) &
-                (data['Close'] < self.components['PSAR_Short']), 
-                -1, self.components['Ichimoku_Signal'])
-        
-        # Bad strat
-        elif self.strategy == 'TenkanKijun':
-            # Buy signal: Tenkan-sen > Kijun-sen
-            self.components['Ichimoku_Signal'] = np.where(
-                (self.components['Ichimoku_Kijun'] < data['Close']) &
-                (self.components['Ichimoku_Tenkan'] > self.components['Ichimoku_Kijun']), 
-                1, self.components['Ichimoku_Signal'])
-            
-            # Sell signal: Tenkan-sen < Kijun-sen
-            self.components['Ichimoku_Signal'] = np.where(
-                (self.components['Ichimoku_Kijun'] > data['Close']) &
-                (self.components['Ichimoku_Tenkan'] < self.components['Ichimoku_Kijun']), 
-                -1, self.components['Ichimoku_Signal'])
-
-        elif self.strategy == 'KumoTenkanKijun':
-            # Buy signal: Tenkan-sen > Kijun-sen
-            self.components['Ichimoku_Signal'] = np.where(
-                (self.components['Ichimoku_Tenkan'] > self.components['Ichimoku_Kijun']) &
-                (data['Close'] > self.components['Ichimoku_SenkouA']) &
-                (data['Close'] > self.components['Ichimoku_SenkouB']), 
-                1, self.components['Ichimoku_Signal'])
-            
-            # Sell signal: Tenkan-sen < Kijun-sen
-            self.components['Ichimoku_Signal'] = np.where(
-                (self.components['Ichimoku_Tenkan'] < self.components['Ichimoku_Kijun']) &
-                (data['Close'] < self.components['Ichimoku_SenkouA']) & 
-                (data['Close'] < self.components['Ichimoku_SenkouB']), 
-                -1, self.components['Ichimoku_Signal'])   
-            
-        # Bad strat
-        elif self.strategy == 'TenkanKijunPSAR':
-            # Calculate PSAR indicator
-            self.components['PSAR_Long'], self.components['PSAR_Short'] = PSAR().calculate(data)
-            
-            # Buy signal: Tenkan-sen > Kijun-sen and price > PSAR
-            self.components['Ichimoku_Signal'] = np.where(
-                (self.components['Ichimoku_Kijun'] < data['Close']) &
-                (self.components['Ichimoku_Tenkan'] > self.components['Ichimoku_Kijun']) & 
-                (data['Close'] > self.components['PSAR_Long']), 
-                1, self.components['Ichimoku_Signal'])
-            
-            # Sell signal: Tenkan-sen < Kijun-sen and price < PSAR
-            self.components['Ichimoku_Signal'] = np.where(
-                (self.components['Ichimoku_Kijun'] > data['Close']) &
-                (self.components['Ichimoku_Tenkan'] < self.components['Ichimoku_Kijun']) & 
-                (data['Close'] < self.components['PSAR_Short']), 
-                -1, self.components['Ichimoku_Signal'])
-            
-        elif self.strategy == 'KumoTenkanKijunPSAR':
-            # Calculate PSAR indicator
-            self.components['PSAR_Long'], self.components['PSAR_Short'] = PSAR().calculate(data)
-            
-            # Buy signal: Tenkan-sen > Kijun-sen and price > PSAR
-            self.components['Ichimoku_Signal'] = np.where(
-                (self.components['Ichimoku_Kijun'] < data['Close']) &
-                (self.components['Ichimoku_Tenkan'] > self.components['Ichimoku_Kijun']) & 
-                ((data['Close'] > self.components['Ichimoku_SenkouA']) & 
-                (data['Close'] > self.components['Ichimoku_SenkouB'])) &
-                (data['Close'] > self.components['PSAR_Long']), 
-                1, self.components['Ichimoku_Signal'])
-            
-            # Sell signal: Tenkan-sen < Kijun-sen and price < PSAR
-            self.components['Ichimoku_Signal'] = np.where(
-                (self.components['Ichimoku_Kijun'] > data['Close']) &
-                (self.components['Ichimoku_Tenkan'] < self.components['Ichimoku_Kijun']) & 
-                (data['Close'] < self.components['Ichimoku_SenkouA']) &
-                (data['Close'] < self.components['Ichimoku_SenkouB']) &
-                (data['Close'] < self.components['PSAR_Short']), 
-                -1, self.components['Ichimoku_Signal'])
-            
-        elif self.strategy == 'KumoKiyunPSAR':
-            # Calculate PSAR indicator
-            self.components['PSAR_Long'], self.components['PSAR_Short'] = PSAR().calculate(data)
-            
-            # Buy signal: Tenkan-sen > Kijun-sen and price > PSAR
-            self.components['Ichimoku_Signal'] = np.where(
-                (self.components['Ichimoku_Kijun'] < data['Close']) &
-                (data['Close'] > self.components['Ichimoku_SenkouA']) &
-                (data['Close'] > self.components['Ichimoku_SenkouB']) &
-                (data['Close'] > self.components['PSAR_Long']), 
-                1, self.components['Ichimoku_Signal'])
-            
-            # Sell signal: Tenkan-sen < Kijun-sen and price < PSAR
-            self.components['Ichimoku_Signal'] = np.where(
-                (self.components['Ichimoku_Kijun'] > data['Close']) &
-                (data['Close'] < self.components['Ichimoku_SenkouA']) &
-                (data['Close'] < self.components['Ichimoku_SenkouB']) &
-                (data['Close'] < self.components['PSAR_Short']), 
-                -1, self.components['Ichimoku_Signal'])
-            
-        elif self.strategy == 'KumoChikouPSAR':
-            # Calculate PSAR indicator
-            self.components['PSAR_Long'], self.components['PSAR_Short'] = PSAR().calculate(data)
-            
-            # Buy signal: Price > Senkou Span A, price > Senkou Span B, and Chikou Span > price 26 periods ago
-            self.components['Ichimoku_Signal'] = np.where(
-                (data['Close'] > self.components['Ichimoku_SenkouA']) &  
-                (data['Close'] > self.components['Ichimoku_SenkouB']) &  
-                (self.components['Ichimoku_Chikou'].shift(26) > data['Close'].shift(26))&
-                (data['Close'] > self.components['PSAR_Long']), 
-                1, self.components['Ichimoku_Signal'])
-            
-            # Sell signal: Price < Senkou Span A, price > Senkou Span B, and Chikou Span < price 26 periods ago
-            self.components['Ichimoku_Signal'] = np.where(
-                (data['Close'] < self.components['Ichimoku_SenkouA']) & 
-                (data['Close'] < self.components['Ichimoku_SenkouB']) &  
-                (self.components['Ichimoku_Chikou'].shift(26) < data['Close'].shift(26)) &
-                (data['Close'] < self.components['PSAR_Short']),  
-                -1, self.components['Ichimoku_Signal'])
-            
-        elif self.strategy == 'KumoKiyunChikouPSAR':
-            # Calculate PSAR indicator
-            self.components['PSAR_Long'], self.components['PSAR_Short'] = PSAR().calculate(data)
-            
-            # Buy signal: Price > Senkou Span A, price > Senkou Span B, and Chikou Span > price 26 periods ago
-            self.components['Ichimoku_Signal'] = np.where(
-                (self.components['Ichimoku_Kijun'] < data['Close']) &
-                (data['Close'] > self.components['Ichimoku_SenkouA']) &  
-                (data['Close'] > self.components['Ichimoku_SenkouB']) &  
-                (self.components['Ichimoku_Chikou'].shift(26) > data['Close'].shift(26))&
-                (data['Close'] > self.components['PSAR_Long']), 
-                1, self.components['Ichimoku_Signal'])
-            
-            # Sell signal: Price < Senkou Span A, price > Senkou Span B, and Chikou Span < price 26 periods ago
-            self.components['Ichimoku_Signal'] = np.where(
-                (self.components['Ichimoku_Kijun'] > data['Close']) &
-                (data['Close'] < self.components['Ichimoku_SenkouA']) & 
-                (data['Close'] < self.components['Ichimoku_SenkouB']) &  
-                (self.components['Ichimoku_Chikou'].shift(26) < data['Close'].shift(26)) &
-                (data['Close'] < self.components['PSAR_Short']),  
-                -1, self.components['Ichimoku_Signal'])
-            
-            ########################
-            ########################
-            #########TESTING########
-            ########################
-            ########################        
-        
-        
+        masks = self.masks(data)
+        if 'PSAR_Long' in RULES.names(self.strategy):
+            self.components['PSAR_Long'], self.components['PSAR_Short'] = masks.value('PSAR_Long'), masks.value('PSAR_Short')
+        self.components['Ichimoku_Signal'] = masks.signal(self.strategy)
         return self.components['Ichimoku_Signal']
+
+    def masks(self, data: pd.DataFrame):
+        """
+        Condition masks of RULES over data. They are kept in the feature store, so every
+        strategy evaluated on the same bars shares the conditions already computed.
+        """
+        def values():
+            ichimokudf, _ = self.features.get(data, self.feature(), lambda: self.ichimoku(data))
+            close = data['Close'].to_numpy(dtype=float)
+            chikou = ta_column(ichimokudf, 'ICS_').to_numpy(dtype=float) if self.chikou else np.full(len(close), np.nan)
+            psar = lambda: PSAR(features=self.features).calculate(data)
+            return {'Close': close,
+                    'Tenkan': ta_column(ichimokudf, 'ITS_').to_numpy(dtype=float),
+                    'Kijun': ta_column(ichimokudf, 'IKS_').to_numpy(dtype=float),
+                    'SenkouA': ta_column(ichimokudf, 'ISA_').to_numpy(dtype=float),
+                    'SenkouB': ta_column(ichimokudf, 'ISB_').to_numpy(dtype=float),
+                    # Chikou and Close 26 bars back
+                    'Chikou_26': lambda: shift(chikou, 26), 'Close_26': lambda: shift(close, 26),
+                    'PSAR_Long': lambda: psar()[0].to_numpy(dtype=float),
+                    'PSAR_Short': lambda: psar()[1].to_numpy(dtype=float)}
+
+        return self.features.get(data, feature_name('ichimoku_masks', self.tenkan, self.kijun, self.senkou, self.chikou),
+                                 lambda: RULES.masks(values()))
+
+    def calculate_strategies(self, data: pd.DataFrame, strategies: list = None) -> pd.DataFrame:
+        """Signals of every strategy (default POSSIBLE_STRATEGIES) on data, one column each."""
+        masks = self.masks(data)
+        strategies = strategies or self.POSSIBLE_STRATEGIES[1:]
+        return pd.DataFrame({strategy: masks.signal(strategy) for strategy in strategies}, index=data.index)
+
+    @classmethod
+    def batch(cls, data: pd.DataFrame, strategy: str = None, tenkan=(9,), kijun=(26,), senkou=(52,)):
+        return cls.batch_arrays(data, strategy, {'tenkan': tenkan, 'kijun': kijun, 'senkou': senkou}, include_chikou=True)
+
+    @classmethod
+    def panel(cls, bars, strategy: str = None, tenkan: int = 9, kijun: int = 26, senkou: int = 52, include_chikou: bool = True):
+        panel = Panel.of(bars)
+        return panel.frames(cls._arrays(panel, strategy, tenkan, kijun, senkou, include_chikou))
+
+    def calculate_arrays(self, data: pd.DataFrame, dtype=np.float64):
+        return lean(self._arrays(Columns(data), self.strategy, self.tenkan, self.kijun, self.senkou, self.chikou), dtype)
+
+    @staticmethod
+    def _arrays(fields, strategy, tenkan, kijun, senkou, include_chikou):
+        high, low, close = fields['High'], fields['Low'], fields['Close']
+        tenkans, kijuns = midprice(high, low, tenkan), midprice(high, low, kijun)
+        # Spans are shifted kijun - 1 bars forward
+        senkou_a, senkou_b = shift(0.5 * (tenkans + kijuns), kijun - 1), shift(midprice(high, low, senkou), kijun - 1)
+        chikou = shift(close, -(kijun - 1)) if include_chikou else np.full(close.shape, np.nan)
+
+        if strategy is None:
+            return {'Ichimoku_Tenkan': tenkans, 'Ichimoku_Kijun': kijuns, 'Ichimoku_SenkouA': senkou_a,
+                    'Ichimoku_SenkouB': senkou_b, 'Ichimoku_Chikou': chikou}
+        psar = functools.cache(lambda: grid.psar(high, low, close))
+        masks = RULES.masks({'Close': close, 'Tenkan': tenkans, 'Kijun': kijuns, 'SenkouA': senkou_a, 'SenkouB': senkou_b,
+                             # Chikou and Close 26 bars back
+                             'Chikou_26': lambda: shift(chikou, 26), 'Close_26': lambda: shift(close, 26),
+                             'PSAR_Long': lambda: psar()[0], 'PSAR_Short': lambda: psar()[1]})
+        signal = masks.signal(strategy)
+        return signal if signal.ndim else np.zeros(close.shape, dtype=np.int8)
+
+    def update(self, bar):
+        """
+        Chikou of the current bar is the Close kijun - 1 bars ahead, so it is returned as
+        NaN; the strategies only use it 26 bars back, which is known.
+        """
+        if self.state is None:
+            self.state = {'tenkan': MidPrice(self.tenkan), 'kijun': MidPrice(self.kijun), 'senkou': MidPrice(self.senkou),
+                          # Spans are shifted kijun - 1 bars forward
+                          'span_a': deque(maxlen=self.kijun), 'span_b': deque(maxlen=self.kijun),
+                          'closes': deque(maxlen=27), 'psar': Psar(af0=0.02, max_af=0.2)}
+        state = self.state
+        high, low, close = bar['High'], bar['Low'], bar['Close']
+        tenkan = state['tenkan'].push(high, low)
+        kijun = state['kijun'].push(high, low)
+        state['span_a'].append(0.5 * (tenkan + kijun))
+        state['span_b'].append(state['senkou'].push(high, low))
+        full = len(state['span_a']) == self.kijun
+        senkou_a, senkou_b = (state['span_a'][0], state['span_b'][0]) if full else (nan, nan)
+
+        closes = state['closes']
+        closes.append(close)
+        # Chikou and Close 26 bars back, Chikou then is the Close kijun - 1 bars after it
+        lagged = len(closes) == 27
+        close_26 = closes[0] if lagged else nan
+        chikou_26 = closes[self.kijun - 1] if lagged and self.kijun <= 27 else nan
+        psar_long, psar_short = state['psar'].push(high, low, close)
+
+        if self.strategy is None:
+            return tenkan, kijun, senkou_a, senkou_b, nan
+
+        return RULES.signal(self.strategy, {'Close': close, 'Tenkan': tenkan, 'Kijun': kijun, 'SenkouA': senkou_a,
+                                            'SenkouB': senkou_b, 'Chikou_26': chikou_26, 'Close_26': close_26,
+                                            'PSAR_Long': psar_long, 'PSAR_Short': psar_short})
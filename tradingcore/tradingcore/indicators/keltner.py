@@ -1,20 +1,25 @@
 import pandas as pd
 import pandas_ta as ta
 import numpy as np
-from .base import BaseIndicator
-import hashlib
+from .base import BaseIndicator, Columns, ema_lookback, lean, ta_column
+from .features import FeatureStore, default_feature_store, feature_name
+from .grid import ema, signals, true_range
+from .panel import Panel
+from .streaming import Ema, nan, non_zero
+from tradingcore.utils.data_version import fingerprint
 
 class KeltnerChannel(BaseIndicator):
     POSSIBLE_STRATEGIES=[None,'KC']
-    def __init__(self, strategy: str = None):
+    def __init__(self, strategy: str = None, length: int = 20, scalar: float = 2.0, features: FeatureStore = None):
         self.strategy = strategy
+        self.length = length
+        self.scalar = scalar
         self.components = pd.DataFrame(columns=['KC_Middle', 'KC_Upper', 'KC_Lower', 'KC_Signal'])
-        self.data_hash = None
+        self.data_version = None
         self.cache = {}
+        self.features = features or default_feature_store
+        self.state = None  # Streaming state of update()
 
-    def _hash_data(self, data):
-        return hashlib.sha256(pd.util.hash_pandas_object(data).values).hexdigest()
-    
     def setStrategy(self, strategy: str = None):
         if strategy not in self.POSSIBLE_STRATEGIES:
             raise ValueError(f"Strategy {strategy} is not allowed. Possible strategies: {self.POSSIBLE_STRATEGIES}")
@@ -25,17 +30,23 @@ class KeltnerChannel(BaseIndicator):
             self.cache[key] = op(series1, series2)
         return self.cache[key]
 
+    def lookback(self):
+        # The true range needs the previous close
+        return ema_lookback(self.length) + 1
+
     def calculate(self, data: pd.DataFrame):
-        data_hash = self._hash_data(data)
+        data_version = fingerprint(data)
         # Check if the data has changed
-        if self.data_hash != data_hash:
-            # Update the hash
-            self.data_hash = data_hash
-            kc_result = ta.kc(data['High'], data['Low'], data['Close'], length=20, scalar=2.0)
+        if self.data_version != data_version:
+            # Update the version
+            self.data_version = data_version
+            kc_result = self.features.get(data, feature_name('kc', self.length, self.scalar),
+                                          lambda: ta.kc(data['High'], data['Low'], data['Close'],
+                                                        length=self.length, scalar=self.scalar))
             # Assign Keltner Channels to the DataFrameD
-            self.components['KC_Middle'] = kc_result['KCBe_20_2.0']
-            self.components['KC_Upper'] = kc_result['KCUe_20_2.0']
-            self.components['KC_Lower'] = kc_result['KCLe_20_2.0']
+            self.components['KC_Middle'] = ta_column(kc_result, 'KCBe_')
+            self.components['KC_Upper'] = ta_column(kc_result, 'KCUe_')
+            self.components['KC_Lower'] = ta_column(kc_result, 'KCLe_')
         
         self.components['KC_Signal'] = 0
 
@@ -55,3 +66,49 @@ class KeltnerChannel(BaseIndicator):
                 (data['Close'] < self.components['KC_Lower']), 
                 -1, self.components['KC_Signal'])
         return self.components['KC_Signal']
+
+    @classmethod
+    def batch(cls, data: pd.DataFrame, strategy: str = None, length=(20,), scalar=(2.0,)):
+        return cls.batch_arrays(data, strategy, {'length': length, 'scalar': scalar})
+
+    @classmethod
+    def panel(cls, bars, strategy: str = None, length: int = 20, scalar: float = 2.0):
+        panel = Panel.of(bars)
+        return panel.frames(cls._arrays(panel, strategy, length, scalar))
+
+    def calculate_arrays(self, data: pd.DataFrame, dtype=np.float64):
+        return lean(self._arrays(Columns(data), self.strategy, self.length, self.scalar), dtype)
+
+    @staticmethod
+    def _arrays(fields, strategy, length, scalar):
+        close = fields['Close']
+        middle = ema(close, length)
+        band = scalar * ema(true_range(fields['High'], fields['Low'], close), length)
+        upper, lower = middle + band, middle - band
+
+        if strategy is None:
+            return {'KC_Middle': middle, 'KC_Upper': upper, 'KC_Lower': lower}
+        if strategy == 'KC':
+            return signals(close > upper, close < lower)
+        return np.zeros(middle.shape, dtype=np.int8)
+
+    def update(self, bar):
+        if self.state is None:
+            self.state = {'basis': Ema(self.length), 'band': Ema(self.length), 'close': nan}
+        state = self.state
+        high, low, close = bar['High'], bar['Low'], bar['Close']
+        # True range, the first bar only has its high-low range
+        previous_close = state['close']
+        true_range = abs(non_zero(high - low))
+        if previous_close == previous_close:
+            true_range = max(true_range, abs(high - previous_close), abs(previous_close - low))
+        state['close'] = close
+        middle = state['basis'].push(close)
+        band = state['band'].push(true_range)
+        upper, lower = middle + self.scalar * band, middle - self.scalar * band
+
+        if self.strategy is None:
+            return middle, upper, lower
+        if self.strategy == 'KC':
+            return -1 if close < lower else (1 if close > upper else 0)
+        return 0
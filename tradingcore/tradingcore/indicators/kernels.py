@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+
+try:
+    import numba
+except ImportError:  # Optional, the loops run as plain Python and the smoothing in pandas without it
+    numba = None
+
+# Sequential calculations (PSAR, EWM smoothing, the backtest loop) that cannot be
+# vectorised. Each loop is written once: with numba it is compiled at the first call,
+# without it the Python version runs over lists, which index faster than arrays.
+# Results are those of the pandas implementations of pandas_ta.
+
+BACKEND = 'numba' if numba is not None else 'python'
+EPSILON = np.finfo(float).eps
+
+def jit(func):
+    return numba.njit(cache=True)(func) if numba is not None else func
+
+def ewm_loop(values, com):
+    """Series.ewm(com=com, adjust=False).mean() of an array."""
+    n = len(values)
+    result = np.empty(n)
+    if n == 0:
+        return result
+    # Same arithmetic as pandas: constant runs stay exact, NaN keeps decaying the old weight
+    alpha = 1.0 / (1.0 + com)
+    weighted = values[0]
+    old_wt = 1.0
+    result[0] = weighted
+    for i in range(1, n):
+        x = values[i]
+        if weighted == weighted:
+            old_wt *= 1.0 - alpha
+            if x == x:
+                if weighted != x:
+                    weighted = (old_wt * weighted + alpha * x) / (old_wt + alpha)
+                old_wt = 1.0
+        elif x == x:
+            weighted = x
+        result[i] = weighted
+    return result
+
+def psar_loop(high, low, close, af0, max_af):
+    """Long and short SAR of ta.psar(high, low, close, af0, af0, max_af)."""
+    n = len(high)
+    long = np.full(n, np.nan)
+    short = np.full(n, np.nan)
+    if n == 0:
+        return long, short
+    # Initial trend from the -DM of the first two bars
+    falling = False
+    if n > 1:
+        up, down = high[1] - high[0], low[0] - low[1]
+        falling = down > up and down >= EPSILON
+    ep = low[0] if falling else high[0]
+    sar = close[0]
+    af = af0
+    for i in range(1, n):
+        sar = sar + af * (ep - sar)
+        if falling:
+            reverse = high[i] > sar
+            if low[i] < ep:
+                ep = low[i]
+                af = min(af + af0, max_af)
+            sar = max(high[i - 1], sar)
+        else:
+            reverse = low[i] < sar
+            if high[i] > ep:
+                ep = high[i]
+                af = min(af + af0, max_af)
+            sar = min(low[i - 1], sar)
+        if reverse:
+            sar = ep
+            af = af0
+            falling = not falling
+            ep = low[i] if falling else high[i]
+        if falling:
+            short[i] = sar
+        else:
+            long[i] = sar
+    return long, short
+
+def backtest_loop(signals, opens, initial_capital, purchase_fraction, sell_fraction, take_profit):
+    """Capital and holdings after trading signals at the next open, see Backtester.run_backtest()."""
+    capital = initial_capital
+    holdings = 0.0
+    max_holdings = 0.0
+    price_bought = 0.0
+    for i in range(len(signals) - 1):
+        if capital > 0.0 and signals[i] == 1:  # Comprar
+            amount_to_spend = min(capital, max(initial_capital, capital) * purchase_fraction)
+            shares_bought = amount_to_spend / opens[i + 1]
+            price_bought = ((opens[i + 1] * shares_bought) + (price_bought * holdings)) / (shares_bought + holdings)
+            holdings += shares_bought
+            capital -= amount_to_spend
+            # Logica para vender fracciones
+            if max_holdings < holdings:
+                max_holdings = holdings
+        elif holdings > 0.0 and signals[i] == -1 and (price_bought * take_profit) < opens[i + 1]:  # Vender
+            shares_to_sell = min(holdings, max((max_holdings * sell_fraction), (initial_capital * purchase_fraction)))
+            holdings -= shares_to_sell
+            capital += shares_to_sell * opens[i + 1]
+            # Logica para vender fracciones
+            if holdings == 0:
+                max_holdings = holdings
+    return capital, holdings
+
+_ewm, _psar, _backtest = jit(ewm_loop), jit(psar_loop), jit(backtest_loop)
+
+def values_of(values):
+    # Float arrays for numba (one compiled version), lists of the values for the Python loops
+    if numba is not None:
+        return np.asarray(values, dtype=float)
+    return np.asarray(values).tolist()
+
+def ewm(values, com: float) -> np.ndarray:
+    """ewm_loop() along the last axis."""
+    values = np.asarray(values, dtype=float)
+    rows = values.reshape(-1, values.shape[-1])
+    if numba is None:
+        # The rows as the columns of one frame
+        result = pd.DataFrame(rows.T).ewm(com=com, adjust=False).mean().to_numpy().T
+    else:
+        result = np.empty(rows.shape)
+        for row in range(len(rows)):
+            result[row] = _ewm(rows[row], float(com))
+    return result.reshape(values.shape)
+
+def ema(values, length: int) -> np.ndarray:
+    """ta.ema(length), seeded with the SMA of the first length values."""
+    # Explicit copy, the array of a Series can be a read-only view under copy-on-write
+    values = np.asarray(values, dtype=float).copy()
+    if len(values) < length:
+        return np.full(len(values), np.nan)
+    values[length - 1] = values[:length].mean()
+    values[:length - 1] = np.nan
+    return ewm(values, (length - 1) / 2.0)
+
+def rma(values, length: int) -> np.ndarray:
+    """ta.rma(length)."""
+    alpha = 1.0 / length
+    return ewm(values, (1.0 - alpha) / alpha)
+
+def rsi(close, length: int, average=rma) -> np.ndarray:
+    """ta.rsi(length) along the last axis, average smooths the gains and the losses."""
+    change = np.diff(np.asarray(close, dtype=float), axis=-1, prepend=np.nan)
+    positive_avg = average(np.where(change < 0, 0.0, change), length)
+    negative_avg = average(np.where(change > 0, 0.0, change), length)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100 * positive_avg / (positive_avg + np.abs(negative_avg))
+
+def psar(high, low, close, af0: float = 0.02, max_af: float = 0.2):
+    """Long and short SAR of ta.psar(high, low, close, af0=af0, af=af0, max_af=max_af)."""
+    return _psar(values_of(high), values_of(low), values_of(close), float(af0), float(max_af))
+
+def backtest(signals, opens, initial_capital: float, purchase_fraction: float, sell_fraction: float, take_profit: float):
+    return _backtest(values_of(signals), values_of(opens), float(initial_capital), float(purchase_fraction),
+                     float(sell_fraction), float(take_profit))
@@ -1,37 +1,47 @@
 import pandas as pd
 import pandas_ta as ta
 import numpy as np
-from .base import BaseIndicator
-import hashlib
+from . import kernels
+from .base import BaseIndicator, Columns, ema_lookback, lean
+from .features import FeatureStore, default_feature_store, feature_name
+from .grid import ema, rolling, signals
+from .panel import Panel
+from .streaming import Ema, Sma
+from tradingcore.utils.data_version import fingerprint
 
 class MovingAverage(BaseIndicator):
     POSSIBLE_STRATEGIES=[None,'MA']
-    def __init__(self, strategy: str = None, length: int = 50, ma_type: str = 'sma'):
+    def __init__(self, strategy: str = None, length: int = 50, ma_type: str = 'sma', features: FeatureStore = None):
         self.strategy = strategy
         self.length = length
         self.ma_type = ma_type
         self.components = pd.DataFrame(columns=['MA', 'MA_Signal'])
-        self.data_hash = None
+        self.data_version = None
         self.cache = {}
+        self.features = features or default_feature_store
+        self.state = None  # Streaming state of update()
 
-    def _hash_data(self, data):
-        return hashlib.sha256(pd.util.hash_pandas_object(data).values).hexdigest()
-    
     def setStrategy(self, strategy: str = None):
         if strategy not in self.POSSIBLE_STRATEGIES:
             raise ValueError(f"Strategy {strategy} is not allowed. Possible strategies: {self.POSSIBLE_STRATEGIES}")
         self.strategy = strategy
 
+    def lookback(self):
+        return ema_lookback(self.length) if self.ma_type == 'ema' else self.length - 1
+
     def calculate(self, data: pd.DataFrame):
-        data_hash = self._hash_data(data)
+        data_version = fingerprint(data)
         # Check if the data has changed
-        if self.data_hash != data_hash:
-            # Update the hash
-            self.data_hash = data_hash
+        if self.data_version != data_version:
+            # Update the version
+            self.data_version = data_version
             if self.ma_type == 'sma':
-                ma_result = ta.sma(data['Close'], length=self.length)
+                ma_result = self.features.get(data, feature_name('sma', self.length),
+                                              lambda: ta.sma(data['Close'], length=self.length))
             elif self.ma_type == 'ema':
-                ma_result = ta.ema(data['Close'], length=self.length)
+                ma_result = self.features.get(data, feature_name('ema', self.length),
+                                              lambda: pd.Series(kernels.ema(data['Close'], self.length),
+                                                                index=data.index, name=f"EMA_{self.length}"))
             else:
                 raise ValueError("Unsupported MA type")
             # Assign MA to the DataFrame
@@ -55,3 +65,48 @@ class MovingAverage(BaseIndicator):
                 (data['Close'] < self.components['MA']), 
                 -1, self.components['MA_Signal'])
         return self.components['MA_Signal']
+
+    @classmethod
+    def batch(cls, data: pd.DataFrame, strategy: str = None, length=(50,), ma_type=('sma',)):
+        return cls.batch_arrays(data, strategy, {'length': length, 'ma_type': ma_type}, per_call=['ma_type'])
+
+    @classmethod
+    def panel(cls, bars, strategy: str = None, length: int = 50, ma_type: str = 'sma'):
+        panel = Panel.of(bars)
+        return panel.frames(cls._arrays(panel, strategy, length, ma_type))
+
+    def calculate_arrays(self, data: pd.DataFrame, dtype=np.float64):
+        return lean(self._arrays(Columns(data), self.strategy, self.length, self.ma_type), dtype)
+
+    @staticmethod
+    def _arrays(fields, strategy, length, ma_type):
+        close = fields['Close']
+        if ma_type == 'sma':
+            ma = rolling(close, length, 'mean')
+        elif ma_type == 'ema':
+            ma = ema(close, length)
+        else:
+            raise ValueError("Unsupported MA type")
+
+        if strategy is None:
+            return {'MA': ma}
+        if strategy == 'MA':
+            return signals(close > ma, close < ma)
+        return np.zeros(ma.shape, dtype=np.int8)
+
+    def update(self, bar):
+        if self.state is None:
+            if self.ma_type == 'sma':
+                self.state = {'ma': Sma(self.length)}
+            elif self.ma_type == 'ema':
+                self.state = {'ma': Ema(self.length)}
+            else:
+                raise ValueError("Unsupported MA type")
+        close = bar['Close']
+        ma = self.state['ma'].push(close)
+
+        if self.strategy is None:
+            return ma
+        if self.strategy == 'MA':
+            return -1 if close < ma else (1 if close > ma else 0)
+        return 0
@@ -1,39 +1,46 @@
 import pandas as pd
 import pandas_ta as ta
 import numpy as np
-from .base import BaseIndicator
-import hashlib
+from .base import BaseIndicator, Columns, ema_lookback, lean, ta_column
+from .features import FeatureStore, default_feature_store, feature_name
+from .grid import ema, signals
+from .panel import Panel
+from .streaming import Ema
+from tradingcore.utils.data_version import fingerprint
 
 class MACD(BaseIndicator):
     POSSIBLE_STRATEGIES=[None,'MACD']
-    def __init__(self, strategy: str = None, fast: int = 12, slow: int = 26, signal: int = 9):
+    def __init__(self, strategy: str = None, fast: int = 12, slow: int = 26, signal: int = 9, features: FeatureStore = None):
         self.strategy = strategy
         self.fast = fast
         self.slow = slow
         self.signal = signal
         self.components = pd.DataFrame(columns=['MACD', 'MACD_Signal', 'MACD_Hist', 'MACD_Strategy_Signal'])
-        self.data_hash = None
+        self.data_version = None
         self.cache = {}
+        self.features = features or default_feature_store
+        self.state = None  # Streaming state of update()
 
-    def _hash_data(self, data):
-        return hashlib.sha256(pd.util.hash_pandas_object(data).values).hexdigest()
-    
     def setStrategy(self, strategy: str = None):
         if strategy not in self.POSSIBLE_STRATEGIES:
             raise ValueError(f"Strategy {strategy} is not allowed. Possible strategies: {self.POSSIBLE_STRATEGIES}")
         self.strategy = strategy
 
+    def lookback(self):
+        return ema_lookback(max(self.fast, self.slow)) + ema_lookback(self.signal)
+
     def calculate(self, data: pd.DataFrame):
-        data_hash = self._hash_data(data)
+        data_version = fingerprint(data)
         # Check if the data has changed
-        if self.data_hash != data_hash:
-            # Update the hash
-            self.data_hash = data_hash
-            macd_result = ta.macd(data['Close'], fast=self.fast, slow=self.slow, signal=self.signal)
+        if self.data_version != data_version:
+            # Update the version
+            self.data_version = data_version
+            macd_result = self.features.get(data, feature_name('macd', self.fast, self.slow, self.signal),
+                                            lambda: ta.macd(data['Close'], fast=self.fast, slow=self.slow, signal=self.signal))
             # Assign MACD components to the DataFrame
-            self.components['MACD'] = macd_result['MACD_12_26_9']
-            self.components['MACD_Signal'] = macd_result['MACDs_12_26_9']
-            self.components['MACD_Hist'] = macd_result['MACDh_12_26_9']
+            self.components['MACD'] = ta_column(macd_result, 'MACD_')
+            self.components['MACD_Signal'] = ta_column(macd_result, 'MACDs_')
+            self.components['MACD_Hist'] = ta_column(macd_result, 'MACDh_')
 
         self.components['MACD_Strategy_Signal'] = 0
 
@@ -53,3 +60,44 @@ class MACD(BaseIndicator):
                 (self.components['MACD'] < self.components['MACD_Signal']), 
                 -1, self.components['MACD_Strategy_Signal'])
         return self.components['MACD_Strategy_Signal']
+
+    @classmethod
+    def batch(cls, data: pd.DataFrame, strategy: str = None, fast=(12,), slow=(26,), signal=(9,)):
+        return cls.batch_arrays(data, strategy, {'fast': fast, 'slow': slow, 'signal': signal})
+
+    @classmethod
+    def panel(cls, bars, strategy: str = None, fast: int = 12, slow: int = 26, signal: int = 9):
+        panel = Panel.of(bars)
+        return panel.frames(cls._arrays(panel, strategy, fast, slow, signal))
+
+    def calculate_arrays(self, data: pd.DataFrame, dtype=np.float64):
+        return lean(self._arrays(Columns(data), self.strategy, self.fast, self.slow, self.signal), dtype)
+
+    @staticmethod
+    def _arrays(fields, strategy, fast, slow, signal):
+        close = fields['Close']
+        fast, slow = np.minimum(fast, slow), np.maximum(fast, slow)
+        macd = ema(close, fast) - ema(close, slow)
+        signal_line = ema(macd, signal)
+
+        if strategy is None:
+            return {'MACD': macd, 'MACD_Signal': signal_line, 'MACD_Hist': macd - signal_line}
+        if strategy == 'MACD':
+            return signals(macd > signal_line, macd < signal_line)
+        return np.zeros(macd.shape, dtype=np.int8)
+
+    def update(self, bar):
+        if self.state is None:
+            fast, slow = sorted([self.fast, self.slow])
+            self.state = {'fast': Ema(fast), 'slow': Ema(slow), 'signal': Ema(self.signal)}
+        state = self.state
+        macd = state['fast'].push(bar['Close']) - state['slow'].push(bar['Close'])
+        # The signal line starts at the first MACD value
+        signal = state['signal'].push(macd) if macd == macd else macd
+        histogram = macd - signal
+
+        if self.strategy is None:
+            return macd, signal, histogram
+        if self.strategy == 'MACD':
+            return -1 if macd < signal else (1 if macd > signal else 0)
+        return 0
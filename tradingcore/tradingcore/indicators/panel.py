@@ -0,0 +1,74 @@
+from functools import reduce
+import numpy as np
+import pandas as pd
+
+class Panel:
+    """
+    OHLCV bars of several tickers (ticker -> frame) as arrays of tickers x bars. Build it once
+    to pass it to the panel() of every indicator of a screen, each field is packed the first
+    time it is used.
+
+    Each row holds the bars of its ticker from the first column on, NaN after its last one,
+    so rolling windows and smoothings run over the ticker's own bars like calculate() does,
+    whatever bars the other tickers have (different holidays, halts, later listings).
+    frame() puts the rows back on the union of the bars of every ticker.
+    """
+
+    def __init__(self, bars: dict):
+        self.bars = dict(bars)
+        self.tickers = pd.Index(list(self.bars), name='ticker')
+        indexes = [data.index for data in self.bars.values()]
+        self.index = reduce(lambda index, other: index.union(other), indexes) if indexes else pd.Index([])
+        self.lengths = np.array([len(data) for data in self.bars.values()], dtype=int)
+        self.width = int(self.lengths.max()) if len(self.lengths) else 0
+        self.fields = {}
+        self._scatter = None
+
+    @classmethod
+    def of(cls, bars) -> 'Panel':
+        return bars if isinstance(bars, cls) else cls(bars)
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        if field not in self.fields:
+            self.fields[field] = self.pack([data[field].to_numpy(dtype=float) for data in self.bars.values()])
+        return self.fields[field]
+
+    def pack(self, rows: list) -> np.ndarray:
+        """Tickers x width array of one row of values per ticker over its own bars, NaN after them."""
+        if all(length == self.width for length in self.lengths):
+            return np.array(rows, dtype=float).reshape(len(rows), self.width)
+        packed = np.full((len(rows), self.width), np.nan)
+        for row, values in zip(packed, rows):
+            row[:len(values)] = values
+        return packed
+
+    def frames(self, result):
+        """frame() of signals, or of every component of name -> values."""
+        if isinstance(result, dict):
+            return {name: self.frame(values) for name, values in result.items()}
+        return self.frame(result)
+
+    def frame(self, values) -> pd.DataFrame:
+        """
+        Tickers x bars of the union from packed rows, NaN (0 for signals) where a ticker has
+        no bar.
+        """
+        values = np.asarray(values)
+        if self.width == len(self.index) and (self.lengths == self.width).all():
+            # Every ticker has every bar
+            return pd.DataFrame(values, index=self.tickers, columns=self.index)
+        if self._scatter is None:
+            # (row, packed column) of every bar and its column in the union
+            rows = np.repeat(np.arange(len(self.tickers)), self.lengths)
+            packed = np.concatenate([np.arange(length) for length in self.lengths]) if len(self.lengths) else rows
+            union = np.concatenate([self.index.get_indexer(data.index) for data in self.bars.values()]) \
+                if len(self.lengths) else rows
+            self._scatter = rows, packed, union
+        rows, packed, union = self._scatter
+        signals = values.dtype.kind in 'iub'
+        result = np.full((len(self.tickers), len(self.index)), 0 if signals else np.nan, dtype=values.dtype if signals else float)
+        result[rows, union] = values[rows, packed]
+        return pd.DataFrame(result, index=self.tickers, columns=self.index)
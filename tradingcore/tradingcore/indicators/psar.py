@@ -1,18 +1,21 @@
 import pandas as pd
-import pandas_ta as ta
 import numpy as np
-from .base import BaseIndicator
-import hashlib
+from . import grid, kernels
+from .base import BaseIndicator, Columns, lean
+from .features import FeatureStore, default_feature_store, feature_name
+from .grid import signals
+from .panel import Panel
+from .streaming import Psar
+from tradingcore.utils.data_version import fingerprint
 
 class PSAR(BaseIndicator):
     POSSIBLE_STRATEGIES=[None,'PSAR']
-    def __init__(self, strategy: str = None ):
+    def __init__(self, strategy: str = None, features: FeatureStore = None):
         self.strategy = strategy
         self.components = pd.DataFrame(columns=['PSAR_Long','PSAR_Short','PSAR_Signal'])
-        self.data_hash = None
-
-    def _hash_data(self, data):
-        return hashlib.sha256(pd.util.hash_pandas_object(data).values).hexdigest()
+        self.data_version = None
+        self.features = features or default_feature_store
+        self.state = None  # Streaming state of update()
 
     def _compare(self, key, series1, series2, op):
         if key not in self.cache:
@@ -24,23 +27,32 @@ class PSAR(BaseIndicator):
             raise ValueError(f"Strategy {strategy} is not allowed. Possible strategies: {self.POSSIBLE_STRATEGIES}")
         self.strategy = strategy
 
+    def lookback(self):
+        # Each SAR depends on the trend since the last reversal, which has no bound
+        return None
+
+    def psar(self, data: pd.DataFrame) -> pd.DataFrame:
+        # ta.psar(af0=0.02, af=0.02, max_af=0.2) in the compiled kernel
+        long, short = kernels.psar(data['High'], data['Low'], data['Close'], af0=0.02, max_af=0.2)
+        return pd.DataFrame({'PSAR_Long': long, 'PSAR_Short': short}, index=data.index)
+
     def calculate(self, data: pd.DataFrame):
-        data_hash = self._hash_data(data)
+        data_version = fingerprint(data)
         # Check if the data has changed
-        if self.data_hash != data_hash:
+        if self.data_version != data_version:
             #print("Data has changed. Recalculating PSAR parameters.")
-            # Update the hash
-            self.data_hash = data_hash      
-            psar_result = ta.psar(data['High'], data['Low'], data['Close'], af0=0.02, af=0.02, max_af=0.2)        
+            # Update the version
+            self.data_version = data_version      
+            psar_result = self.features.get(data, feature_name('psar', 0.02, 0.02, 0.2), lambda: self.psar(data))
             # Assign PSAR components to the DataFrame
-            self.components['PSAR_Long'] = psar_result['PSARl_0.02_0.2']
-            self.components['PSAR_Short'] = psar_result['PSARs_0.02_0.2']
+            self.components['PSAR_Long'] = psar_result['PSAR_Long']
+            self.components['PSAR_Short'] = psar_result['PSAR_Short']
         
         self.components['PSAR_Signal'] = 0
 
         # If no strategy return results
         if self.strategy is None:
-            return psar_result['PSARl_0.02_0.2'], psar_result['PSARs_0.02_0.2']
+            return self.components['PSAR_Long'], self.components['PSAR_Short']
 
         # Apply different strategies based on the strategy parameter
         if self.strategy == 'PSAR':
@@ -54,3 +66,35 @@ class PSAR(BaseIndicator):
                 (data['Close'] < self.components['PSAR_Short']), 
                 -1, self.components['PSAR_Signal'])
         return self.components['PSAR_Signal']
+
+    @classmethod
+    def panel(cls, bars, strategy: str = None):
+        panel = Panel.of(bars)
+        return panel.frames(cls._arrays(panel, strategy))
+
+    def calculate_arrays(self, data: pd.DataFrame, dtype=np.float64):
+        return lean(self._arrays(Columns(data), self.strategy), dtype)
+
+    @staticmethod
+    def _arrays(fields, strategy):
+        close = fields['Close']
+        # The SAR is sequential, the kernel runs once per ticker
+        long, short = grid.psar(fields['High'], fields['Low'], close)
+
+        if strategy is None:
+            return {'PSAR_Long': long, 'PSAR_Short': short}
+        if strategy == 'PSAR':
+            return signals(close > long, close < short)
+        return np.zeros(close.shape, dtype=np.int8)
+
+    def update(self, bar):
+        if self.state is None:
+            self.state = {'psar': Psar(af0=0.02, max_af=0.2)}
+        close = bar['Close']
+        long, short = self.state['psar'].push(bar['High'], bar['Low'], close)
+
+        if self.strategy is None:
+            return long, short
+        if self.strategy == 'PSAR':
+            return -1 if close < short else (1 if close > long else 0)
+        return 0
@@ -1,51 +1,61 @@
 import pandas as pd
-import pandas_ta as ta
 import numpy as np
-from .base import BaseIndicator
-import hashlib
+from . import grid, kernels
+from .base import BaseIndicator, Columns, lean, smoothing_lookback
+from .features import FeatureStore, default_feature_store, feature_name
+from .grid import first_valid, shift, signals
+from .panel import Panel
+from .streaming import Rsi, nan
+from tradingcore.utils.data_version import fingerprint
 
 class RSI(BaseIndicator):
     POSSIBLE_STRATEGIES=[None,'RSI','RSI_Falling','RSI_Divergence','RSI_Cross']
-    def __init__(self, strategy: str = None, length: int = 14):
+    def __init__(self, strategy: str = None, length: int = 14, features: FeatureStore = None):
         self.strategy = strategy
         self.length = length
         self.components = pd.DataFrame(columns=['RSI_Slow', 'RSI_Fast', 'RSI_Signal', 'RSI_Bullish_Divergence', 'RSI_Bearish_Divergence'])
-        self.data_hash = None
+        self.data_version = None
         self.cache = {}
+        self.features = features or default_feature_store
+        self.state = None  # Streaming state of update()
 
-    def _hash_data(self, data):
-        return hashlib.sha256(pd.util.hash_pandas_object(data).values).hexdigest()
-    
     def setStrategy(self, strategy: str = None):
         if strategy not in self.POSSIBLE_STRATEGIES:
             raise ValueError(f"Strategy {strategy} is not allowed. Possible strategies: {self.POSSIBLE_STRATEGIES}")
         self.strategy = strategy
 
     def _find_divergences(self, data, rsi):
+        low, high, rsi = data['Low'].to_numpy(), data['High'].to_numpy(), rsi.to_numpy()
         bullish_divergence = np.zeros(len(data))
         bearish_divergence = np.zeros(len(data))
-        
-        for i in range(2, len(data)):
-            # Bullish Divergence: Price makes lower low, RSI makes higher low
-            if data['Low'].iloc[i] < data['Low'].iloc[i-1] and rsi.iloc[i] > rsi.iloc[i-1]:
-                bullish_divergence[i] = 1
-            # Bearish Divergence: Price makes higher high, RSI makes lower high
-            if data['High'].iloc[i] > data['High'].iloc[i-1] and rsi.iloc[i] < rsi.iloc[i-1]:
-                bearish_divergence[i] = 1
-        
+
+        # Compare each bar from the third one on with the previous bar
+        # Bullish Divergence: Price makes lower low, RSI makes higher low
+        bullish_divergence[2:] = (low[2:] < low[1:-1]) & (rsi[2:] > rsi[1:-1])
+        # Bearish Divergence: Price makes higher high, RSI makes lower high
+        bearish_divergence[2:] = (high[2:] > high[1:-1]) & (rsi[2:] < rsi[1:-1])
+
         return bullish_divergence, bearish_divergence
 
+    def lookback(self):
+        # Price changes and the previous bar for crosses and divergences, the fast RSI has length 5
+        return smoothing_lookback(1.0 / max(self.length, 5)) + 2
+
+    @staticmethod
+    def rsi(data: pd.DataFrame, length: int) -> pd.Series:
+        # ta.rsi(length) in the compiled kernel
+        return pd.Series(kernels.rsi(data['Close'], length), index=data.index, name=f"RSI_{length}")
+
     def calculate(self, data: pd.DataFrame):
-        data_hash = self._hash_data(data)
+        data_version = fingerprint(data)
         # Check if the data has changed
-        if self.data_hash != data_hash:
-            # Update the hash
-            self.data_hash = data_hash
+        if self.data_version != data_version:
+            # Update the version
+            self.data_version = data_version
             # Calculate RSI components
-            data['RSI_Slow'] = ta.rsi(data['Close'], length=14)
-            data['RSI_Fast'] = ta.rsi(data['Close'], length=5)
-            self.components['RSI_Slow'] = data['RSI_Slow']
-            self.components['RSI_Fast'] = data['RSI_Fast']
+            # The input frame is only read
+            self.components['RSI_Slow'] = self.features.get(data, feature_name('rsi', self.length), lambda: self.rsi(data, self.length))
+            self.components['RSI_Fast'] = self.features.get(data, feature_name('rsi', 5), lambda: self.rsi(data, 5))
             # Calculate divergences
             bullish_divergence, bearish_divergence = self._find_divergences(data, self.components['RSI_Slow'])
             self.components['RSI_Bullish_Divergence'] = bullish_divergence
@@ -107,3 +117,76 @@ class RSI(BaseIndicator):
                 -1, self.components['RSI_Signal'])
         
         return self.components['RSI_Signal']
+
+    @classmethod
+    def batch(cls, data: pd.DataFrame, strategy: str = None, length=(14,)):
+        return cls.batch_arrays(data, strategy, {'length': length})
+
+    @classmethod
+    def panel(cls, bars, strategy: str = None, length: int = 14):
+        panel = Panel.of(bars)
+        return panel.frames(cls._arrays(panel, strategy, length))
+
+    def calculate_arrays(self, data: pd.DataFrame, dtype=np.float64):
+        return lean(self._arrays(Columns(data), self.strategy, self.length), dtype)
+
+    @classmethod
+    def _arrays(cls, fields, strategy, length):
+        close = fields['Close']
+        slow, fast = grid.rsi(close, length), grid.rsi(close, 5)
+
+        if strategy is None:
+            return {'RSI_Slow': slow, 'RSI_Fast': fast}
+        # From the third bar of each ticker
+        third = np.arange(close.shape[-1]) >= np.expand_dims(first_valid(close), -1) + 2
+        return cls._signals(strategy, slow, fast, fields['Low'], fields['High'], third)
+
+    @staticmethod
+    def _signals(strategy, slow, fast, low, high, third):
+        # Strategies over rows of bars, third marks the bars divergences start at
+        previous_slow, previous_fast = shift(slow, 1), shift(fast, 1)
+        if strategy == 'RSI':
+            return signals(slow < 30, slow > 70)
+        if strategy == 'RSI_Falling':
+            return signals(slow < 30, (previous_slow >= 70) & (slow > 70))
+        if strategy == 'RSI_Cross':
+            return signals((fast > slow) & (previous_fast <= previous_slow),
+                           (fast < slow) & (previous_fast >= previous_slow))
+        if strategy == 'RSI_Divergence':
+            # As _find_divergences()
+            bullish = third & (low < shift(low, 1)) & (slow > previous_slow)
+            bearish = third & (high > shift(high, 1)) & (slow < previous_slow)
+            return signals(bullish & (slow < 30), bearish & (slow > 70))
+        return np.zeros(slow.shape, dtype=np.int8)
+
+    def update(self, bar):
+        if self.state is None:
+            self.state = {'slow': Rsi(self.length), 'fast': Rsi(5), 'bars': 0,
+                          'previous': {'RSI_Slow': nan, 'RSI_Fast': nan, 'Low': nan, 'High': nan}}
+        state = self.state
+        previous = state['previous']
+        slow, fast = state['slow'].push(bar['Close']), state['fast'].push(bar['Close'])
+        low, high = bar['Low'], bar['High']
+        # Divergences start at the third bar as in _find_divergences()
+        divergence = state['bars'] >= 2
+        bullish = divergence and low < previous['Low'] and slow > previous['RSI_Slow']
+        bearish = divergence and high > previous['High'] and slow < previous['RSI_Slow']
+        previous_slow, previous_fast = previous['RSI_Slow'], previous['RSI_Fast']
+        state['previous'] = {'RSI_Slow': slow, 'RSI_Fast': fast, 'Low': low, 'High': high}
+        state['bars'] += 1
+
+        if self.strategy is None:
+            return slow, fast
+        signal = 0
+        if self.strategy == 'RSI':
+            signal = -1 if slow > 70 else (1 if slow < 30 else 0)
+        elif self.strategy == 'RSI_Falling':
+            signal = -1 if previous_slow >= 70 and slow > 70 else (1 if slow < 30 else 0)
+        elif self.strategy == 'RSI_Cross':
+            if fast < slow and previous_fast >= previous_slow:
+                signal = -1
+            elif fast > slow and previous_fast <= previous_slow:
+                signal = 1
+        elif self.strategy == 'RSI_Divergence':
+            signal = -1 if bearish and slow > 70 else (1 if bullish and slow < 30 else 0)
+        return signal
@@ -0,0 +1,117 @@
+import operator
+from collections import Counter
+from typing import NamedTuple
+from .grid import signals
+
+# Strategies declared as conditions on named values, e.g. 'Close > SenkouA'. Masks over
+# one set of values evaluates each distinct condition, and each conjunction of them,
+# once however many strategies use it.
+
+OPERATORS = {'>': operator.gt, '<': operator.lt, '>=': operator.ge, '<=': operator.le}
+MIRRORED = {'<': '>', '<=': '>='}
+
+class Condition(NamedTuple):
+    left: str
+    op: str
+    right: str
+
+    @classmethod
+    def parse(cls, text: str) -> 'Condition':
+        """'left op right' with op one of OPERATORS, 'a < b' and 'b > a' are the same condition."""
+        left, op, right = text.split()
+        if op not in OPERATORS:
+            raise ValueError(f"Unsupported operator {op} in condition '{text}'")
+        if op in MIRRORED:
+            left, op, right = right, MIRRORED[op], left
+        return cls(left, op, right)
+
+    def __str__(self):
+        return f"{self.left} {self.op} {self.right}"
+
+class Rule(NamedTuple):
+    buy: tuple
+    sell: tuple
+
+class RuleSet:
+    """
+    Strategies as name -> (buy conditions, sell conditions), each side a list of conditions
+    that must all hold. Sell wins when both sides hold, as in the np.where chains of calculate().
+    """
+
+    def __init__(self, strategies: dict):
+        parsed = {name: [{Condition.parse(text) for text in side} for side in sides] for name, sides in strategies.items()}
+        # Conditions used by most strategies first, so that conjunctions share their prefixes
+        usage = Counter(condition for sides in parsed.values() for side in sides for condition in side)
+        order = lambda condition: (-usage[condition], condition)
+        self.rules = {name: Rule(*(tuple(sorted(side, key=order)) for side in sides)) for name, sides in parsed.items()}
+        # Operator functions of the conditions for evaluating one bar
+        self.compiled = {name: tuple(tuple((OPERATORS[c.op], c.left, c.right) for c in side) for side in rule)
+                         for name, rule in self.rules.items()}
+
+    def __contains__(self, strategy):
+        return strategy in self.rules
+
+    def names(self, strategy) -> set:
+        """Names of the values the conditions of strategy compare."""
+        rule = self.rules.get(strategy, Rule((), ()))
+        return {name for condition in rule.buy + rule.sell for name in (condition.left, condition.right)}
+
+    def masks(self, values: dict) -> 'Masks':
+        return Masks(self, values)
+
+    def signal(self, strategy, values: dict) -> int:
+        """Signal of strategy for the scalar values of one bar, without caching masks."""
+        buy, sell = self.compiled.get(strategy, ((), ()))
+        return -1 if holds(sell, values) else (1 if holds(buy, values) else 0)
+
+def holds(conditions: tuple, values: dict) -> bool:
+    # Compiled conditions of one bar, stops at the first that fails
+    for op, left, right in conditions:
+        if not op(values[left], values[right]):
+            return False
+    return bool(conditions)
+
+class Masks:
+    """
+    Conditions of a RuleSet over values: name -> array (or scalar), or a callable returning
+    it when first needed. Arrays of different shapes broadcast, e.g. bars against parameter
+    combinations x bars.
+    """
+
+    def __init__(self, rules: RuleSet, values: dict):
+        self.rules = rules
+        self.values = dict(values)
+        self.conditions = {}
+        self.conjunctions = {}
+
+    def value(self, name):
+        value = self.values[name]
+        if callable(value):
+            value = self.values[name] = value()
+        return value
+
+    def condition(self, condition: Condition):
+        if condition not in self.conditions:
+            self.conditions[condition] = OPERATORS[condition.op](self.value(condition.left), self.value(condition.right))
+        return self.conditions[condition]
+
+    def all(self, conditions: tuple):
+        """Conjunction of conditions, every prefix of it is cached."""
+        if not conditions:
+            return False
+        if conditions not in self.conjunctions:
+            if len(conditions) == 1:
+                self.conjunctions[conditions] = self.condition(conditions[0])
+            else:
+                self.conjunctions[conditions] = self.all(conditions[:-1]) & self.condition(conditions[-1])
+        return self.conjunctions[conditions]
+
+    def buy_sell(self, strategy):
+        rule = self.rules.rules.get(strategy, Rule((), ()))
+        return self.all(rule.buy), self.all(rule.sell)
+
+    def signal(self, strategy):
+        return signals(*self.buy_sell(strategy))
+
+    def stats(self) -> dict:
+        return {'conditions': len(self.conditions), 'conjunctions': len(self.conjunctions)}
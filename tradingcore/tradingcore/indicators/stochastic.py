@@ -1,38 +1,48 @@
 import pandas as pd
 import pandas_ta as ta
 import numpy as np
-from .base import BaseIndicator
-import hashlib
+from .base import BaseIndicator, Columns, lean, ta_column
+from .features import FeatureStore, default_feature_store, feature_name
+from .grid import non_zero_range, rolling, shift, signals
+from .panel import Panel
+from .streaming import RollingExtreme, Sma, nan, non_zero
+from tradingcore.utils.data_version import fingerprint
 
 class StochasticOscillator(BaseIndicator):
     POSSIBLE_STRATEGIES=[None,'Stochastic']
-    def __init__(self, strategy: str = None, length: int = 14, smooth_k: int = 3, smooth_d: int = 3):
+    def __init__(self, strategy: str = None, length: int = 14, smooth_k: int = 3, smooth_d: int = 3,
+                 features: FeatureStore = None):
         self.strategy = strategy
         self.length = length
         self.smooth_k = smooth_k
         self.smooth_d = smooth_d
         self.components = pd.DataFrame(columns=['%K', '%D', 'Stochastic_Signal'])
-        self.data_hash = None
+        self.data_version = None
         self.cache = {}
+        self.features = features or default_feature_store
+        self.state = None  # Streaming state of update()
 
-    def _hash_data(self, data):
-        return hashlib.sha256(pd.util.hash_pandas_object(data).values).hexdigest()
-    
     def setStrategy(self, strategy: str = None):
         if strategy not in self.POSSIBLE_STRATEGIES:
             raise ValueError(f"Strategy {strategy} is not allowed. Possible strategies: {self.POSSIBLE_STRATEGIES}")
         self.strategy = strategy
 
+    def lookback(self):
+        # Rolling high and low, both smoothings and the previous bar for crosses take a bar less
+        # than the length + smooth_k + smooth_d bars ta.stoch needs to return anything
+        return self.length + self.smooth_k + self.smooth_d - 1
+
     def calculate(self, data: pd.DataFrame):
-        data_hash = self._hash_data(data)
+        data_version = fingerprint(data)
         # Check if the data has changed
-        if self.data_hash != data_hash:
-            # Update the hash
-            self.data_hash = data_hash
-            stoch_result = ta.stoch(data['High'], data['Low'], data['Close'], k=self.length, d=self.smooth_d, smooth_k=self.smooth_k)
+        if self.data_version != data_version:
+            # Update the version
+            self.data_version = data_version
+            stoch_result = self.features.get(data, feature_name('stoch', self.length, self.smooth_d, self.smooth_k),
+                                             lambda: ta.stoch(data['High'], data['Low'], data['Close'], k=self.length, d=self.smooth_d, smooth_k=self.smooth_k))
             # Assign %K and %D to the DataFrame
-            self.components['%K'] = pd.Series([0] * self.length + stoch_result['STOCHk_14_3_3'].tolist())
-            self.components['%D'] = pd.Series([0] * self.length + stoch_result['STOCHd_14_3_3'].tolist())
+            self.components['%K'] = ta_column(stoch_result, 'STOCHk_')
+            self.components['%D'] = ta_column(stoch_result, 'STOCHd_')
         
         self.components['Stochastic_Signal'] = 0
 
@@ -53,3 +63,49 @@ class StochasticOscillator(BaseIndicator):
                 -1, self.components['Stochastic_Signal'])
         
         return self.components['Stochastic_Signal']
+
+    @classmethod
+    def panel(cls, bars, strategy: str = None, length: int = 14, smooth_k: int = 3, smooth_d: int = 3):
+        panel = Panel.of(bars)
+        return panel.frames(cls._arrays(panel, strategy, length, smooth_k, smooth_d))
+
+    def calculate_arrays(self, data: pd.DataFrame, dtype=np.float64):
+        return lean(self._arrays(Columns(data), self.strategy, self.length, self.smooth_k, self.smooth_d), dtype)
+
+    @staticmethod
+    def _arrays(fields, strategy, length, smooth_k, smooth_d):
+        lowest_low, highest_high = rolling(fields['Low'], length, 'min'), rolling(fields['High'], length, 'max')
+        stoch = 100 * (fields['Close'] - lowest_low) / non_zero_range(highest_high, lowest_low)
+        # Rolling means are NaN until their window is past the start of each row
+        k = rolling(stoch, smooth_k, 'mean') if smooth_k > 1 else stoch
+        d = rolling(k, smooth_d, 'mean')
+
+        if strategy is None:
+            return {'%K': k, '%D': d}
+        if strategy == 'Stochastic':
+            previous_k, previous_d = shift(k, 1), shift(d, 1)
+            return signals((k > d) & (previous_k <= previous_d), (k < d) & (previous_k >= previous_d))
+        return np.zeros(k.shape, dtype=np.int8)
+
+    def update(self, bar):
+        if self.state is None:
+            self.state = {'lowest': RollingExtreme(self.length, highest=False), 'highest': RollingExtreme(self.length),
+                          'k': Sma(self.smooth_k) if self.smooth_k > 1 else None, 'd': Sma(self.smooth_d),
+                          'previous': (nan, nan)}
+        state = self.state
+        lowest_low, highest_high = state['lowest'].push(bar['Low']), state['highest'].push(bar['High'])
+        stoch = 100 * (bar['Close'] - lowest_low) / non_zero(highest_high - lowest_low)
+        # Each smoothing starts at the first value of its input
+        k = stoch if state['k'] is None or stoch != stoch else state['k'].push(stoch)
+        d = state['d'].push(k) if k == k else nan
+        previous_k, previous_d = state['previous']
+        state['previous'] = (k, d)
+
+        if self.strategy is None:
+            return k, d
+        if self.strategy == 'Stochastic':
+            if k < d and previous_k >= previous_d:
+                return -1
+            if k > d and previous_k <= previous_d:
+                return 1
+        return 0
@@ -0,0 +1,216 @@
+import math
+from collections import deque
+import numpy as np
+
+# Incremental versions of the pandas_ta calculations used by the indicators, one bar at a
+# time in O(1) amortised. They follow the pandas_ta/pandas arithmetic so that update()
+# matches calculate(): EWMs are identical, rolling sums and variances agree to rounding.
+# With TA-Lib installed pandas_ta uses its kernels instead, which seed some averages
+# differently, so the first values may differ.
+
+nan = float('nan')
+EPSILON = np.finfo(float).eps
+
+class Ewm:
+    """pandas Series.ewm(com=com, adjust=False).mean()."""
+
+    def __init__(self, com: float):
+        self.alpha = 1.0 / (1.0 + com)
+        self.value = nan
+        self.old_wt = 1.0
+
+    @classmethod
+    def from_alpha(cls, alpha: float):
+        return cls((1.0 - alpha) / alpha)
+
+    def push(self, x: float) -> float:
+        observed = x == x
+        if self.value == self.value:
+            self.old_wt *= 1.0 - self.alpha
+            if observed:
+                # Same as pandas, constant series stay exact
+                if self.value != x:
+                    self.value = (self.old_wt * self.value + self.alpha * x) / (self.old_wt + self.alpha)
+                self.old_wt = 1.0
+        elif observed:
+            self.value = x
+        return self.value
+
+class Ema:
+    """ta.ema(length), seeded with the SMA of the first length values."""
+
+    def __init__(self, length: int):
+        self.length = length
+        self.seed = []
+        self.ewm = Ewm((length - 1) / 2.0)
+
+    def push(self, x: float) -> float:
+        if self.seed is not None:
+            self.seed.append(x)
+            if len(self.seed) < self.length:
+                return nan
+            x = float(np.mean(self.seed))
+            self.seed = None
+        return self.ewm.push(x)
+
+class Sma:
+    """ta.sma(length) as a running sum, summed again exactly every length values."""
+
+    def __init__(self, length: int):
+        self.length = length
+        self.window = deque()
+        self.total = 0.0
+        self.pushed = 0
+
+    def push(self, x: float) -> float:
+        self.window.append(x)
+        self.total += x
+        if len(self.window) > self.length:
+            self.total -= self.window.popleft()
+        self.pushed += 1
+        # Keeps the rounding error of the running sum from accumulating
+        if self.pushed % self.length == 0:
+            self.total = math.fsum(self.window)
+        return self.total / self.length if len(self.window) == self.length else nan
+
+class RollingVar:
+    """Series.rolling(length).var(ddof), with the online update pandas uses."""
+
+    def __init__(self, length: int, ddof: int = 1):
+        self.length = length
+        self.ddof = ddof
+        self.window = deque()
+        self.mean = 0.0
+        self.ssqdm = 0.0
+        self.same = 0  # Consecutive equal values, a constant window has a variance of 0
+        self.pushed = 0
+
+    def push(self, x: float) -> float:
+        self.same = self.same + 1 if self.window and self.window[-1] == x else 1
+        self.window.append(x)
+        nobs = len(self.window)
+        previous_mean = self.mean
+        self.mean += (x - self.mean) / nobs
+        self.ssqdm += (x - previous_mean) * (x - self.mean)
+        if nobs > self.length:
+            old = self.window.popleft()
+            nobs -= 1
+            previous_mean = self.mean
+            self.mean -= (old - self.mean) / nobs
+            self.ssqdm -= (old - previous_mean) * (old - self.mean)
+        self.pushed += 1
+        # Recomputed from the window every length values, the online update drifts
+        if self.pushed % self.length == 0:
+            self.mean = math.fsum(self.window) / nobs
+            self.ssqdm = math.fsum((value - self.mean) ** 2 for value in self.window)
+        if nobs < self.length or nobs <= self.ddof:
+            return nan
+        if nobs == 1 or self.same >= nobs:
+            return 0.0
+        return max(self.ssqdm / (nobs - self.ddof), 0.0)
+
+class RollingExtreme:
+    """Series.rolling(length).max() (or .min()) with a monotonic deque."""
+
+    def __init__(self, length: int, highest: bool = True):
+        self.length = length
+        self.highest = highest
+        self.candidates = deque()  # (position, value), values decreasing for max
+        self.position = 0
+
+    def push(self, x: float) -> float:
+        # Values dominated by a newer one can never be the extreme again
+        if self.highest:
+            while self.candidates and self.candidates[-1][1] <= x:
+                self.candidates.pop()
+        else:
+            while self.candidates and self.candidates[-1][1] >= x:
+                self.candidates.pop()
+        self.candidates.append((self.position, x))
+        if self.candidates[0][0] <= self.position - self.length:
+            self.candidates.popleft()
+        self.position += 1
+        return self.candidates[0][1] if self.position >= self.length else nan
+
+class MidPrice:
+    """ta.midprice(length): midpoint of the highest high and lowest low."""
+
+    def __init__(self, length: int):
+        self.highest = RollingExtreme(length, highest=True)
+        self.lowest = RollingExtreme(length, highest=False)
+
+    def push(self, high: float, low: float) -> float:
+        lowest_low = self.lowest.push(low)
+        return 0.5 * (lowest_low + self.highest.push(high))
+
+class Rsi:
+    """ta.rsi(length): Wilder (rma) smoothed gains over gains plus losses."""
+
+    def __init__(self, length: int, scalar: float = 100):
+        self.scalar = scalar
+        self.positive = Ewm.from_alpha(1.0 / length)
+        self.negative = Ewm.from_alpha(1.0 / length)
+        self.close = nan
+
+    def push(self, close: float) -> float:
+        change = close - self.close
+        self.close = close
+        positive = self.positive.push(change if not change < 0 else 0.0)
+        negative = self.negative.push(change if not change > 0 else 0.0)
+        total = positive + abs(negative)
+        return self.scalar * positive / total if total != 0 else nan
+
+class Psar:
+    """ta.psar(high, low, close, af0, af, max_af), returns the long and short SAR."""
+
+    def __init__(self, af0: float = 0.02, max_af: float = 0.2):
+        self.af0 = af0
+        self.max_af = max_af
+        self.first = None
+        self.previous_high = self.previous_low = nan
+        self.sar = self.ep = nan
+        self.af = af0
+        self.falling = False
+
+    def _start(self, high, low):
+        # Initial trend from the -DM of the first two bars
+        high0, low0, close0 = self.first
+        up, down = high - high0, low0 - low
+        dmn = down if down > up and down > 0 else 0.0
+        self.falling = abs(dmn) >= EPSILON and dmn > 0
+        self.ep = low0 if self.falling else high0
+        self.sar = close0
+        self.previous_high, self.previous_low = high0, low0
+
+    def push(self, high: float, low: float, close: float):
+        if self.first is None:
+            self.first = (high, low, close)
+            return nan, nan
+        if self.sar != self.sar:
+            self._start(high, low)
+        sar = self.sar + self.af * (self.ep - self.sar)
+        if self.falling:
+            reverse = high > sar
+            if low < self.ep:
+                self.ep = low
+                self.af = min(self.af + self.af0, self.max_af)
+            sar = max(self.previous_high, sar)
+        else:
+            reverse = low < sar
+            if high > self.ep:
+                self.ep = high
+                self.af = min(self.af + self.af0, self.max_af)
+            sar = min(self.previous_low, sar)
+        if reverse:
+            sar = self.ep
+            self.af = self.af0
+            self.falling = not self.falling
+            self.ep = low if self.falling else high
+        self.sar = sar
+        self.previous_high, self.previous_low = high, low
+        return (nan, sar) if self.falling else (sar, nan)
+
+def non_zero(x: float) -> float:
+    # non_zero_range() of pandas_ta adds epsilon to the whole series when any value is 0,
+    # here only to the zero values; others only differ in the last bits
+    return x + EPSILON if x == 0 else x
@@ -1,7 +1,7 @@
 import pandas as pd
 import numpy as np
 from .base import BaseIndicator
-import hashlib
+from tradingcore.utils.data_version import fingerprint
 
 class VolumeIndicator(BaseIndicator):
     POSSIBLE_STRATEGIES = [None, 'Volume']
@@ -9,18 +9,18 @@ class VolumeIndicator(BaseIndicator):
     def __init__(self, strategy: str = None):
         self.strategy = strategy
         self.components = pd.DataFrame(columns=['Volume_Signal'])
-        self.data_hash = None
+        self.data_version = None
         self.cache = {}
 
-    def _hash_data(self, data):
-        return hashlib.sha256(pd.util.hash_pandas_object(data).values).hexdigest()
+    def lookback(self):
+        return 20 - 1
 
     def calculate(self, data: pd.DataFrame):
-        data_hash = self._hash_data(data)
+        data_version = fingerprint(data)
         # Check if the data has changed
-        if self.data_hash != data_hash:
-            # Update the hash
-            self.data_hash = data_hash
+        if self.data_version != data_version:
+            # Update the version
+            self.data_version = data_version
             # Volume components (can be more complex, like volume moving averages)
             self.components['Volume'] = data['Volume']
         
@@ -0,0 +1,49 @@
+import itertools
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+
+REVISION_ATTR = 'tradingcore_revision'
+OHLCV = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+_revisions = itertools.count(1)
+
+class DataVersion(NamedTuple):
+    revision: int
+    length: int
+    first: int
+    last: int
+    checksum: bytes
+
+def stamp(data: pd.DataFrame) -> int:
+    """
+    Give data a process-wide, monotonically increasing revision number. The number is
+    tied to the frame object, frames derived from it (copies, slices) are not stamped.
+    """
+    revision = data.attrs.get(REVISION_ATTR)
+    if revision is None or revision[1] != id(data):
+        revision = data.attrs[REVISION_ATTR] = (next(_revisions), id(data))
+    return revision[0]
+
+def restamp(data: pd.DataFrame, revision: int):
+    """Give data the revision of the frame it is an unchanged copy of, e.g. a cached frame."""
+    data.attrs[REVISION_ATTR] = (revision, id(data))
+
+def fingerprint(data: pd.DataFrame) -> DataVersion:
+    """
+    Cheap version of the bars in data instead of hashing every row: the length, the
+    first and last timestamps, and either the revision stamped by TimeSeriesData or,
+    for other frames, the OHLCV values of the last row. Stamped frames are replaced,
+    not edited, when their bars change; edits in place to rows other than the last one
+    of unstamped frames are not detected.
+    """
+    if len(data) == 0:
+        return DataVersion(None, 0, None, None, b'')
+    index = data.index
+    first, last = (index.asi8[0], index.asi8[-1]) if isinstance(index, pd.DatetimeIndex) else (index[0], index[-1])
+    revision = data.attrs.get(REVISION_ATTR)
+    if revision is not None and revision[1] == id(data):
+        return DataVersion(revision[0], len(data), first, last, b'')
+    # Column access is not free with copy-on-write (enabled by pandas_ta), only read the last row here
+    checksum = np.array([data[column].iat[-1] for column in OHLCV if column in data.columns], dtype=np.float64)
+    return DataVersion(None, len(data), first, last, checksum.tobytes())
@@ -0,0 +1,44 @@
+import asyncio
+import threading
+import time
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: rate tokens are added per second up to capacity, and
+    acquire() blocks (acquire_async() awaits) until the requested tokens are available.
+    """
+
+    def __init__(self, rate: float, capacity: float = None, clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated_at = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def _take(self, tokens: float) -> float:
+        # Take the tokens and return 0, or return how long to wait for them
+        if tokens > self.capacity:
+            raise ValueError(f"Can not acquire {tokens} tokens from a bucket of {self.capacity}")
+        with self._lock:
+            self._refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return 0.0
+            return (tokens - self.tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0):
+        while (wait := self._take(tokens)) > 0:
+            self.sleep(wait)
+
+    async def acquire_async(self, tokens: float = 1.0):
+        while (wait := self._take(tokens)) > 0:
+            await asyncio.sleep(wait)
@@ -42,16 +42,20 @@ def check_tickers_exist(tickers):
     if len(tickers) < len(tickers):
         logging.info(f'Detected duplicated tickers')
 
+    # Tickers without cached data are fetched in concurrent, rate limited batches
+    from tradingcore.data.sources import BatchedFetcher
+    cached = {ticker: load_cached_data(ticker) for ticker in tickers}
+    missing = [ticker for ticker, data in cached.items() if data is None]
+    fetched = BatchedFetcher().fetch_many(missing, '1d', period='1mo') if missing else {}
+
     for ticker in tickers:
-        cached_data = load_cached_data(ticker)
+        cached_data = cached[ticker]
         
         if cached_data is not None:
             logging.debug(f"Using cached data for {ticker}")
             data = cached_data
         else:
-            #print(f"Fetching data for {ticker} from Yahoo Finance...")
-            # Example: Fetch data for the last 1 month with daily interval
-            data = fetch_yahoo_finance_data(ticker, interval='1d', period='1mo')
+            data = fetched.get(ticker)
         
         if data is not None and not data.empty:
             valid_tickers.append(ticker)